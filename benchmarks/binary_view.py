@@ -0,0 +1,57 @@
+# Compares reading values with the seek-based functions in fs_helpers against reading them with a BinaryView, and times
+# parsing a large RARC (which reads all of its headers through a BinaryView).
+# Run from the root of the repository with: python benchmarks/binary_view.py
+
+import os
+import sys
+import timeit
+from io import BytesIO
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from gclib import fs_helpers as fs
+from gclib.rarc import RARC
+
+from rarc_fixtures import build_rarc
+
+NUM_DIRS = 100
+NUM_FILES = 10000
+FILE_SIZE = 16
+NUM_CALLS = 100000
+NUM_RUNS = 5
+
+def build_rarc_data() -> bytes:
+  rarc = build_rarc(NUM_DIRS, NUM_FILES, FILE_SIZE)
+  rarc.save_changes()
+  return rarc.data.getvalue()
+
+def time_per_call(func, number=NUM_CALLS) -> float:
+  # Returns the best time for a single call, in seconds.
+  return min(timeit.repeat(func, number=number, repeat=NUM_RUNS)) / number
+
+def main():
+  rarc_data = build_rarc_data()
+  data = BytesIO(rarc_data)
+  view = fs.BinaryView(rarc_data)
+  # Offset of a file name in the string table.
+  string_offset = rarc_data.index(b"file00000.bin\0")
+  
+  print("Per call (best of %d runs of %d calls):" % (NUM_RUNS, NUM_CALLS))
+  print("  %-30s %8s %8s" % ("", "fs", "view"))
+  print("  %-30s %6.0fns %6.0fns" % (
+    "read_u32",
+    time_per_call(lambda: fs.read_u32(data, 0x40)) * 1e9,
+    time_per_call(lambda: view.read_u32(0x40)) * 1e9,
+  ))
+  print("  %-30s %6.0fns %6.0fns" % (
+    "read_str_until_null_character",
+    time_per_call(lambda: fs.read_str_until_null_character(data, string_offset)) * 1e9,
+    time_per_call(lambda: view.read_str_until_null_character(string_offset)) * 1e9,
+  ))
+  
+  rarc = RARC(BytesIO(rarc_data))
+  parse_time = min(timeit.repeat(lambda: RARC(BytesIO(rarc_data)), number=1, repeat=NUM_RUNS))
+  print("Parse RARC with %d entries (best of %d runs): %.3fs" % (len(rarc.file_entries), NUM_RUNS, parse_time))
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,31 @@
+# Builds the archives that the benchmarks are run on.
+
+from io import BytesIO
+
+from gclib.rarc import RARC, RARCFileEntry, RARCFileAttrType
+
+def build_rarc(num_dirs: int, num_files: int, file_size: int) -> RARC:
+  # Returns an unsaved archive with num_files files of file_size bytes each, spread evenly across the root node and
+  # num_dirs directories inside of it.
+  rarc = RARC()
+  rarc.add_root_directory()
+  root_node = rarc.nodes[0]
+  nodes = [root_node]
+  for dir_index in range(num_dirs):
+    _, node = rarc.add_new_directory("dir%d" % dir_index, "DIR", root_node)
+    nodes.append(node)
+  
+  # The file entries are created directly instead of with add_new_file, as that regenerates the list of all file
+  # entries after each file is added, which would take longer than anything being benchmarked.
+  for file_index in range(num_files):
+    node = nodes[file_index % len(nodes)]
+    file_entry = RARCFileEntry(rarc)
+    file_entry.type = RARCFileAttrType.FILE | RARCFileAttrType.PRELOAD_TO_MRAM
+    file_entry.name = "file%05d.bin" % file_index
+    file_entry.data = BytesIO(b"x"*file_size)
+    file_entry.data_size = file_size
+    file_entry.parent_node = node
+    node.files.append(file_entry)
+  rarc.regenerate_all_file_entries_list()
+  
+  return rarc
@@ -0,0 +1,33 @@
+# Times RARC.save_changes on an archive with many small files spread across many directories.
+# Run from the root of the repository with: python benchmarks/rarc_save.py
+
+import hashlib
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from rarc_fixtures import build_rarc
+
+NUM_DIRS = 100
+NUM_FILES = 10000
+FILE_SIZE = 16
+NUM_RUNS = 5
+
+def main():
+  times = []
+  for _ in range(NUM_RUNS):
+    # A new archive is built for each run, as saving an archive that was already saved can skip most of the work.
+    rarc = build_rarc(NUM_DIRS, NUM_FILES, FILE_SIZE)
+    start_time = time.perf_counter()
+    rarc.save_changes()
+    times.append(time.perf_counter() - start_time)
+  
+  print("save_changes with %d files in %d directories:" % (NUM_FILES, NUM_DIRS))
+  print("  best %.3fs, worst %.3fs over %d runs" % (min(times), max(times), NUM_RUNS))
+  # The hash of the output can be compared between versions to check that the archive that was saved didn't change.
+  print("  output md5 %s" % hashlib.md5(rarc.data.getvalue()).hexdigest())
+
+if __name__ == "__main__":
+  main()
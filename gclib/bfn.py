@@ -295,16 +295,16 @@ class MAP1(JChunk):
       case BFNMappingType.TABLE_MAPPED:
         assert self.entry_count == (self.last_character - self.first_character)+1
         table_offset = 0x10
-        for index in range(self.entry_count):
+        codes = fs.read_array(self.data, table_offset, self.entry_count, u16).tolist()
+        for index, code in enumerate(codes):
           char_ord = self.first_character + index
-          code = fs.read_u16(self.data, table_offset+index*2)
           self.char_ord_to_code[char_ord] = code
           self.code_to_char_ord[code] = char_ord
       case BFNMappingType.MAP_MAPPED:
         table_offset = 0x10
-        for index in range(self.entry_count):
-          char_ord = fs.read_u16(self.data, table_offset+index*4+0)
-          code = fs.read_u16(self.data, table_offset+index*4+2)
+        # Pairs of a character and its code.
+        table = fs.read_array(self.data, table_offset, self.entry_count*2, u16).tolist()
+        for char_ord, code in zip(table[0::2], table[1::2]):
           self.char_ord_to_code[char_ord] = code
           self.code_to_char_ord[code] = char_ord
       case _:
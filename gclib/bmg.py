@@ -1,6 +1,7 @@
 from enum import Enum
 from io import BytesIO
 import re
+import struct
 
 from gclib import fs_helpers as fs
 from gclib.bfn import BFN
@@ -176,6 +177,8 @@ TEXT_BOX_TYPE_TO_MAX_LINE_LENGTH = {
 }
 
 class Message:
+  STRUCT = struct.Struct(">IHHHHBBBBBBBBBHB")
+  
   def __init__(self, data, bmg):
     self.data = data
     self.bmg = bmg
@@ -231,27 +234,13 @@ class Message:
     self.string = "" # Will be set after all messages are read.
   
   def save_changes(self):
-    data = self.data
-    
-    fs.write_u32(data, self.offset, self.string_offset)
-    fs.write_u16(data, self.offset+4, self.message_id)
-    fs.write_u16(data, self.offset+6, self.item_price)
-    fs.write_u16(data, self.offset+8, self.next_message_id)
-    fs.write_u16(data, self.offset+0x0A, self.unknown_1)
-    
-    fs.write_u8(data, self.offset+0x0C, self.text_box_type.value)
-    fs.write_u8(data, self.offset+0x0D, self.initial_draw_type)
-    fs.write_u8(data, self.offset+0x0E, self.text_box_position)
-    fs.write_u8(data, self.offset+0x0F, self.display_item_id)
-    
-    fs.write_u8(data, self.offset+0x10, self.text_alignment)
-    fs.write_u8(data, self.offset+0x11, self.initial_sound)
-    fs.write_u8(data, self.offset+0x12, self.initial_camera_behavior)
-    fs.write_u8(data, self.offset+0x13, self.initial_speaker_anim)
-    
-    fs.write_u8(data, self.offset+0x14, self.unknown_3)
-    fs.write_u16(data, self.offset+0x15, self.num_lines_per_box)
-    fs.write_u8(data, self.offset+0x17, self.unknown_4)
+    # The whole entry is packed and written at once.
+    fs.write_bytes(self.data, self.offset, self.STRUCT.pack(
+      self.string_offset, self.message_id, self.item_price, self.next_message_id, self.unknown_1,
+      self.text_box_type.value, self.initial_draw_type, self.text_box_position, self.display_item_id,
+      self.text_alignment, self.initial_sound, self.initial_camera_behavior, self.initial_speaker_anim,
+      self.unknown_3, self.num_lines_per_box, self.unknown_4,
+    ))
     
     self.write_string()
   
@@ -321,7 +310,7 @@ class Message:
     
     string_pool_data = self.bmg.dat1.data
     str_start_offset = 8 + self.string_offset
-    fs.write_and_pack_bytes(string_pool_data, str_start_offset, bytes_to_write, "B"*len(bytes_to_write))
+    fs.write_bytes(string_pool_data, str_start_offset, bytes(bytes_to_write))
   
   def word_wrap_string_part(self, font: BFN, string: str, extra_line_length=0):
     max_line_length = TEXT_BOX_TYPE_TO_MAX_LINE_LENGTH[self.text_box_type]
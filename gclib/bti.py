@@ -1,4 +1,5 @@
 
+import struct
 from io import BytesIO
 from enum import Enum
 
@@ -11,6 +12,9 @@ from gclib.texture_utils import IMAGE_FORMATS_THAT_USE_PALETTES, GREYSCALE_IMAGE
 from gclib.gx_enums import WrapMode, FilterMode
 
 class BTI(GCLibFile):
+  HEADER_STRUCT_1 = struct.Struct(">BBHHBBBBHI")
+  HEADER_STRUCT_2 = struct.Struct(">BBBBBBhI")
+  
   def __init__(self, flexible_data: GCLibFileEntry | BytesIO | str | None = None, header_offset=0):
     if isinstance(flexible_data, GCLibFileEntry) or isinstance(flexible_data, str):
       assert header_offset == 0
@@ -64,34 +68,23 @@ class BTI(GCLibFile):
       self.mipmap_count = 1
   
   def save_header_changes(self):
-    fs.write_u8(self.data, self.header_offset+0, self.image_format.value)
-    
-    fs.write_u8(self.data, self.header_offset+1, self.alpha_setting)
-    fs.write_u16(self.data, self.header_offset+2, self.width)
-    fs.write_u16(self.data, self.header_offset+4, self.height)
-    
-    fs.write_u8(self.data, self.header_offset+6, self.wrap_s.value)
-    fs.write_u8(self.data, self.header_offset+7, self.wrap_t.value)
-    
     self.palettes_enabled = self.needs_palettes()
-    fs.write_u8(self.data, self.header_offset+8, int(self.palettes_enabled))
-    fs.write_u8(self.data, self.header_offset+9, self.palette_format.value)
-    fs.write_u16(self.data, self.header_offset+0xA, self.num_colors)
-    fs.write_u32(self.data, self.header_offset+0xC, self.palette_data_offset)
-    
-    fs.write_u8(self.data, self.header_offset+0x14, self.min_filter.value)
-    fs.write_u8(self.data, self.header_offset+0x15, self.mag_filter.value)
     
     max_mipmap_count = self.get_max_valid_mipmap_count()
     assert self.mipmap_count <= max_mipmap_count, f"Mipmap count {self.mipmap_count} too large ({max_mipmap_count} maximum)"
     self.max_lod = min(0xFF, max(0, (self.mipmap_count-1)*8))
-    fs.write_u8(self.data, self.header_offset+0x16, self.min_lod)
-    fs.write_u8(self.data, self.header_offset+0x17, self.max_lod)
-    fs.write_u8(self.data, self.header_offset+0x18, self.mipmap_count)
-    fs.write_u8(self.data, self.header_offset+0x19, self.unknown_3)
-    fs.write_s16(self.data, self.header_offset+0x1A, self.lod_bias)
     
-    fs.write_u32(self.data, self.header_offset+0x1C, self.image_data_offset)
+    # The header is packed in two parts, since the four bytes at 0x10 are not written.
+    fs.write_bytes(self.data, self.header_offset+0x00, self.HEADER_STRUCT_1.pack(
+      self.image_format.value, self.alpha_setting, self.width, self.height,
+      self.wrap_s.value, self.wrap_t.value,
+      int(self.palettes_enabled), self.palette_format.value, self.num_colors, self.palette_data_offset,
+    ))
+    fs.write_bytes(self.data, self.header_offset+0x14, self.HEADER_STRUCT_2.pack(
+      self.min_filter.value, self.mag_filter.value,
+      self.min_lod, self.max_lod, self.mipmap_count, self.unknown_3, self.lod_bias,
+      self.image_data_offset,
+    ))
   
   # Note: This function is for standalone .bti files only (as opposed to textures embedded inside
   # J3D models/animations).
@@ -8,6 +8,8 @@ import types
 import functools
 from io import BytesIO
 import copy
+import inspect
+import struct
 
 from gclib import fs_helpers as fs
 from gclib.fs_helpers import u32, u24, u16, u8, s32, s16, s8, u16Rot, FixedStr, MagicStr, MappedBool
@@ -32,6 +34,10 @@ UNREAD = _UNREAD_TYPE()
 
 PRINT_INVALID_VALUE_WARNINGS = True
 
+# Whether BUNFOE.read and BUNFOE.save use the precompiled codec for each class instead of handling
+# each field one at a time. Both produce the same results, this is only useful for debugging.
+USE_COMPILED_CODECS = True
+
 
 class Field(dataclasses.Field):
   __slots__ = ('name', 'type', 'default', 'default_factory', 'repr',
@@ -134,13 +140,19 @@ def _process_class(cls, init, repr, eq, order, unsafe_hash, frozen,
   cls_annotations = cls.__dict__.get('__annotations__', {})
   for field_name, field_type in cls_annotations.items():
     default = getattr(cls, field_name, MISSING)
+    if isinstance(default, types.MemberDescriptorType):
+      # This field is in the __slots__ of a base class, so it has no default value.
+      default = MISSING
     if not isinstance(default, Field):
       if isinstance(default, dataclasses.Field):
         raise ValueError("Used a dataclass field instead of a BUNFOE field")
       setattr(cls, field_name, field(default=default))
   
+  orig_cls = cls
   cls = dataclasses._process_class(cls, init, repr, eq, order, unsafe_hash, frozen,
                                    match_args, kw_only, slots, weakref_slot)
+  if cls is not orig_cls:
+    _update_class_cells(orig_cls, cls)
   
   try:
     base_class = BUNFOE # @IgnoreException
@@ -151,6 +163,30 @@ def _process_class(cls, init, repr, eq, order, unsafe_hash, frozen,
   
   return cls
 
+def _update_class_cells(orig_cls, new_cls):
+  # Adding slots requires dataclasses to create a new class. Methods that call super() with no arguments find their
+  # class through a __class__ cell, which would still point to the original class and make super() raise an error.
+  for value in new_cls.__dict__.values():
+    if isinstance(value, (staticmethod, classmethod)):
+      funcs = [value.__func__]
+    elif isinstance(value, property):
+      funcs = [value.fget, value.fset, value.fdel]
+    else:
+      funcs = [value]
+    for func in funcs:
+      func = inspect.unwrap(func) if func is not None else None
+      closure = getattr(func, '__closure__', None)
+      if closure is None:
+        continue
+      for cell in closure:
+        try:
+          cell_contents = cell.cell_contents
+        except ValueError:
+          # Empty cell.
+          continue
+        if cell_contents is orig_cls:
+          cell.cell_contents = new_cls
+
 @dataclass_transform(kw_only_default=True, field_specifiers=(field, Field))
 def bunfoe(cls=None, /, *,
            # Dataclass arguments. Most defaults are left the same, but kw_only is changed from False
@@ -174,12 +210,17 @@ def bunfoe(cls=None, /, *,
   return wrap(cls)
 
 
-@bunfoe(eq=False)
+@bunfoe(eq=False, slots=True)
 class BUNFOE:
   """Binary-UNpacking Field-Owning Entity.
   
   This is a wrapper around dataclasses that implements automatic reading and writing of binary
-  struct data."""
+  struct data.
+  
+  Classes that have many instances can be decorated with @bunfoe(slots=True) so their instances use
+  __slots__ instead of a __dict__, which uses much less memory. Their instances can't be given any
+  attributes that aren't fields, and any base classes that aren't decorated with @bunfoe must
+  define an empty __slots__ for it to have an effect."""
   
   # data is the binary data the instance will be unpacked from upon calling read().
   # If not passed upon instantiation, it will default to a new blank BytesIO.
@@ -274,6 +315,21 @@ class BUNFOE:
   #region Reading
   def read(self, offset: int) -> int:
     orig_offset = offset
+    
+    codec = BUNFOECodec.get_read_codec(type(self)) if USE_COMPILED_CODECS else None
+    if codec is None:
+      offset = self.read_fields(fields(self), offset)
+    else:
+      offset = codec.read(self, offset)
+    
+    assert offset >= orig_offset
+    if self.DATA_SIZE is not None:
+      size_read = offset - orig_offset
+      assert size_read == self.DATA_SIZE, f"Expected {self.__class__.__name__} to be 0x{self.DATA_SIZE:X} bytes, but read 0x{size_read:X} bytes"
+    
+    return offset
+  
+  def read_fields(self, fields_to_read: list[Field], offset: int) -> int:
     bitfield = None
     bit_offset = None
     def finish_reading_bitfield():
@@ -293,7 +349,7 @@ class BUNFOE:
       
       bitfield = None
       bit_offset = None
-    for field in fields(self):
+    for field in fields_to_read:
       if field.manual_read:
         continue
       if bitfield is None:
@@ -308,7 +364,7 @@ class BUNFOE:
           bit_offset = self.read_bitfield_property(bitfield, field, bit_offset)
           continue
       
-      # print(f"0x{offset - orig_offset:X} {field.name}")
+      # print(f"0x{offset:X} {field.name}")
       offset = self.read_field(field, offset)
       if field.bitfield:
         bitfield = field
@@ -318,11 +374,6 @@ class BUNFOE:
       # Bitfield continued until the end of this class so we didn't finish it in the loop.
       finish_reading_bitfield()
     
-    assert offset >= orig_offset
-    if self.DATA_SIZE is not None:
-      size_read = offset - orig_offset
-      assert size_read == self.DATA_SIZE, f"Expected {self.__class__.__name__} to be 0x{self.DATA_SIZE:X} bytes, but read 0x{size_read:X} bytes"
-    
     return offset
   
   def read_field(self, field: Field, offset: int) -> int:
@@ -401,9 +452,8 @@ class BUNFOE:
       assert PRINT_INVALID_VALUE_WARNINGS and raw_value in field_type.VALID_VALUES, f"Boolean value not valid: {raw_value}"
     
     if issubclass(field_type, Enum):
-      if raw_value in field_type:
-        value = field_type(raw_value)
-      else:
+      value = get_enum_member(field_type, raw_value)
+      if value is None:
         if PRINT_INVALID_VALUE_WARNINGS:
           print(f"Invalid value for enum {field_type}: {raw_value}")
         value = raw_value
@@ -437,8 +487,9 @@ class BUNFOE:
       for base_class in field_type.__mro__:
         if issubclass(base_class, int) and base_class in fs.PRIMITIVE_TYPE_TO_BYTE_SIZE:
           raw_value = self.read_value(base_class, offset)
-          if raw_value in field_type:
-            return field_type(raw_value)
+          member = get_enum_member(field_type, raw_value)
+          if member is not None:
+            return member
           else:
             if PRINT_INVALID_VALUE_WARNINGS:
               print(f"Invalid value for enum {field_type}: {raw_value}")
@@ -455,9 +506,24 @@ class BUNFOE:
   #region Saving
   def save(self, offset: int) -> int:
     orig_offset = offset
+    
+    codec = BUNFOECodec.get_save_codec(type(self)) if USE_COMPILED_CODECS else None
+    if codec is None:
+      offset = self.save_fields(fields(self), offset)
+    else:
+      offset = codec.save(self, offset)
+    
+    assert offset >= orig_offset
+    if self.DATA_SIZE is not None:
+      size_saved = offset - orig_offset
+      assert size_saved == self.DATA_SIZE
+    
+    return offset
+  
+  def save_fields(self, fields_to_save: list[Field], offset: int) -> int:
     bitfield = None
     bit_offset = None
-    for field in fields(self):
+    for field in fields_to_save:
       if field.manual_read:
         continue
       if field.bitfield:
@@ -491,11 +557,6 @@ class BUNFOE:
       # Save it now instead.
       offset = self.save_field(bitfield, offset)
     
-    assert offset >= orig_offset
-    if self.DATA_SIZE is not None:
-      size_saved = offset - orig_offset
-      assert size_saved == self.DATA_SIZE
-    
     return offset
   
   def save_field(self, field: Field, offset: int) -> int:
@@ -610,3 +671,408 @@ class BUNFOE:
     else:
       raise NotImplementedError
   #endregion
+
+
+#region Codecs
+# Format characters for the primitive types that can be packed with a struct.Struct.
+# struct has no three byte integer type, so u24s are packed as three raw bytes instead.
+PRIMITIVE_TYPE_TO_STRUCT_FORMAT_CHAR = {
+  u32  : "I",
+  u16  : "H",
+  u8   : "B",
+  s32  : "i",
+  s16  : "h",
+  s8   : "b",
+  float: "f",
+}
+
+# The methods that a codec does the work of. If a class overrides any of these, its fields are always read or saved
+# one at a time instead so that the overridden method gets called.
+CODEC_READ_METHOD_NAMES = [
+  'get_byte_size', 'get_list_length', 'read_fields', 'read_field', 'read_list_field', 'read_value',
+  'read_bitfield_property', 'read_bitfield_property_list_field', 'read_bitfield_property_value',
+]
+CODEC_SAVE_METHOD_NAMES = [
+  'get_byte_size', 'get_list_length', 'save_fields', 'save_field', 'save_list_field', 'save_value',
+  'save_bitfield_property', 'save_bitfield_property_list_field', 'save_bitfield_property_value',
+]
+
+# The kinds of steps in a FieldRun.
+STEP_VALUE = 0
+STEP_LIST = 1
+STEP_BITFIELD_PROPERTY = 2
+STEP_BITFIELD_PROPERTY_LIST = 3
+STEP_BITFIELD_LEFTOVER = 4
+
+def unpack_u24(raw_bytes: bytes) -> int:
+  return int.from_bytes(raw_bytes, "big")
+
+def pack_u24(value: int) -> bytes:
+  return value.to_bytes(3, "big")
+
+def get_list_arg_type(field_type) -> Type | None:
+  if isinstance(field_type, GenericAlias) and field_type.__origin__ == list:
+    type_args = typing.get_args(field_type)
+    assert len(type_args) == 1
+    return type_args[0]
+  return None
+
+def get_enum_member(field_type: Type[Enum], raw_value: int) -> Enum | None:
+  # Returns the member of the enum with the given value, or None if there isn't one.
+  # This is what `raw_value in field_type` checks on Python 3.12+, but that raises a TypeError on 3.11 instead.
+  # Looking the value up directly is also much faster than going through the enum's metaclass.
+  return field_type._value2member_map_.get(raw_value)
+
+def get_enum_base_type(field_type: Type[Enum]) -> Type | None:
+  for base_class in field_type.__mro__:
+    if issubclass(base_class, int) and base_class in fs.PRIMITIVE_TYPE_TO_BYTE_SIZE:
+      return base_class
+  return None
+
+def get_packed_type_info(field_type: Type) -> tuple[str, Any, Any] | None:
+  # Returns the struct format character for a type, along with functions that convert the raw unpacked value to the
+  # field's value and back (or None when no conversion is needed), matching BUNFOE.read_value and BUNFOE.save_value.
+  # Returns None if values of the type can't be packed in a struct.
+  if isinstance(field_type, GenericAlias) or not isinstance(field_type, type):
+    return None
+  
+  if field_type in PRIMITIVE_TYPE_TO_STRUCT_FORMAT_CHAR:
+    return PRIMITIVE_TYPE_TO_STRUCT_FORMAT_CHAR[field_type], None, None
+  elif field_type == u24:
+    return "3s", unpack_u24, pack_u24
+  elif field_type == bool:
+    def read_bool(raw_value):
+      assert raw_value in [0, 1], f"Boolean must be zero or one, but got value: {raw_value}"
+      return bool(raw_value)
+    return "B", read_bool, int
+  elif issubclass(field_type, MappedBool):
+    def read_mapped_bool(raw_value):
+      assert raw_value in field_type.VALID_VALUES, f"Boolean value not valid: {raw_value}"
+      return field_type(raw_value)
+    def save_mapped_bool(value):
+      if isinstance(value, bool):
+        return int(value)
+      elif isinstance(value, MappedBool):
+        return value.raw_value
+      else:
+        raise Exception(f"Invalid MappedBool: {value!r}")
+    return "B", read_mapped_bool, save_mapped_bool
+  elif issubclass(field_type, u16Rot):
+    return "H", None, None
+  elif issubclass(field_type, Enum):
+    base_class = get_enum_base_type(field_type)
+    if base_class not in PRIMITIVE_TYPE_TO_STRUCT_FORMAT_CHAR:
+      return None
+    return PRIMITIVE_TYPE_TO_STRUCT_FORMAT_CHAR[base_class], make_enum_reader(field_type), make_enum_saver(field_type)
+  else:
+    return None
+
+def make_enum_reader(field_type: Type[Enum]):
+  value_to_member = field_type._value2member_map_
+  def read_enum(raw_value):
+    # Same as get_enum_member, with the lookup table bound ahead of time.
+    member = value_to_member.get(raw_value)
+    if member is not None:
+      return member
+    if PRINT_INVALID_VALUE_WARNINGS:
+      print(f"Invalid value for enum {field_type}: {raw_value}")
+    return raw_value
+  return read_enum
+
+def make_enum_saver(field_type: Type[Enum]):
+  def save_enum(value):
+    if isinstance(value, field_type):
+      return value.value
+    elif isinstance(value, int):
+      return value
+    else:
+      raise TypeError(f"Invalid value {repr(value)}, expected to have type {field_type} but was {type(value)} instead.")
+  return save_enum
+
+def get_bitfield_property_type_info(field_type: Type) -> tuple[Any, Any] | None:
+  # Returns functions that convert a bitfield property's raw bits to its value and back, matching
+  # BUNFOE.read_bitfield_property_value and BUNFOE.save_bitfield_property_value.
+  if isinstance(field_type, GenericAlias) or not isinstance(field_type, type):
+    return None
+  
+  if field_type == bool:
+    def read_bool(raw_value):
+      assert raw_value in [0, 1], f"Boolean must be zero or one, but got value: {raw_value}"
+      return bool(raw_value)
+    return read_bool, int
+  elif issubclass(field_type, MappedBool):
+    def read_mapped_bool(raw_value):
+      assert PRINT_INVALID_VALUE_WARNINGS and raw_value in field_type.VALID_VALUES, f"Boolean value not valid: {raw_value}"
+      return field_type(raw_value)
+    return read_mapped_bool, int
+  elif issubclass(field_type, Enum):
+    return make_enum_reader(field_type), make_enum_saver(field_type)
+  elif issubclass(field_type, int):
+    return field_type, int
+  elif issubclass(field_type, float):
+    return (lambda raw_value: field_type(fs.bit_cast_int_to_float(raw_value))), fs.bit_cast_float_to_int
+  else:
+    return None
+
+def check_field_is_packable(field: Field) -> bool:
+  arg_type = get_list_arg_type(field.type)
+  if arg_type is not None:
+    return isinstance(field.length, int) and get_packed_type_info(arg_type) is not None
+  return get_packed_type_info(field.type) is not None
+
+class FieldRun:
+  """A run of consecutive fields that are all stored as values that can be packed in a struct, so
+  that they can all be read with one read and unpacked with a single precompiled struct.Struct.
+  Bitfield properties are unpacked out of their bitfield's value with precomputed shifts and masks.
+  
+  The steps say how to turn the unpacked values into field values and back again. Each step is a
+  tuple starting with one of the STEP_ constants.
+  """
+  
+  def __init__(self, run_fields: list[Field]):
+    self.fields = run_fields
+    self.steps: list[tuple] = []
+    # The name, value index, and value conversion function of each bitfield in this run. When saving, the bitfield's
+    # value is updated from its properties before it gets converted.
+    self.bitfields: list[tuple[str, int, Any]] = []
+    self.is_valid = True
+    
+    format_chars = []
+    num_values = 0
+    bitfield = None
+    bitfield_index = None
+    bit_offset = None
+    total_bits = None
+    def finish_bitfield():
+      bits_left = total_bits - bit_offset
+      if bits_left > 0:
+        self.steps.append((STEP_BITFIELD_LEFTOVER, bitfield.name, bit_offset, (1 << bits_left) - 1))
+    
+    for field in run_fields:
+      expected = field.default if field.assert_default else MISSING
+      
+      if field.bits is not None:
+        assert bitfield is not None
+        list_arg_type = get_list_arg_type(field.type)
+        element_type = field.type if list_arg_type is None else list_arg_type
+        type_info = get_bitfield_property_type_info(element_type)
+        count = 1 if list_arg_type is None else field.length
+        if type_info is None or not isinstance(count, int) or not 1 <= field.bits <= total_bits:
+          self.is_valid = False
+          return
+        if count > 0 and not (0 <= bit_offset < total_bits and bit_offset + field.bits*count <= total_bits):
+          self.is_valid = False
+          return
+        read_func, save_func = type_info
+        mask = (1 << field.bits) - 1
+        shifts = tuple(bit_offset + i*field.bits for i in range(count))
+        if list_arg_type is None:
+          self.steps.append((STEP_BITFIELD_PROPERTY, field.name, bitfield.name, bitfield_index, shifts[0], mask, read_func, save_func, expected))
+        else:
+          self.steps.append((STEP_BITFIELD_PROPERTY_LIST, field.name, bitfield.name, bitfield_index, shifts, mask, read_func, save_func, expected, count))
+        bit_offset += field.bits*count
+        continue
+      
+      if bitfield is not None:
+        finish_bitfield()
+        bitfield = None
+      
+      list_arg_type = get_list_arg_type(field.type)
+      if list_arg_type is None:
+        format_char, read_func, save_func = get_packed_type_info(field.type)
+        format_chars.append(format_char)
+        if field.bitfield:
+          # The bitfield's properties are merged into its value before it gets converted for saving.
+          self.bitfields.append((field.name, num_values, save_func))
+          save_func = None
+        self.steps.append((STEP_VALUE, field.name, num_values, read_func, save_func, expected))
+        num_values += 1
+      else:
+        format_char, read_func, save_func = get_packed_type_info(list_arg_type)
+        format_chars.append(f"{field.length}{format_char}")
+        self.steps.append((STEP_LIST, field.name, num_values, field.length, read_func, save_func, expected))
+        num_values += field.length
+      
+      if field.bitfield:
+        if list_arg_type is not None or field.type not in [u32, u24, u16, u8, s32, s16, s8]:
+          self.is_valid = False
+          return
+        bitfield = field
+        bitfield_index = num_values - 1
+        bit_offset = 0
+        total_bits = BUNFOE.get_byte_size(field.type)*8
+    
+    if bitfield is not None:
+      finish_bitfield()
+    
+    self.struct = struct.Struct(">" + "".join(format_chars))
+    self.size = self.struct.size
+    self.num_values = num_values
+  
+  def read(self, instance: BUNFOE, offset: int) -> int:
+    raw_bytes = fs.read_bytes(instance.data, offset, self.size)
+    if len(raw_bytes) < self.size:
+      # Read the fields one at a time instead, so the error that gets raised is the same as usual.
+      return instance.read_fields(self.fields, offset)
+    values = self.struct.unpack(raw_bytes)
+    
+    for step in self.steps:
+      kind = step[0]
+      if kind == STEP_VALUE:
+        _, name, index, read_func, _, expected = step
+        value = values[index] if read_func is None else read_func(values[index])
+      elif kind == STEP_LIST:
+        _, name, index, count, read_func, _, expected = step
+        if read_func is None:
+          value = list(values[index:index+count])
+        else:
+          value = [read_func(raw_value) for raw_value in values[index:index+count]]
+      elif kind == STEP_BITFIELD_PROPERTY:
+        _, name, bitfield_name, _, shift, mask, read_func, _, expected = step
+        value = read_func((getattr(instance, bitfield_name) >> shift) & mask)
+      elif kind == STEP_BITFIELD_PROPERTY_LIST:
+        _, name, bitfield_name, _, shifts, mask, read_func, _, expected, _ = step
+        bitfield_value = getattr(instance, bitfield_name)
+        value = [read_func((bitfield_value >> shift) & mask) for shift in shifts]
+      else:
+        _, bitfield_name, shift, mask = step
+        assert (getattr(instance, bitfield_name) >> shift) & mask == 0, f"Bitfield {bitfield_name} had nonzero leftover bits"
+        continue
+      
+      setattr(instance, name, value)
+      if expected is not MISSING:
+        assert value == expected, f"Field {name} expected value {expected}, but got {value}"
+    
+    return offset + self.size
+  
+  def save(self, instance: BUNFOE, offset: int) -> int:
+    try:
+      raw_bytes = self.pack(instance)
+    except Exception:
+      # Save the fields one at a time instead, so the error that gets raised is the same as usual.
+      return instance.save_fields(self.fields, offset)
+    fs.write_bytes(instance.data, offset, raw_bytes)
+    return offset + self.size
+  
+  def pack(self, instance: BUNFOE) -> bytes:
+    values = [None]*self.num_values
+    for step in self.steps:
+      kind = step[0]
+      if kind == STEP_VALUE:
+        _, name, index, _, save_func, _ = step
+        value = getattr(instance, name)
+        values[index] = value if save_func is None else save_func(value)
+      elif kind == STEP_LIST:
+        _, name, index, count, _, save_func, _ = step
+        value = getattr(instance, name)
+        assert len(value) == count
+        values[index:index+count] = value if save_func is None else [save_func(element) for element in value]
+      elif kind == STEP_BITFIELD_PROPERTY:
+        _, name, _, bitfield_index, shift, mask, _, save_func, _ = step
+        bit_mask = mask << shift
+        raw_value = save_func(getattr(instance, name))
+        values[bitfield_index] = (values[bitfield_index] & ~bit_mask) | ((raw_value << shift) & bit_mask)
+      elif kind == STEP_BITFIELD_PROPERTY_LIST:
+        _, name, _, bitfield_index, shifts, mask, _, save_func, _, count = step
+        value = getattr(instance, name)
+        assert len(value) == count
+        bitfield_value = values[bitfield_index]
+        for element, shift in zip(value, shifts):
+          bit_mask = mask << shift
+          bitfield_value = (bitfield_value & ~bit_mask) | ((save_func(element) << shift) & bit_mask)
+        values[bitfield_index] = bitfield_value
+    
+    for bitfield_name, bitfield_index, save_func in self.bitfields:
+      setattr(instance, bitfield_name, values[bitfield_index])
+      if save_func is not None:
+        values[bitfield_index] = save_func(values[bitfield_index])
+    
+    return self.struct.pack(*values)
+
+class BUNFOECodec:
+  """A precompiled reader and saver for the fields of one BUNFOE class.
+  
+  Consecutive fields that are primitives, bools, enums, fixed-length lists of those, or bitfields
+  are grouped into FieldRuns. Any other fields, such as nested BUNFOEs, strings, and lists with a
+  length_calculator, are still read and saved one at a time with read_field and save_field.
+  """
+  
+  def __init__(self, cls: Type[BUNFOE]):
+    self.cls = cls
+    self.items: list[FieldRun | Field] = []
+    self.is_valid = True
+    
+    run_fields = []
+    def finish_run():
+      if not run_fields:
+        return
+      run = FieldRun(run_fields.copy())
+      if not run.is_valid:
+        self.is_valid = False
+      self.items.append(run)
+      run_fields.clear()
+    
+    in_bitfield = False
+    for field in fields(cls):
+      if field.manual_read:
+        continue
+      if field.bits is not None:
+        if not in_bitfield:
+          # Let the usual assertion for this get raised when reading.
+          self.is_valid = False
+          return
+        run_fields.append(field)
+        continue
+      
+      in_bitfield = False
+      if check_field_is_packable(field):
+        run_fields.append(field)
+        in_bitfield = field.bitfield
+      elif field.bitfield:
+        self.is_valid = False
+        return
+      else:
+        finish_run()
+        self.items.append(field)
+    finish_run()
+  
+  @staticmethod
+  @functools.cache
+  def compile(cls: Type[BUNFOE]) -> 'BUNFOECodec | None':
+    # Returns None if the class has any fields that the codec can't handle in exactly the same way as reading and
+    # saving them one at a time would.
+    codec = BUNFOECodec(cls)
+    if not codec.is_valid:
+      return None
+    return codec
+  
+  @staticmethod
+  @functools.cache
+  def get_read_codec(cls: Type[BUNFOE]) -> 'BUNFOECodec | None':
+    if any(getattr(cls, name) is not getattr(BUNFOE, name) for name in CODEC_READ_METHOD_NAMES):
+      return None
+    return BUNFOECodec.compile(cls)
+  
+  @staticmethod
+  @functools.cache
+  def get_save_codec(cls: Type[BUNFOE]) -> 'BUNFOECodec | None':
+    if any(getattr(cls, name) is not getattr(BUNFOE, name) for name in CODEC_SAVE_METHOD_NAMES):
+      return None
+    return BUNFOECodec.compile(cls)
+  
+  def read(self, instance: BUNFOE, offset: int) -> int:
+    for item in self.items:
+      if isinstance(item, FieldRun):
+        offset = item.read(instance, offset)
+      else:
+        offset = instance.read_field(item, offset)
+    return offset
+  
+  def save(self, instance: BUNFOE, offset: int) -> int:
+    for item in self.items:
+      if isinstance(item, FieldRun):
+        offset = item.save(instance, offset)
+      else:
+        offset = instance.save_field(item, offset)
+    return offset
+#endregion
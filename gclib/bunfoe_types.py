@@ -3,9 +3,11 @@ from gclib.fs_helpers import u32, u24, u16, u8, s32, s16, s8, u16Rot, FixedStr,
 from gclib.bunfoe import bunfoe, field, BUNFOE
 
 class Vector(BUNFOE):
-  pass
+  __slots__ = ()
 
 class Vector2(Vector):
+  __slots__ = ()
+  
   @property
   def xy(self):
     return (self.x, self.y)
@@ -15,6 +17,8 @@ class Vector2(Vector):
     self.x, self.y = value
 
 class Vector3(Vector):
+  __slots__ = ()
+  
   @property
   def xyz(self):
     return (self.x, self.y, self.z)
@@ -23,32 +27,32 @@ class Vector3(Vector):
   def xyz(self, value):
     self.x, self.y, self.z = value
 
-@bunfoe
+@bunfoe(slots=True)
 class Vec2float(Vector2):
   x: float = 0.0
   y: float = 0.0
 
-@bunfoe
+@bunfoe(slots=True)
 class Vec3float(Vector3):
   x: float = 0.0
   y: float = 0.0
   z: float = 0.0
 
-@bunfoe
+@bunfoe(slots=True)
 class Vec3u16Rot(Vector3):
   x: u16Rot = 0
   y: u16Rot = 0
   z: u16Rot = 0
 
 class Matrix(BUNFOE):
-  pass
+  __slots__ = ()
 
-@bunfoe
+@bunfoe(slots=True)
 class Matrix2x3(Matrix):
   r0: list[float] =  field(length=3, default_factory=lambda: [0.5, 0.0, 0.0])
   r1: list[float] =  field(length=3, default_factory=lambda: [0.0, 0.5, 0.0])
 
-@bunfoe
+@bunfoe(slots=True)
 class Matrix4x4(Matrix):
   r0: list[float] = field(length=4, default_factory=lambda: [1.0, 0.0, 0.0, 0.0])
   r1: list[float] = field(length=4, default_factory=lambda: [0.0, 1.0, 0.0, 0.0])
@@ -56,6 +60,8 @@ class Matrix4x4(Matrix):
   r3: list[float] = field(length=4, default_factory=lambda: [0.0, 0.0, 0.0, 1.0])
 
 class RGB(BUNFOE):
+  __slots__ = ()
+  
   @property
   def rgb(self):
     return (self.r, self.g, self.b)
@@ -65,6 +71,8 @@ class RGB(BUNFOE):
     self.r, self.g, self.b = value
 
 class RGBA(RGB):
+  __slots__ = ()
+  
   @property
   def rgba(self):
     return (self.r, self.g, self.b, self.a)
@@ -73,20 +81,20 @@ class RGBA(RGB):
   def rgba(self, value):
     self.r, self.g, self.b, self.a = value
 
-@bunfoe
+@bunfoe(slots=True)
 class RGBu8(RGBA):
   r: u8 = 0
   g: u8 = 0
   b: u8 = 0
 
-@bunfoe
+@bunfoe(slots=True)
 class RGBAu8(RGBA):
   r: u8 = 0xFF
   g: u8 = 0xFF
   b: u8 = 0xFF
   a: u8 = 0xFF
 
-@bunfoe
+@bunfoe(slots=True)
 class RGBAs16(RGBA):
   r: s16 = 0xFF
   g: s16 = 0xFF
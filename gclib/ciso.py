@@ -0,0 +1,205 @@
+import io
+import struct
+from typing import BinaryIO, NamedTuple
+
+class CISO:
+  """The compact ISO format, which is a disc image with any unused blocks left out.
+  
+  The header is 0x8000 bytes long. It contains the magic "CISO", the block size as a little-endian
+  u32, and then a map with one byte per block of the disc, which is 1 if that block is present in the
+  file and 0 if it was left out. The present blocks follow the header in order.
+  Blocks that were left out are read back as all zeroes.
+  """
+  
+  MAGIC = b"CISO"
+  HEADER_SIZE = 0x8000
+  MAX_BLOCKS = HEADER_SIZE - 8
+  DEFAULT_BLOCK_SIZE = 0x200000 # 2MB
+  
+  @staticmethod
+  def check_is_ciso(file: BinaryIO) -> bool:
+    file.seek(0)
+    return file.read(4) == CISO.MAGIC
+
+class CISOBlockMap(NamedTuple):
+  block_size: int
+  # The offset of each block within the CISO file, or None if the block is not present.
+  # This always has an entry for every block in the map, including absent blocks at the end of the disc.
+  block_offsets: list[int | None]
+  
+  @staticmethod
+  def read(file: BinaryIO) -> 'CISOBlockMap':
+    file.seek(0)
+    header = file.read(CISO.HEADER_SIZE)
+    assert header[:4] == CISO.MAGIC, "This file is not a CISO."
+    block_size = struct.unpack_from("<I", header, 4)[0]
+    assert block_size > 0, "CISO block size is zero."
+    
+    block_offsets: list[int | None] = []
+    next_block_offset = CISO.HEADER_SIZE
+    for is_present in header[8:]:
+      if is_present:
+        block_offsets.append(next_block_offset)
+        next_block_offset += block_size
+      else:
+        block_offsets.append(None)
+    
+    return CISOBlockMap(block_size, block_offsets)
+
+class CISOReader(io.RawIOBase):
+  """Presents a CISO file as a readable, seekable file containing the full disc image."""
+  
+  def __init__(self, file: BinaryIO, block_map: 'CISOBlockMap | None' = None):
+    # block_map can be passed in to avoid reading and parsing the header again when the same CISO is opened many times.
+    self.file = file
+    
+    if block_map is None:
+      block_map = CISOBlockMap.read(file)
+    self.block_size = block_map.block_size
+    self.block_offsets = block_map.block_offsets
+    
+    # Like Dolphin, treat the disc as covering the entire block map, since absent blocks at the end of the disc are
+    # still part of it and must read back as zeroes.
+    self.size = len(self.block_offsets) * self.block_size
+    self.position = 0
+  
+  def readable(self):
+    return True
+  
+  def seekable(self):
+    return True
+  
+  def tell(self):
+    return self.position
+  
+  def seek(self, offset, whence=io.SEEK_SET):
+    if whence == io.SEEK_SET:
+      self.position = offset
+    elif whence == io.SEEK_CUR:
+      self.position += offset
+    elif whence == io.SEEK_END:
+      self.position = self.size + offset
+    else:
+      raise ValueError(f"Invalid whence: {whence}")
+    return self.position
+  
+  def readinto(self, buffer):
+    buffer = memoryview(buffer).cast("B")
+    size_to_read = max(0, min(len(buffer), self.size - self.position))
+    
+    size_read = 0
+    while size_read < size_to_read:
+      block_index, offset_in_block = divmod(self.position, self.block_size)
+      chunk_size = min(self.block_size - offset_in_block, size_to_read - size_read)
+      chunk = buffer[size_read:size_read+chunk_size]
+      
+      block_offset = self.block_offsets[block_index]
+      if block_offset is None:
+        chunk[:] = bytes(chunk_size)
+      else:
+        self.file.seek(block_offset + offset_in_block)
+        chunk_size_read = 0
+        while chunk_size_read < chunk_size:
+          size_read_now = self.file.readinto(chunk[chunk_size_read:])
+          if not size_read_now:
+            raise Exception("Unexpected end of CISO file while reading block %d. The file may be truncated." % block_index)
+          chunk_size_read += size_read_now
+      
+      size_read += chunk_size
+      self.position += chunk_size
+    
+    return size_read
+  
+  def close(self):
+    if not self.closed:
+      self.file.close()
+    super().close()
+
+class CISOWriter(io.RawIOBase):
+  """A writable, seekable file that is saved as a CISO, leaving out any blocks that are all zeroes.
+  
+  Blocks are stored in the order they are first written to, so data must mostly be written from the
+  start of the disc to the end. Seeking back to overwrite data in a block that was already written to
+  is supported, as is skipping over blocks entirely.
+  The CISO header is written when the file is closed.
+  """
+  
+  def __init__(self, file: BinaryIO, block_size=CISO.DEFAULT_BLOCK_SIZE):
+    self.file = file
+    self.block_size = block_size
+    
+    self.block_offsets: dict[int, int] = {}
+    self.last_stored_block_index = -1
+    self.size = 0
+    self.position = 0
+    
+    self.file.seek(0)
+    self.file.write(bytes(CISO.HEADER_SIZE))
+  
+  def writable(self):
+    return True
+  
+  def seekable(self):
+    return True
+  
+  def tell(self):
+    return self.position
+  
+  def seek(self, offset, whence=io.SEEK_SET):
+    if whence == io.SEEK_SET:
+      self.position = offset
+    elif whence == io.SEEK_CUR:
+      self.position += offset
+    elif whence == io.SEEK_END:
+      self.position = self.size + offset
+    else:
+      raise ValueError(f"Invalid whence: {whence}")
+    return self.position
+  
+  def write(self, data):
+    data = memoryview(data).cast("B")
+    
+    size_written = 0
+    while size_written < len(data):
+      block_index, offset_in_block = divmod(self.position, self.block_size)
+      chunk_size = min(self.block_size - offset_in_block, len(data) - size_written)
+      chunk = data[size_written:size_written+chunk_size]
+      
+      if block_index not in self.block_offsets:
+        if chunk.nbytes == chunk.tobytes().count(0):
+          # Writing zeroes to a block that isn't stored yet doesn't change anything.
+          chunk = None
+        else:
+          self.store_new_block(block_index)
+      if chunk is not None:
+        self.file.seek(self.block_offsets[block_index] + offset_in_block)
+        self.file.write(chunk)
+      
+      size_written += chunk_size
+      self.position += chunk_size
+      self.size = max(self.size, self.position)
+    
+    return size_written
+  
+  def store_new_block(self, block_index: int):
+    if block_index >= CISO.MAX_BLOCKS:
+      raise Exception("Disc is too large to fit in a CISO with block size 0x%X." % self.block_size)
+    if block_index < self.last_stored_block_index:
+      raise Exception("CISO blocks must be written in order, but block %d was written after block %d." % (block_index, self.last_stored_block_index))
+    
+    self.block_offsets[block_index] = CISO.HEADER_SIZE + len(self.block_offsets) * self.block_size
+    self.last_stored_block_index = block_index
+  
+  def close(self):
+    if not self.closed:
+      header = bytearray(CISO.HEADER_SIZE)
+      header[0:4] = CISO.MAGIC
+      struct.pack_into("<I", header, 4, self.block_size)
+      for block_index in self.block_offsets:
+        header[8 + block_index] = 1
+      self.file.seek(0)
+      self.file.write(header)
+      # Make sure the last stored block is padded out to its full size.
+      self.file.truncate(CISO.HEADER_SIZE + len(self.block_offsets) * self.block_size)
+      self.file.close()
+    super().close()
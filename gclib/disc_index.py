@@ -0,0 +1,301 @@
+import hashlib
+import os
+import sqlite3
+from dataclasses import dataclass
+from io import BytesIO
+
+from gclib import fs_helpers as fs
+from gclib.gcm import GCM
+from gclib.rarc import RARC
+from gclib.yaz0_yay0 import Yaz0, Yay0
+
+@dataclass(frozen=True)
+class IndexedFile:
+  path: str # Virtual path of the file, which can be passed to GCM.read_virtual_file_data.
+  disc_file_path: str # Path of the file on the disc that this file is inside of (or is).
+  archive_path: str | None # Virtual path of the archive directly containing this file, None if not in an archive.
+  size: int # Size after decompression.
+  compressed_size: int | None
+  compression: str | None # "Yaz0", "Yay0", or None.
+  content_hash: str # Hash of the decompressed data.
+  magic: bytes
+
+class DiscIndex:
+  """An SQLite database of every file on a disc, including files inside of nested RARC archives.
+  
+  A single database can hold indexes for multiple discs. Each disc is keyed by the game ID, disc
+  number, and version in its header, so re-indexing a rebuilt disc only has to reprocess the files
+  on it that actually changed.
+  """
+  
+  SCHEMA_VERSION = 2
+  HASH_ALGORITHM = "sha1"
+  
+  def __init__(self, db_path: str):
+    self.db_path = db_path
+    self.connection = sqlite3.connect(db_path)
+    self.create_tables()
+  
+  def close(self):
+    self.connection.close()
+  
+  def __enter__(self):
+    return self
+  
+  def __exit__(self, exc_type, exc_value, traceback):
+    self.close()
+  
+  def create_tables(self):
+    schema_version = self.connection.execute("PRAGMA user_version").fetchone()[0]
+    if schema_version not in [0, 1, self.SCHEMA_VERSION]:
+      raise Exception("Disc index database %s has an unsupported schema version: %d" % (self.db_path, schema_version))
+    
+    with self.connection:
+      if schema_version == 1:
+        # The index is only a cache of what's on each disc, so old versions are thrown out and rebuilt the next time
+        # each disc is indexed instead of being migrated.
+        self.connection.executescript("""
+          DROP TABLE IF EXISTS disc_files;
+          DROP TABLE IF EXISTS files;
+        """)
+      
+      self.connection.executescript("""
+        CREATE TABLE IF NOT EXISTS disc_files (
+          disc_key TEXT NOT NULL,
+          disc_file_path TEXT NOT NULL,
+          raw_size INTEGER NOT NULL,
+          raw_hash TEXT NOT NULL,
+          source_stamp TEXT,
+          PRIMARY KEY (disc_key, disc_file_path)
+        );
+        CREATE TABLE IF NOT EXISTS files (
+          disc_key TEXT NOT NULL,
+          path TEXT NOT NULL,
+          disc_file_path TEXT NOT NULL,
+          archive_path TEXT,
+          name TEXT NOT NULL COLLATE NOCASE,
+          size INTEGER NOT NULL,
+          compressed_size INTEGER,
+          compression TEXT,
+          content_hash TEXT NOT NULL,
+          magic BLOB NOT NULL,
+          PRIMARY KEY (disc_key, path)
+        );
+        CREATE INDEX IF NOT EXISTS files_by_disc_file_path ON files (disc_key, disc_file_path);
+        CREATE INDEX IF NOT EXISTS files_by_name ON files (disc_key, name);
+        CREATE INDEX IF NOT EXISTS files_by_content_hash ON files (disc_key, content_hash);
+        CREATE INDEX IF NOT EXISTS files_by_magic ON files (disc_key, magic);
+      """)
+      self.connection.execute("PRAGMA user_version = %d" % self.SCHEMA_VERSION)
+  
+  @staticmethod
+  def get_disc_key(gcm: GCM) -> str:
+    boot_bin_data = gcm.get_changed_file_data("sys/boot.bin")
+    game_id = fs.read_str(boot_bin_data, 0, 6)
+    disc_number = fs.read_u8(boot_bin_data, 6)
+    version = fs.read_u8(boot_bin_data, 7)
+    return "%s-%d-%d" % (game_id, disc_number, version)
+  
+  #region Indexing
+  def index_disc(self, gcm: GCM, disc_key: str | None = None):
+    # Indexes every file on the disc, skipping disc files whose data hasn't changed since the last time
+    # this disc was indexed.
+    # This is a generator that yields progress the same way GCM's export functions do.
+    if disc_key is None:
+      disc_key = self.get_disc_key(gcm)
+    
+    previous_disc_files = {
+      disc_file_path: (raw_size, raw_hash, source_stamp)
+      for disc_file_path, raw_size, raw_hash, source_stamp in self.connection.execute(
+        "SELECT disc_file_path, raw_size, raw_hash, source_stamp FROM disc_files WHERE disc_key = ?", (disc_key,)
+      )
+    }
+    
+    files_done = 0
+    with self.connection:
+      for disc_file_path in gcm.get_all_file_paths_natsort():
+        previous_raw_size, previous_raw_hash, previous_source_stamp = previous_disc_files.pop(
+          disc_file_path, (None, None, None)
+        )
+        source_stamp = self.get_disc_file_source_stamp(gcm, disc_file_path)
+        
+        # If the file is read from the same place in the same unmodified disc image as last time, it can't have
+        # changed, so it doesn't need to be hashed again.
+        if source_stamp is None or source_stamp != previous_source_stamp:
+          raw_size, raw_hash = self.hash_disc_file(gcm, disc_file_path)
+          if (raw_size, raw_hash) == (previous_raw_size, previous_raw_hash):
+            self.connection.execute(
+              "UPDATE disc_files SET source_stamp = ? WHERE disc_key = ? AND disc_file_path = ?",
+              (source_stamp, disc_key, disc_file_path),
+            )
+          else:
+            self.delete_disc_file_rows(disc_key, disc_file_path)
+            self.connection.execute(
+              "INSERT INTO disc_files VALUES (?, ?, ?, ?, ?)",
+              (disc_key, disc_file_path, raw_size, raw_hash, source_stamp),
+            )
+            self.connection.executemany(
+              "INSERT INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+              (
+                (disc_key, f.path, f.disc_file_path, f.archive_path, os.path.basename(f.path),
+                 f.size, f.compressed_size, f.compression, f.content_hash, f.magic)
+                for f in self.each_indexed_file_in_disc_file(gcm, disc_file_path, raw_size, raw_hash)
+              ),
+            )
+        
+        files_done += 1
+        yield(disc_file_path, files_done)
+      
+      # Anything left over was removed from the disc since the last time it was indexed.
+      for disc_file_path in previous_disc_files:
+        self.delete_disc_file_rows(disc_key, disc_file_path)
+  
+  @staticmethod
+  def get_disc_file_source_stamp(gcm: GCM, disc_file_path: str) -> str | None:
+    # Returns a string identifying where an unchanged file's data is read from: the size and modification time of
+    # the disc image on disk, and the file's offset and size within it.
+    # If this is the same as when the file was last indexed, the file's data doesn't need to be read and hashed again.
+    # Returns None if there's no way to tell the data is the same without hashing it, for changed files and for disc
+    # images that aren't read from a path on disk.
+    if gcm.iso_path is None or disc_file_path in gcm.changed_files:
+      return None
+    file_entry = gcm.files_by_path_lowercase.get(disc_file_path.lower())
+    if file_entry is None:
+      return None
+    iso_stat = os.stat(gcm.iso_path)
+    # The disc image may also be a subrange of the file on disk.
+    iso_offset = getattr(gcm.iso_reader, "offset", 0)
+    return "%d:%d:%d:%d:%d" % (
+      iso_stat.st_size, iso_stat.st_mtime_ns, iso_offset, file_entry.file_data_offset, file_entry.file_size,
+    )
+  
+  def delete_disc_file_rows(self, disc_key: str, disc_file_path: str):
+    self.connection.execute(
+      "DELETE FROM disc_files WHERE disc_key = ? AND disc_file_path = ?", (disc_key, disc_file_path)
+    )
+    self.connection.execute(
+      "DELETE FROM files WHERE disc_key = ? AND disc_file_path = ?", (disc_key, disc_file_path)
+    )
+  
+  def hash_disc_file(self, gcm: GCM, disc_file_path: str) -> tuple[int, str]:
+    hasher = hashlib.new(self.HASH_ALGORITHM)
+    raw_size = 0
+    for chunk in gcm.read_changed_file_data_in_chunks(disc_file_path):
+      hasher.update(chunk)
+      raw_size += len(chunk)
+    return raw_size, hasher.hexdigest()
+  
+  def each_indexed_file_in_disc_file(self, gcm: GCM, disc_file_path: str, raw_size: int, raw_hash: str):
+    if gcm.check_file_is_rarc(disc_file_path):
+      # The archive is parsed directly instead of through GCM.get_virtual_rarc so that indexing the
+      # whole disc doesn't leave every archive on it cached in memory.
+      rarc = RARC(gcm.get_changed_file_data(disc_file_path), gcm.name_string_cache)
+      yield from self.each_indexed_file_in_rarc(rarc, disc_file_path, disc_file_path)
+      return
+    
+    first_bytes = next(gcm.read_changed_file_data_in_chunks(disc_file_path, chunk_size=4), b"")
+    if first_bytes in [Yaz0.MAGIC_BYTES, Yay0.MAGIC_BYTES]:
+      # Compressed file that isn't an archive.
+      yield self.make_indexed_file(
+        disc_file_path, disc_file_path, None, gcm.get_changed_file_data(disc_file_path),
+      )
+      return
+    
+    # Uncompressed files are indexed as they are, without reading their data a second time.
+    yield IndexedFile(
+      path=disc_file_path,
+      disc_file_path=disc_file_path,
+      archive_path=None,
+      size=raw_size,
+      compressed_size=None,
+      compression=None,
+      content_hash=raw_hash,
+      magic=first_bytes,
+    )
+  
+  def each_indexed_file_in_rarc(self, rarc: RARC, archive_path: str, disc_file_path: str):
+    for file_entry in rarc.file_entries:
+      if file_entry.is_dir:
+        continue
+      
+      file_path = archive_path + "/" + file_entry.file_path
+      if file_entry.check_is_nested_rarc():
+        nested_rarc = RARC(file_entry, rarc.name_string_cache)
+        yield from self.each_indexed_file_in_rarc(nested_rarc, file_path, disc_file_path)
+      else:
+        yield self.make_indexed_file(file_path, disc_file_path, archive_path, file_entry.data)
+  
+  def make_indexed_file(self, file_path: str, disc_file_path: str, archive_path: str | None, data: BytesIO) -> IndexedFile:
+    compressed_size = None
+    compression = None
+    if Yaz0.check_is_compressed(data):
+      compressed_size = fs.data_len(data)
+      compression = "Yaz0"
+      data = Yaz0.decompress(data)
+    elif Yay0.check_is_compressed(data):
+      compressed_size = fs.data_len(data)
+      compression = "Yay0"
+      data = Yay0.decompress(data)
+    
+    raw_bytes = fs.read_all_bytes(data)
+    return IndexedFile(
+      path=file_path,
+      disc_file_path=disc_file_path,
+      archive_path=archive_path,
+      size=len(raw_bytes),
+      compressed_size=compressed_size,
+      compression=compression,
+      content_hash=hashlib.new(self.HASH_ALGORITHM, raw_bytes).hexdigest(),
+      magic=raw_bytes[:4],
+    )
+  #endregion
+  
+  #region Queries
+  def find_files(self, disc_key: str, *, name: str | None = None, magic: bytes | str | None = None,
+                 content_hash: str | None = None, compression: str | None = None,
+                 archive_path: str | None = None) -> list[IndexedFile]:
+    # Returns all indexed files on the disc matching every one of the given criteria.
+    # Names are matched case-insensitively.
+    if isinstance(magic, str):
+      magic = magic.encode("shift_jis")
+    
+    conditions = ["disc_key = ?"]
+    params: list = [disc_key]
+    if name is not None:
+      # The name column uses NOCASE collation, so this comparison can use the files_by_name index.
+      conditions.append("name = ?")
+      params.append(name)
+    if magic is not None:
+      conditions.append("magic = ?")
+      params.append(magic)
+    if content_hash is not None:
+      conditions.append("content_hash = ?")
+      params.append(content_hash)
+    if compression is not None:
+      conditions.append("compression = ?")
+      params.append(compression)
+    if archive_path is not None:
+      conditions.append("archive_path = ?")
+      params.append(archive_path)
+    
+    rows = self.connection.execute(
+      "SELECT path, disc_file_path, archive_path, size, compressed_size, compression, content_hash, magic"
+      " FROM files WHERE " + " AND ".join(conditions) + " ORDER BY path",
+      params,
+    )
+    return [IndexedFile(*row) for row in rows]
+  
+  def find_archives_containing(self, disc_key: str, *, name: str | None = None,
+                               content_hash: str | None = None) -> list[str]:
+    # Returns the virtual paths of all archives that directly contain a file with the given name or content.
+    files = self.find_files(disc_key, name=name, content_hash=content_hash)
+    return sorted(set(f.archive_path for f in files if f.archive_path is not None))
+  
+  def find_duplicate_files(self, disc_key: str) -> list[list[IndexedFile]]:
+    # Returns groups of files that have identical decompressed contents.
+    duplicate_hashes = [row[0] for row in self.connection.execute(
+      "SELECT content_hash FROM files WHERE disc_key = ? GROUP BY content_hash HAVING COUNT(*) > 1",
+      (disc_key,),
+    )]
+    return [self.find_files(disc_key, content_hash=content_hash) for content_hash in duplicate_hashes]
+  #endregion
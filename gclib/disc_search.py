@@ -0,0 +1,254 @@
+import os
+import re
+import functools
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, FIRST_COMPLETED, wait
+from io import BytesIO
+from typing import NamedTuple
+
+from gclib.gcm import GCM
+from gclib.rarc import RARC
+from gclib.yaz0_yay0 import decompress_if_necessary
+
+# Maximum number of disc files that are read and waiting to be searched at once, per worker process.
+MAX_PENDING_FILES_PER_WORKER = 4
+# Maximum total size of the file data that has been read and sent to worker processes but not searched yet.
+# A single chunk larger than this is still searched, on its own.
+MAX_PENDING_BYTES = 256*1024*1024 # 256MB
+# Up to this many different byte string patterns are each searched for separately, which is faster than a single
+# pass over the data with LiteralAutomaton for small sets of patterns.
+MAX_LITERAL_PATTERNS_TO_SEARCH_SEPARATELY = 64
+
+class SearchHit(NamedTuple):
+  virtual_path: str # Can be passed to GCM.read_virtual_file_data.
+  offset: int # Offset in the decompressed file data.
+  pattern: bytes | re.Pattern
+
+class LiteralAutomaton:
+  """An Aho-Corasick automaton that finds every occurrence of a set of byte strings in a single pass.
+  
+  The automaton is compiled into a full transition table with a row of 256 next states for each
+  state, so searching only does one lookup per byte of data no matter how many patterns there are.
+  Overlapping matches, including patterns that are suffixes of other patterns, are all reported.
+  """
+  
+  def __init__(self, patterns: tuple[bytes, ...]):
+    # Build a trie of the patterns.
+    children: list[dict[int, int]] = [{}]
+    outputs: list[tuple[bytes, ...]] = [()]
+    for pattern in patterns:
+      state = 0
+      for byte in pattern:
+        next_state = children[state].get(byte)
+        if next_state is None:
+          next_state = len(children)
+          children[state][byte] = next_state
+          children.append({})
+          outputs.append(())
+        state = next_state
+      outputs[state] += (pattern,)
+    
+    # Fill in the transitions for bytes that don't continue a pattern by following the failure link of each state,
+    # which is the state for the longest proper suffix of that state's string that is also in the trie.
+    # States are visited in breadth first order so that the transitions of each failure link are already known.
+    self.transitions: list[list[int]] = [None] * len(children)
+    self.transitions[0] = [children[0].get(byte, 0) for byte in range(256)]
+    failure_links = [0] * len(children)
+    states_to_visit = deque(children[0].values())
+    while states_to_visit:
+      state = states_to_visit.popleft()
+      failure_link = failure_links[state]
+      row = list(self.transitions[failure_link])
+      for byte, child_state in children[state].items():
+        row[byte] = child_state
+        failure_links[child_state] = self.transitions[failure_link][byte]
+        states_to_visit.append(child_state)
+      self.transitions[state] = row
+      outputs[state] += outputs[failure_link]
+    # The patterns that end at each state.
+    self.outputs = outputs
+  
+  def find_all(self, data: bytes | memoryview, matches: list[tuple[int, int, bytes | re.Pattern]]):
+    transitions = self.transitions
+    outputs = self.outputs
+    state = 0
+    for offset, byte in enumerate(data):
+      state = transitions[state][byte]
+      if outputs[state]:
+        end_offset = offset + 1
+        for pattern in outputs[state]:
+          matches.append((end_offset - len(pattern), end_offset, pattern))
+
+@functools.lru_cache(maxsize=8)
+def get_literal_automaton(patterns: tuple[bytes, ...]) -> LiteralAutomaton:
+  # Only the patterns are sent to worker processes, and each process builds the automaton the first time it's used.
+  return LiteralAutomaton(patterns)
+
+class PatternMatcher:
+  """Finds all occurrences of a set of byte strings and regexes in some data.
+  
+  Large sets of byte string patterns are all searched for at once with a LiteralAutomaton. Small
+  sets are each searched for separately with a literal regex instead, which uses the regex engine's
+  fast substring search and is quicker than a pass over every byte in Python for a few patterns.
+  Either way, overlapping matches of byte strings are all reported.
+  Regex patterns are each searched for separately, and do not report overlapping matches.
+  """
+  
+  def __init__(self, patterns: list[bytes | re.Pattern]):
+    self.literal_patterns: list[bytes] = []
+    self.regex_patterns: list[re.Pattern] = []
+    for pattern in patterns:
+      if isinstance(pattern, re.Pattern):
+        self.regex_patterns.append(pattern)
+      elif isinstance(pattern, (bytes, bytearray)) and len(pattern) > 0:
+        self.literal_patterns.append(bytes(pattern))
+      else:
+        raise TypeError(f"Invalid search pattern: {pattern!r}")
+    
+    self.unique_literal_patterns = tuple(dict.fromkeys(self.literal_patterns))
+    # Maps each unique byte string pattern to the regex that finds it, if they're searched for separately.
+    self.literal_regexes: dict[bytes, re.Pattern] = {}
+    if len(self.unique_literal_patterns) <= MAX_LITERAL_PATTERNS_TO_SEARCH_SEPARATELY:
+      self.literal_regexes = {
+        pattern: re.compile(re.escape(pattern), re.DOTALL)
+        for pattern in self.unique_literal_patterns
+      }
+  
+  @property
+  def max_literal_pattern_length(self) -> int:
+    return max((len(pattern) for pattern in self.literal_patterns), default=0)
+  
+  def find_all(self, data: bytes | memoryview) -> list[tuple[int, int, bytes | re.Pattern]]:
+    # Returns the start offset, end offset, and pattern of each match.
+    matches = []
+    
+    if self.literal_regexes:
+      for pattern, literal_regex in self.literal_regexes.items():
+        # Searching again from one byte after the start of each match finds overlapping matches too.
+        match = literal_regex.search(data)
+        while match is not None:
+          offset = match.start()
+          matches.append((offset, offset + len(pattern), pattern))
+          match = literal_regex.search(data, offset + 1)
+    elif self.unique_literal_patterns:
+      get_literal_automaton(self.unique_literal_patterns).find_all(data, matches)
+    
+    for regex in self.regex_patterns:
+      for match in regex.finditer(data):
+        matches.append((match.start(), match.end(), regex))
+    
+    matches.sort(key=lambda match: match[0])
+    return matches
+
+def search_disc(gcm: GCM, patterns: list[bytes | re.Pattern], *, workers: int | None = None,
+                recurse_rarcs=True, only_file_exts: list[str] | None = None, max_pending_bytes=MAX_PENDING_BYTES):
+  # Searches every file on the disc for any of the given byte strings or compiled bytes regexes,
+  # including files inside of compressed and nested RARCs.
+  # This is a generator that yields SearchHits for each file as soon as that file has been searched,
+  # so hits are not ordered by path.
+  # Files are searched in a pool of worker processes. If workers is 0, everything is searched in this
+  # process instead.
+  # Reading files from the disc waits for the workers to catch up once max_pending_bytes of data is
+  # queued up for them, so memory usage doesn't depend on the number of workers or the size of the disc.
+  matcher = PatternMatcher(patterns)
+  
+  if workers == 0:
+    for chunk_args in each_disc_file_chunk(gcm, matcher):
+      yield from search_disc_file_data(*chunk_args, matcher, recurse_rarcs, only_file_exts)
+    return
+  
+  if workers is None:
+    workers = os.cpu_count() or 1
+  with ProcessPoolExecutor(max_workers=workers) as executor:
+    max_pending = workers * MAX_PENDING_FILES_PER_WORKER
+    # Maps each future to the size of the data sent for it.
+    pending: dict[Future, int] = {}
+    pending_bytes = 0
+    try:
+      for chunk_args in each_disc_file_chunk(gcm, matcher):
+        chunk_size = len(chunk_args[1])
+        while pending and (len(pending) >= max_pending or pending_bytes + chunk_size > max_pending_bytes):
+          done, _ = wait(pending, return_when=FIRST_COMPLETED)
+          for future in done:
+            pending_bytes -= pending.pop(future)
+            yield from future.result()
+        future = executor.submit(
+          search_disc_file_data, *chunk_args, matcher, recurse_rarcs, only_file_exts,
+        )
+        pending[future] = chunk_size
+        pending_bytes += chunk_size
+      
+      while pending:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+          pending.pop(future)
+          yield from future.result()
+    finally:
+      for future in pending:
+        future.cancel()
+
+def each_disc_file_chunk(gcm: GCM, matcher: PatternMatcher):
+  # Very large files are split into chunks that overlap by enough that no literal pattern matches
+  # can be missed at the boundaries. Regex matches that cross a chunk boundary can be missed.
+  # (Files that large are never archives anyway, so they are not decompressed or parsed.)
+  # Yields the arguments for search_disc_file_data for each chunk.
+  overlap = max(matcher.max_literal_pattern_length - 1, 0)
+  for disc_file_path in gcm.get_all_file_paths_natsort():
+    file_size = gcm.get_changed_file_size(disc_file_path)
+    offset_in_file = 0
+    prev_tail = b""
+    for chunk in gcm.read_changed_file_data_in_chunks(disc_file_path):
+      is_whole_file = len(chunk) == file_size
+      yield (disc_file_path, prev_tail + chunk, offset_in_file - len(prev_tail), len(prev_tail), is_whole_file)
+      offset_in_file += len(chunk)
+      prev_tail = chunk[len(chunk)-overlap:] if overlap else b""
+    if file_size == 0:
+      yield (disc_file_path, b"", 0, 0, True)
+
+def search_disc_file_data(disc_file_path: str, data: bytes, base_offset: int, overlap_length: int,
+                          is_whole_file: bool, matcher: PatternMatcher, recurse_rarcs: bool,
+                          only_file_exts: list[str] | None) -> list[SearchHit]:
+  # Searches the data of a disc file, or a chunk of one if it's very large.
+  # The first overlap_length bytes of a chunk are the end of the previous chunk.
+  hits = []
+  
+  _, file_ext = os.path.splitext(disc_file_path)
+  if is_whole_file and recurse_rarcs and file_ext in [".arc", ".szs", ".szp"]:
+    file_data = BytesIO(data)
+    if RARC.check_possibly_compressed_data_is_rarc(file_data):
+      rarc = RARC(file_data)
+      search_rarc(rarc, disc_file_path, matcher, only_file_exts, hits)
+      return hits
+  
+  if only_file_exts is not None and file_ext not in only_file_exts:
+    return hits
+  
+  if is_whole_file:
+    data = decompress_if_necessary(data)
+  for start_offset, end_offset, pattern in matcher.find_all(data):
+    if end_offset <= overlap_length:
+      # Already found when searching the previous chunk.
+      continue
+    hits.append(SearchHit(disc_file_path, base_offset + start_offset, pattern))
+  
+  return hits
+
+def search_rarc(rarc: RARC, archive_path: str, matcher: PatternMatcher, only_file_exts: list[str] | None,
+                hits: list[SearchHit]):
+  for file_entry in rarc.file_entries:
+    if file_entry.is_dir:
+      continue
+    
+    file_path = archive_path + "/" + file_entry.file_path
+    if file_entry.check_is_nested_rarc():
+      search_rarc(RARC(file_entry, rarc.name_string_cache), file_path, matcher, only_file_exts, hits)
+      continue
+    
+    _, file_ext = os.path.splitext(file_entry.name)
+    if only_file_exts is not None and file_ext not in only_file_exts:
+      continue
+    
+    # The data view avoids copying the entry's data out of the archive when it isn't compressed.
+    data = decompress_if_necessary(file_entry.data_view)
+    for start_offset, end_offset, pattern in matcher.find_all(data):
+      hits.append(SearchHit(file_path, start_offset, pattern))
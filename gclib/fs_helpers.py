@@ -4,6 +4,8 @@ from io import BytesIO
 from typing import BinaryIO, Any
 from types import GenericAlias
 
+import numpy as np
+
 PADDING_BYTES = b"This is padding data to alignme"
 
 class InvalidOffsetError(Exception):
@@ -63,25 +65,54 @@ def try_read_str(data: BinaryIO, offset: int, length: int):
   except InvalidOffsetError:
     return None
 
-def read_str_until_null_character(data: BinaryIO, offset: int) -> str:
-  data_length = data.seek(0, 2)
-  if offset > data_length:
-    raise InvalidOffsetError("Offset 0x%X is past the end of the data (length 0x%X)." % (offset, data_length))
-  
-  temp_offset = offset
-  str_length = 0
-  while temp_offset < data_length:
-    data.seek(temp_offset)
-    char = data.read(1)
-    if char == b"\0":
-      break
-    else:
-      str_length += 1
-    temp_offset += 1
+# How many bytes to read at a time when looking for the end of a null-terminated string.
+STRING_SEARCH_CHUNK_SIZE = 0x100
+
+# A dict can be passed to read_str_until_null_character as a string cache when reading names that repeat a lot, such
+# as the file names in archives. Identical names are then decoded once and share a single str object.
+# The cache should belong to whatever is reading the names (e.g. a GCM or RARC), so that it's freed along with it.
+# String caches are cleared when they reach this many entries so they can't grow forever.
+MAX_STRING_CACHE_SIZE = 0x10000
+
+def read_str_until_null_character(data: BinaryIO, offset: int, string_cache: dict[bytes, str] | None = None) -> str:
+  if isinstance(data, BinaryView):
+    return data.read_str_until_null_character(offset, string_cache)
   
   data.seek(offset)
-  string = data.read(str_length).decode("shift_jis")
+  string_bytes = data.read(STRING_SEARCH_CHUNK_SIZE)
+  if not string_bytes:
+    data_length = data.seek(0, 2)
+    if offset > data_length:
+      raise InvalidOffsetError("Offset 0x%X is past the end of the data (length 0x%X)." % (offset, data_length))
+  
+  null_index = string_bytes.find(b"\0")
+  if null_index == -1:
+    # Long string, keep reading until the null byte or the end of the data.
+    chunks = [string_bytes]
+    chunk = string_bytes
+    while chunk:
+      chunk = data.read(STRING_SEARCH_CHUNK_SIZE)
+      null_index = chunk.find(b"\0")
+      if null_index != -1:
+        chunks.append(chunk[:null_index])
+        break
+      chunks.append(chunk)
+    string_bytes = b"".join(chunks)
+  else:
+    string_bytes = string_bytes[:null_index]
   
+  return decode_str_with_cache(string_bytes, string_cache)
+
+def decode_str_with_cache(string_bytes: bytes, string_cache: dict[bytes, str] | None) -> str:
+  if string_cache is None:
+    return string_bytes.decode("shift_jis")
+  
+  string = string_cache.get(string_bytes)
+  if string is None:
+    if len(string_cache) >= MAX_STRING_CACHE_SIZE:
+      string_cache.clear()
+    string = string_bytes.decode("shift_jis")
+    string_cache[string_bytes] = string
   return string
 
 def write_str(data: BinaryIO, offset: int, new_string: str, max_length: int):
@@ -161,6 +192,175 @@ def read_s32(data: BinaryIO, offset: int) -> int:
   return struct.unpack(">i", data.read(4))[0]
 
 
+# Precompiled structs for the primitive types, used by BinaryView and BinaryWriter.
+U8_STRUCT = struct.Struct(">B")
+U16_STRUCT = struct.Struct(">H")
+U8_U16_STRUCT = struct.Struct(">BH")
+U32_STRUCT = struct.Struct(">I")
+S8_STRUCT = struct.Struct(">b")
+S16_STRUCT = struct.Struct(">h")
+S32_STRUCT = struct.Struct(">i")
+FLOAT_STRUCT = struct.Struct(">f")
+
+class BinaryView:
+  """Reads values directly out of a bytes-like buffer at given offsets, without seeking or copying.
+  
+  The buffer can be bytes, a bytearray, a memoryview, an mmap, or a BytesIO (in which case a snapshot
+  of its current contents is read). The read methods have the same names and behavior as the
+  functions in this module, minus the data argument, so fs.read_u32(data, offset) can be replaced
+  with view.read_u32(offset).
+  A view is also a read-only file with seek, tell, and read, so it can still be passed to code that
+  uses the functions in this module while it is being migrated, or anywhere else a binary file is
+  expected.
+  """
+  
+  def __init__(self, buffer: 'bytes | bytearray | memoryview | BytesIO'):
+    if isinstance(buffer, BytesIO):
+      buffer = buffer.getvalue()
+    elif isinstance(buffer, memoryview):
+      buffer = buffer.cast("B")
+    self.buffer = buffer
+    self.length = len(buffer)
+    self.position = 0
+  
+  def data_len(self) -> int:
+    return self.length
+  
+  def read_all_bytes(self) -> bytes:
+    return bytes(self.buffer)
+  
+  def read_bytes(self, offset: int, length: int) -> bytes:
+    return bytes(self.buffer[offset:offset+length])
+  
+  def read_sub_data(self, offset: int, length: int) -> BytesIO:
+    return BytesIO(self.read_bytes(offset, length))
+  
+  def read_and_unpack_bytes(self, offset: int, length: int, format_string: str):
+    return struct.unpack(format_string, self.buffer[offset:offset+length])
+  
+  def read_str(self, offset: int, length: int) -> str:
+    if offset+length > self.length:
+      raise InvalidOffsetError("Offset 0x%X, length 0x%X is past the end of the data (length 0x%X)." % (offset, length, self.length))
+    string = bytes(self.buffer[offset:offset+length]).decode("shift_jis")
+    string = string.rstrip("\0") # Remove trailing null bytes
+    return string
+  
+  def try_read_str(self, offset: int, length: int):
+    try:
+      return self.read_str(offset, length)
+    except UnicodeDecodeError:
+      return None
+    except InvalidOffsetError:
+      return None
+  
+  def read_str_until_null_character(self, offset: int, string_cache: dict[bytes, str] | None = None) -> str:
+    if offset > self.length:
+      raise InvalidOffsetError("Offset 0x%X is past the end of the data (length 0x%X)." % (offset, self.length))
+    
+    end_offset = self.find_null_character(offset)
+    return decode_str_with_cache(bytes(self.buffer[offset:end_offset]), string_cache)
+  
+  def find_null_character(self, offset: int) -> int:
+    # Returns the offset of the first null byte at or after offset, or the length of the data if there isn't one.
+    # Memoryviews can't be searched directly, so they're searched a chunk at a time.
+    if not isinstance(self.buffer, memoryview):
+      end_offset = self.buffer.find(b"\0", offset)
+      return self.length if end_offset == -1 else end_offset
+    
+    while offset < self.length:
+      chunk = self.buffer[offset:offset+STRING_SEARCH_CHUNK_SIZE].tobytes()
+      null_index = chunk.find(b"\0")
+      if null_index != -1:
+        return offset + null_index
+      offset += len(chunk)
+    return self.length
+  
+  def read_u8(self, offset: int) -> int:
+    return U8_STRUCT.unpack_from(self.buffer, offset)[0]
+  
+  def read_u16(self, offset: int) -> int:
+    return U16_STRUCT.unpack_from(self.buffer, offset)[0]
+  
+  def read_u24(self, offset: int) -> int:
+    high_byte, low_bytes = U8_U16_STRUCT.unpack_from(self.buffer, offset)
+    return (high_byte << 16) | low_bytes
+  
+  def read_u32(self, offset: int) -> int:
+    return U32_STRUCT.unpack_from(self.buffer, offset)[0]
+  
+  def read_float(self, offset: int) -> float:
+    return FLOAT_STRUCT.unpack_from(self.buffer, offset)[0]
+  
+  def read_s8(self, offset: int) -> int:
+    return S8_STRUCT.unpack_from(self.buffer, offset)[0]
+  
+  def read_s16(self, offset: int) -> int:
+    return S16_STRUCT.unpack_from(self.buffer, offset)[0]
+  
+  def read_s32(self, offset: int) -> int:
+    return S32_STRUCT.unpack_from(self.buffer, offset)[0]
+  
+  def unpack_from(self, struct_format: struct.Struct, offset: int) -> tuple:
+    # For reading a whole structure at once with a precompiled struct.
+    return struct_format.unpack_from(self.buffer, offset)
+  
+  def read_array(self, offset: int, count: int, dtype: type) -> np.ndarray:
+    if dtype == u24:
+      return unpack_u24_array(self.buffer, count, offset)
+    return unpack_array(self.buffer, count, PRIMITIVE_TYPE_TO_NUMPY_DTYPE[dtype], offset)
+  
+  # File interface, so that views can be passed to the functions in this module.
+  
+  def readable(self) -> bool:
+    return True
+  
+  def seekable(self) -> bool:
+    return True
+  
+  def seek(self, offset: int, whence=0) -> int:
+    if whence == 0:
+      self.position = offset
+    elif whence == 1:
+      self.position += offset
+    elif whence == 2:
+      self.position = self.length + offset
+    else:
+      raise ValueError(f"Invalid whence: {whence}")
+    return self.position
+  
+  def tell(self) -> int:
+    return self.position
+  
+  def read(self, size=-1) -> bytes:
+    if size is None or size < 0:
+      size = self.length - self.position
+    data = bytes(self.buffer[self.position:self.position+max(size, 0)])
+    self.position += len(data)
+    return data
+  
+  def readinto(self, buffer) -> int:
+    data = self.buffer[self.position:self.position+len(buffer)]
+    memoryview(buffer).cast("B")[:len(data)] = data
+    self.position += len(data)
+    return len(data)
+  
+  def getvalue(self) -> bytes:
+    return self.read_all_bytes()
+  
+  # Views aren't io.RawIOBase subclasses, as that makes their read methods measurably slower, so the rest of the file
+  # interface that's needed to use them in place of an open file is defined here.
+  
+  def close(self):
+    # Closing a view doesn't close or release the buffer.
+    pass
+  
+  def __enter__(self):
+    return self
+  
+  def __exit__(self, exc_type, exc_value, traceback):
+    self.close()
+
+
 def write_u8(data: BinaryIO, offset: int, new_value: int):
   new_bytes = struct.pack(">B", new_value)
   data.seek(offset)
@@ -213,14 +413,17 @@ def bit_cast_int_to_float(value: int) -> float:
   return struct.unpack(">f", raw_bytes)[0]
 
 
+def get_padding(padding_needed: int, padding_bytes:bytes=PADDING_BYTES) -> bytes:
+  padding = padding_bytes*(padding_needed // len(padding_bytes))
+  padding += padding_bytes[:padding_needed % len(padding_bytes)]
+  return padding
+
 def align_data_to_nearest(data: BinaryIO, size: int, padding_bytes:bytes=PADDING_BYTES):
   current_end = data_len(data)
   next_offset = current_end + (size - current_end % size) % size
   padding_needed = next_offset - current_end
   data.seek(current_end)
-  padding = padding_bytes*(padding_needed // len(padding_bytes))
-  padding += padding_bytes[:padding_needed % len(padding_bytes)]
-  data.write(padding)
+  data.write(get_padding(padding_needed, padding_bytes))
 
 def pad_offset_to_nearest(offset: int, size: int) -> int:
   next_offset = offset + (size - offset % size) % size
@@ -230,12 +433,156 @@ def align_data_and_pad_offset(data: BinaryIO, offset: int, size: int, padding_by
   next_offset = offset + (size - offset % size) % size
   padding_needed = next_offset - offset
   data.seek(offset)
-  padding = padding_bytes*(padding_needed // len(padding_bytes))
-  padding += padding_bytes[:padding_needed % len(padding_bytes)]
-  data.write(padding)
+  data.write(get_padding(padding_needed, padding_bytes))
   return next_offset
 
 
+class BinaryWriter:
+  """Builds binary data in a bytearray that grows as needed.
+  
+  The write methods have the same names and behavior as the functions in this module, minus the
+  data argument, but pack values straight into the buffer instead of seeking a file and writing a
+  new bytes object for every field. Writing past the end of the data fills the gap with zeroes, the
+  same as it would for a BytesIO.
+  Space for values that aren't known yet, like offsets to data that hasn't been written, can be set
+  aside with reserve and filled in later with any of the write methods.
+  A writer is also a file with seek, tell, read, and write, so it can still be passed to code that
+  uses the functions in this module.
+  """
+  
+  def __init__(self, initial_data: bytes | bytearray | memoryview = b""):
+    self.buffer = bytearray(initial_data)
+    self.position = 0
+  
+  def data_len(self) -> int:
+    return len(self.buffer)
+  
+  def ensure_size(self, size: int):
+    if size > len(self.buffer):
+      self.buffer.extend(bytes(size - len(self.buffer)))
+  
+  def pack_into(self, struct_format: struct.Struct, offset: int, *values):
+    # For writing a whole structure at once with a precompiled struct.
+    self.ensure_size(offset + struct_format.size)
+    struct_format.pack_into(self.buffer, offset, *values)
+  
+  def append_packed(self, struct_format: struct.Struct, *values) -> int:
+    # Writes a structure at the end of the data and returns the offset it was written at.
+    offset = len(self.buffer)
+    self.buffer += struct_format.pack(*values)
+    return offset
+  
+  def read_all_bytes(self) -> bytes:
+    return bytes(self.buffer)
+  
+  def write_bytes(self, offset: int, raw_bytes: bytes | bytearray | memoryview):
+    end_offset = offset + len(raw_bytes)
+    self.ensure_size(end_offset)
+    self.buffer[offset:end_offset] = raw_bytes
+  
+  def append_bytes(self, raw_bytes: bytes | bytearray | memoryview) -> int:
+    offset = len(self.buffer)
+    self.buffer += raw_bytes
+    return offset
+  
+  def reserve(self, size: int) -> int:
+    # Sets aside space at the end of the data to be filled in later, and returns its offset.
+    offset = len(self.buffer)
+    self.buffer.extend(bytes(size))
+    return offset
+  
+  def write_and_pack_bytes(self, offset: int, new_values: list[Any], format_string: str | bytes):
+    self.write_bytes(offset, struct.pack(format_string, *new_values))
+  
+  def write_str(self, offset: int, new_string: str, max_length: int):
+    write_str(self, offset, new_string, max_length)
+  
+  def write_magic_str(self, offset: int, new_string: str, max_length: int):
+    write_magic_str(self, offset, new_string, max_length)
+  
+  def write_str_with_null_byte(self, offset: int, new_string: str):
+    write_str_with_null_byte(self, offset, new_string)
+  
+  def write_u8(self, offset: int, new_value: int):
+    self.pack_into(U8_STRUCT, offset, new_value)
+  
+  def write_u16(self, offset: int, new_value: int):
+    self.pack_into(U16_STRUCT, offset, new_value)
+  
+  def write_u24(self, offset: int, new_value: int):
+    new_bytes = U32_STRUCT.pack(new_value)
+    assert new_bytes[0] == 0
+    self.write_bytes(offset, new_bytes[1:])
+  
+  def write_u32(self, offset: int, new_value: int):
+    self.pack_into(U32_STRUCT, offset, new_value)
+  
+  def write_float(self, offset: int, new_value: float):
+    self.pack_into(FLOAT_STRUCT, offset, new_value)
+  
+  def write_s8(self, offset: int, new_value: int):
+    self.pack_into(S8_STRUCT, offset, new_value)
+  
+  def write_s16(self, offset: int, new_value: int):
+    self.pack_into(S16_STRUCT, offset, new_value)
+  
+  def write_s32(self, offset: int, new_value: int):
+    self.pack_into(S32_STRUCT, offset, new_value)
+  
+  def write_array(self, offset: int, values, dtype: type):
+    self.write_bytes(offset, pack_array(values, dtype))
+  
+  def align_to_nearest(self, size: int, padding_bytes: bytes = PADDING_BYTES) -> int:
+    # Pads the end of the data to a multiple of size, and returns the new length.
+    padding_needed = (size - len(self.buffer) % size) % size
+    self.buffer += get_padding(padding_needed, padding_bytes)
+    return len(self.buffer)
+  
+  def write_to(self, data: BinaryIO):
+    # Replaces the contents of a file with the data that was built.
+    # The file object itself is kept, so anything else that refers to it sees the new data.
+    data.seek(0)
+    data.truncate()
+    data.write(self.buffer)
+  
+  # File interface, so that writers can be passed to the functions in this module.
+  
+  def seek(self, offset: int, whence=0) -> int:
+    if whence == 0:
+      self.position = offset
+    elif whence == 1:
+      self.position += offset
+    elif whence == 2:
+      self.position = len(self.buffer) + offset
+    else:
+      raise ValueError(f"Invalid whence: {whence}")
+    return self.position
+  
+  def tell(self) -> int:
+    return self.position
+  
+  def read(self, size=-1) -> bytes:
+    if size is None or size < 0:
+      size = len(self.buffer) - self.position
+    data = bytes(self.buffer[self.position:self.position+max(size, 0)])
+    self.position += len(data)
+    return data
+  
+  def write(self, raw_bytes: bytes | bytearray | memoryview) -> int:
+    self.write_bytes(self.position, raw_bytes)
+    self.position += len(raw_bytes)
+    return len(raw_bytes)
+  
+  def truncate(self, size: int | None = None) -> int:
+    if size is None:
+      size = self.position
+    del self.buffer[size:]
+    return size
+  
+  def getvalue(self) -> bytes:
+    return self.read_all_bytes()
+
+
 class u32(int):
   pass
 
@@ -333,3 +680,64 @@ PRIMITIVE_TYPE_IS_SIGNED = {
   s8   : True,
   float: True,
 }
+
+PRIMITIVE_TYPE_TO_NUMPY_DTYPE = {
+  u32  : np.dtype(">u4"),
+  u16  : np.dtype(">u2"),
+  u8   : np.dtype(">u1"),
+  s32  : np.dtype(">i4"),
+  s16  : np.dtype(">i2"),
+  s8   : np.dtype(">i1"),
+  float: np.dtype(">f4"),
+}
+
+def read_array(data: BinaryIO, offset: int, count: int, dtype: type) -> np.ndarray:
+  # Reads a table of count values of one of the primitive types (e.g. fs.s16 or float) at once.
+  # The returned array is in native byte order. Call tolist() on it to get plain Python ints or floats.
+  if dtype == u24:
+    raw_bytes = read_bytes(data, offset, count*3)
+    return unpack_u24_array(raw_bytes, count)
+  numpy_dtype = PRIMITIVE_TYPE_TO_NUMPY_DTYPE[dtype]
+  raw_bytes = read_bytes(data, offset, count*numpy_dtype.itemsize)
+  return unpack_array(raw_bytes, count, numpy_dtype)
+
+def write_array(data: BinaryIO, offset: int, values, dtype: type):
+  # Writes a sequence or array of values of one of the primitive types at once.
+  # Values that don't fit in the type raise an error, the same as writing them one at a time would.
+  write_bytes(data, offset, pack_array(values, dtype))
+
+def unpack_array(raw_bytes, count: int, numpy_dtype: np.dtype, offset=0) -> np.ndarray:
+  if len(raw_bytes) - offset < count*numpy_dtype.itemsize:
+    raise struct.error("unpack requires a buffer of %d bytes" % (count*numpy_dtype.itemsize))
+  array = np.frombuffer(raw_bytes, dtype=numpy_dtype, count=count, offset=offset)
+  return array.astype(numpy_dtype.newbyteorder("="))
+
+def unpack_u24_array(raw_bytes, count: int, offset=0) -> np.ndarray:
+  byte_array = unpack_array(raw_bytes, count*3, np.dtype(np.uint8), offset).reshape(count, 3).astype(np.uint32)
+  return (byte_array[:, 0] << 16) | (byte_array[:, 1] << 8) | byte_array[:, 2]
+
+def pack_array(values, dtype: type) -> bytes:
+  values = np.asarray(values)
+  if dtype == float:
+    if values.size and values.dtype.kind not in "iubf":
+      raise struct.error("required argument is not a float")
+    with np.errstate(over="ignore"):
+      packed_values = values.astype(PRIMITIVE_TYPE_TO_NUMPY_DTYPE[float])
+    if np.any(np.isinf(packed_values) & ~np.isinf(values)):
+      raise OverflowError("float too large to pack with f format")
+    return packed_values.tobytes()
+  
+  if values.size and values.dtype.kind not in "iub":
+    raise struct.error("required argument is not an integer")
+  if dtype == u24:
+    min_value, max_value = 0, 0xFFFFFF
+  else:
+    numpy_dtype = PRIMITIVE_TYPE_TO_NUMPY_DTYPE[dtype]
+    min_value, max_value = np.iinfo(numpy_dtype).min, np.iinfo(numpy_dtype).max
+  if values.size and (values.min() < min_value or values.max() > max_value):
+    raise struct.error("%s value out of range (0x%X to 0x%X)" % (dtype.__name__, min_value, max_value))
+  
+  if dtype == u24:
+    values = values.astype(">u4")
+    return values.view(np.uint8).reshape(-1, 4)[:, 1:].tobytes()
+  return values.astype(numpy_dtype).tobytes()
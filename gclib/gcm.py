@@ -3,26 +3,77 @@ import os
 from io import BytesIO
 from typing import BinaryIO
 import re
+import asyncio
+import hashlib
+from collections import OrderedDict, defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
 
 from gclib import fs_helpers as fs
-from gclib.rarc import RARC
+from gclib.ciso import CISO, CISOBlockMap, CISOReader, CISOWriter
+from gclib.iso_reader import ISOReader, StreamView
+from gclib.rarc import RARC, RARCFileEntry
 from gclib.yaz0_yay0 import Yaz0, Yay0
 
 MAX_DATA_SIZE_TO_READ_AT_ONCE = 64*1024*1024 # 64MB
+HASH_CHUNK_SIZE = 4*1024*1024 # 4MB
+MAX_VIRTUAL_RARC_CACHE_BYTES = 256*1024*1024 # 256MB
 
 class GCM:
   file_entries: list['GCMFileEntry']
   
-  def __init__(self, iso_path):
-    self.iso_path = iso_path
+  def __init__(self, iso_path, *, iso_offset=0, iso_size=None):
+    # iso_path can be the path to a disc image, but the image can also be read from a bytes-like object (such as an
+    # mmap), from an already open binary file, or from a custom ISOReader.
+    # iso_offset and iso_size can be used to read an image that is only part of a larger file or buffer.
+    self.iso_reader = ISOReader.from_source(iso_path, iso_offset, iso_size)
+    self.iso_path = self.iso_reader.get_path()
+    # Used when reading the names of files on the disc and in the archives on it. See fs.read_str_until_null_character.
+    self.name_string_cache: dict[bytes, str] = {}
+    # Whether the input disc image is a CISO, and its parsed block map if so. Both are filled in the first time the
+    # image is opened.
+    self.iso_is_ciso: bool | None = None
+    self.ciso_block_map: CISOBlockMap | None = None
     self.files_by_path: dict[str, GCMBaseFile] = {}
     self.files_by_path_lowercase: dict[str, GCMBaseFile] = {}
     self.dirs_by_path: dict[str, GCMBaseFile] = {}
     self.dirs_by_path_lowercase: dict[str, GCMBaseFile] = {}
     self.changed_files: dict[str, BinaryIO] = {}
+    # Maps paths of archives on the disc to the parsed RARC, the changed file data it was parsed from, and the size of
+    # the archive's data, from least to most recently used.
+    # Archives nested inside of those are memoized by the RARC containing them.
+    self.virtual_rarc_cache: OrderedDict[str, tuple[RARC, BinaryIO | None, int]] = OrderedDict()
+    self.virtual_rarc_cache_bytes = 0
+    # Once the archives in virtual_rarc_cache add up to more than this, the least recently used ones are dropped, and
+    # will be parsed again from the disc the next time they're used. Keep a reference to any archive you modify
+    # through get_virtual_rarc until you've saved it.
+    self.max_virtual_rarc_cache_bytes = MAX_VIRTUAL_RARC_CACHE_BYTES
+    # Filled in when exporting an ISO with deduplicate_files enabled.
+    # Maps the path of each file that wasn't written to the path of the identical file it shares data with.
+    self.deduplicated_files: dict[str, str] = {}
+    self.bytes_saved_by_deduplication = 0
+    # The largest amount of file data that will be held in memory at once when copying files during exports.
+    # Lower this to bound memory usage when exporting in a memory constrained environment.
+    self.max_buffer_bytes = MAX_DATA_SIZE_TO_READ_AT_ONCE
+    # Reused for every file copy during an export, so that exporting doesn't allocate a new buffer for each chunk of
+    # each file. It's released when the export finishes.
+    self.copy_buffer: bytearray | None = None
+    # The most memory that has been set aside for file data so far, either by the largest copy buffer or by all of the
+    # chunks that threads hashing files can have in memory at once.
+    self.peak_buffer_bytes = 0
+  
+  def open_iso(self) -> BinaryIO:
+    # Opens the input disc image for reading. CISO images are transparently presented as a full disc image.
+    iso_file = self.iso_reader.open()
+    if self.iso_is_ciso is None:
+      self.iso_is_ciso = CISO.check_is_ciso(iso_file)
+      if self.iso_is_ciso:
+        self.ciso_block_map = CISOBlockMap.read(iso_file)
+    if self.iso_is_ciso:
+      return CISOReader(iso_file, self.ciso_block_map)
+    return iso_file
   
   def read_entire_disc(self):
-    self.iso_file = open(self.iso_path, "rb")
+    self.iso_file = self.open_iso()
     
     try:
       self.fst_offset = fs.read_u32(self.iso_file, 0x424)
@@ -45,7 +96,7 @@ class GCM:
     for file_index in range(num_file_entries):
       file_entry_offset = self.fst_offset + file_index * 0xC
       file_entry = GCMFileEntry()
-      file_entry.read(file_index, self.iso_file, file_entry_offset, self.fnt_offset)
+      file_entry.read(file_index, self.iso_file, file_entry_offset, self.fnt_offset, self.name_string_cache)
       self.file_entries.append(file_entry)
     
     root_file_entry = self.file_entries[0]
@@ -120,7 +171,7 @@ class GCM:
     file_entry = self.files_by_path_lowercase[file_path]
     if file_entry.file_size > MAX_DATA_SIZE_TO_READ_AT_ONCE:
       raise Exception("Tried to read a very large file all at once")
-    with open(self.iso_path, "rb") as iso_file:
+    with self.open_iso() as iso_file:
       data = fs.read_bytes(iso_file, file_entry.file_data_offset, file_entry.file_size)
     data = BytesIO(data)
     
@@ -132,11 +183,86 @@ class GCM:
       raise Exception("Could not find file: " + file_path)
     
     file_entry = self.files_by_path_lowercase[file_path]
-    with open(self.iso_path, "rb") as iso_file:
+    with self.open_iso() as iso_file:
       data = fs.read_bytes(iso_file, file_entry.file_data_offset, file_entry.file_size)
     
     return data
   
+  def read_changed_file_data_in_chunks(self, file_path, chunk_size=MAX_DATA_SIZE_TO_READ_AT_ONCE):
+    # Yields the file's data as bytes objects no larger than chunk_size, so that very large files can be processed
+    # without reading them all at once.
+    if file_path in self.changed_files:
+      file_data = self.changed_files[file_path]
+      file_data.seek(0)
+      while chunk := file_data.read(chunk_size):
+        yield chunk
+      return
+    
+    file_path = file_path.lower()
+    if file_path not in self.files_by_path_lowercase:
+      raise Exception("Could not find file: " + file_path)
+    
+    file_entry = self.files_by_path_lowercase[file_path]
+    size_remaining = file_entry.file_size
+    offset_in_file = 0
+    with self.open_iso() as iso_file:
+      while size_remaining > 0:
+        size_to_read = min(size_remaining, chunk_size)
+        yield fs.read_bytes(iso_file, file_entry.file_data_offset + offset_in_file, size_to_read)
+        size_remaining -= size_to_read
+        offset_in_file += size_to_read
+  
+  def hash_changed_file_data(self, file_path, algo="sha1", chunk_size=None) -> str:
+    # Hashes the file in fixed size chunks, so memory usage doesn't depend on the file's size.
+    hasher = hashlib.new(algo)
+    if chunk_size is None:
+      chunk_size = self.get_hash_chunk_size(1)
+    for chunk in self.read_changed_file_data_in_chunks(file_path, chunk_size=chunk_size):
+      hasher.update(chunk)
+    return hasher.hexdigest()
+  
+  def get_hash_chunk_size(self, workers: int) -> int:
+    # Splits max_buffer_bytes between the threads hashing files at the same time, so that the chunks they all have in
+    # memory at once add up to no more than max_buffer_bytes.
+    chunk_size = max(min(HASH_CHUNK_SIZE, self.max_buffer_bytes // workers), 1)
+    self.peak_buffer_bytes = max(self.peak_buffer_bytes, chunk_size * workers)
+    return chunk_size
+  
+  @staticmethod
+  def get_num_hash_workers(workers: int | None) -> int:
+    # The number of threads a ThreadPoolExecutor uses when max_workers is None.
+    if workers is None:
+      return min(32, (os.cpu_count() or 1) + 4)
+    return workers
+  
+  def compute_manifest(self, algo="sha1", workers=None) -> dict[str, str]:
+    # Returns a dict mapping the path of every file on the disc (including system files) to the hash of its data.
+    # Files are hashed in parallel by a pool of threads. At most one chunk per thread is in memory at a time, and the
+    # chunks are sized so that they add up to no more than max_buffer_bytes.
+    all_file_paths = self.get_all_file_paths_natsort()
+    workers = self.get_num_hash_workers(workers)
+    chunk_size = self.get_hash_chunk_size(workers)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+      file_hashes = executor.map(lambda file_path: self.hash_changed_file_data(file_path, algo, chunk_size), all_file_paths)
+      return dict(zip(all_file_paths, file_hashes))
+  
+  def verify_manifest(self, manifest: dict[str, str], algo="sha1", workers=None) -> dict[str, tuple[str | None, str | None]]:
+    # Compares the files on this disc against a manifest previously returned by compute_manifest.
+    # Returns a dict mapping the path of each mismatched file to a tuple of its expected hash and its actual hash.
+    # The expected hash is None for files not in the manifest, and the actual hash is None for files missing from the disc.
+    # System files whose contents depend on the layout of the rest of the disc (boot.bin and fst.bin) are compared too,
+    # so a rebuilt disc will only match if its layout is also identical.
+    actual_manifest = self.compute_manifest(algo=algo, workers=workers)
+    
+    mismatches = {}
+    for file_path in manifest.keys() | actual_manifest.keys():
+      expected_hash = manifest.get(file_path)
+      actual_hash = actual_manifest.get(file_path)
+      if expected_hash != actual_hash:
+        mismatches[file_path] = (expected_hash, actual_hash)
+    
+    return dict(sorted(mismatches.items()))
+  
   def get_or_create_dir_file_entry(self, dir_path):
     if dir_path.lower() in self.dirs_by_path_lowercase:
       return self.dirs_by_path_lowercase[dir_path.lower()]
@@ -209,6 +335,50 @@ class GCM:
       files_done += 1
       yield(gcm_file_path, files_done)
   
+  async def aimport_files_from_disk_by_paths(self, replace_paths, add_paths, *, executor=None, max_concurrency=8):
+    # Async version of import_files_from_disk_by_paths.
+    # Up to max_concurrency files are read at once in the executor. The GCM itself is only modified from the event loop's
+    # thread, and files are imported in the same order as the sync version so new files are always added in order.
+    loop = asyncio.get_running_loop()
+    
+    def read_file(file_path, gcm_file_path):
+      if not os.path.isfile(file_path):
+        raise Exception("File appears to have been deleted or moved: %s" % gcm_file_path)
+      with open(file_path, "rb") as f:
+        return BytesIO(f.read())
+    
+    paths_to_import = [(file_path, gcm_file_path, False) for file_path, gcm_file_path in replace_paths]
+    paths_to_import += [(file_path, gcm_file_path, True) for file_path, gcm_file_path in add_paths]
+    paths_to_import = iter(paths_to_import)
+    
+    pending_reads = deque()
+    def start_next_reads():
+      while len(pending_reads) < max_concurrency:
+        next_path = next(paths_to_import, None)
+        if next_path is None:
+          break
+        file_path, gcm_file_path, is_new_file = next_path
+        read_future = loop.run_in_executor(executor, read_file, file_path, gcm_file_path)
+        pending_reads.append((gcm_file_path, is_new_file, read_future))
+    
+    files_done = 0
+    try:
+      start_next_reads()
+      while pending_reads:
+        gcm_file_path, is_new_file, read_future = pending_reads.popleft()
+        file_data = await read_future
+        if is_new_file:
+          self.add_new_file(gcm_file_path, file_data)
+        else:
+          self.changed_files[gcm_file_path] = file_data
+        start_next_reads()
+        
+        files_done += 1
+        yield(gcm_file_path, files_done)
+    finally:
+      for _, _, read_future in pending_reads:
+        read_future.cancel()
+  
   def get_num_files(self, base_dir=None):
     if base_dir is None:
       return len(self.files_by_path)
@@ -238,7 +408,7 @@ class GCM:
       _, file_ext = os.path.splitext(os.path.basename(file_path))
       
       if recurse_rarcs and self.check_file_is_rarc(file_path):
-        rarc = RARC(self.get_changed_file_data(file_path))
+        rarc = RARC(self.get_changed_file_data(file_path), self.name_string_cache)
         for rarc_file_path, file_data in rarc.each_file_data(only_file_exts=only_file_exts):
           yield (file_path + "/" + rarc_file_path, file_data)
       else:
@@ -246,25 +416,156 @@ class GCM:
           continue
         yield (file_path, self.get_changed_file_data(file_path))
   
-  def check_file_is_rarc(self, file_path: str) -> bool:
-    try:
+  def walk_files(self, only_file_exts: list[str] | None = None, yield_entries=False, cache_rarcs=False):
+    # Like each_file_data, but descends into nested RARCs at any depth, and yields virtual paths.
+    # If yield_entries is True, the file entry of each file (either a GCMFileEntry or RARCFileEntry) is yielded instead
+    # of its data, and files inside of archives aren't loaded or decompressed.
+    # Archives that are already cached are reused. Archives that aren't are only added to the cache if cache_rarcs is
+    # True, so that walking the whole disc doesn't fill the cache with every archive on it.
+    for file_path in self.get_all_file_paths_natsort():
+      rarc = self.get_cached_disc_rarc(file_path)
+      if rarc is None and self.check_file_is_rarc(file_path):
+        if cache_rarcs:
+          rarc = self.get_disc_rarc(file_path)
+        else:
+          rarc = RARC(self.get_changed_file_data(file_path), self.name_string_cache)
+      if rarc is not None:
+        for rarc_file_path, file_data_or_entry in rarc.walk_files(only_file_exts, yield_entries):
+          yield (file_path + "/" + rarc_file_path, file_data_or_entry)
+        continue
+      
       _, file_ext = os.path.splitext(os.path.basename(file_path))
-      if file_ext in [".arc", ".szs", ".szp"]:
-        file_data = self.get_changed_file_data(file_path)
-        if Yaz0.check_is_compressed(file_data):
-          magic = fs.read_str(file_data, 0x11, 4)
-          if magic == "RARC":
-            return True
-        elif Yay0.check_is_compressed(file_data):
-          chunk_offset = fs.read_u32(file_data, 0xC)
-          magic = fs.read_str(file_data, chunk_offset, 4)
-          if magic == "RARC":
-            return True
-        elif RARC.check_file_is_rarc(file_data):
-          return True
-    except Exception as e:
-      pass
-    return False
+      if only_file_exts is not None and file_ext not in only_file_exts:
+        continue
+      if yield_entries:
+        yield (file_path, self.files_by_path[file_path])
+      else:
+        yield (file_path, self.get_changed_file_data(file_path))
+  
+  def read_virtual_file_data(self, virtual_path: str) -> BinaryIO:
+    # Reads a file by a path that can continue on inside of RARC archives, including nested and
+    # compressed ones, e.g. "files/res/Stage/sea/Room1.arc/dzb/room.dzb".
+    # Paths yielded by each_file_data are valid virtual paths.
+    # Only the archives along the path are read and decompressed, and they are cached so that looking
+    # up another file in the same archive later doesn't need to parse it again.
+    file_path, file_entry = self.resolve_virtual_path(virtual_path)
+    if file_entry is None:
+      return self.get_changed_file_data(file_path)
+    file_entry.decompress_data_if_necessary()
+    return file_entry.data
+  
+  def get_virtual_rarc(self, virtual_path: str) -> RARC:
+    # Returns the parsed RARC at the given virtual path, which may itself be inside of other RARCs.
+    file_path, file_entry = self.resolve_virtual_path(virtual_path)
+    if file_entry is None:
+      return self.get_disc_rarc(file_path)
+    if not file_entry.check_is_nested_rarc():
+      raise Exception("File is not a RARC archive: " + virtual_path)
+    return self.get_nested_virtual_rarc(file_path, file_entry)
+  
+  def resolve_virtual_path(self, virtual_path: str) -> tuple[str, RARCFileEntry | None]:
+    # Returns the canonical form of the virtual path, and the RARC file entry it refers to.
+    # The file entry is None if the path refers directly to a file on the disc.
+    file_path, rarc_file_path_parts = self.split_virtual_path(virtual_path)
+    if not rarc_file_path_parts:
+      return file_path, None
+    
+    archive_path = file_path
+    rarc = self.get_disc_rarc(file_path)
+    while True:
+      file_entry, num_parts_used = self.find_rarc_file_entry_by_path_parts(rarc, rarc_file_path_parts)
+      if file_entry is None:
+        raise Exception("Could not find file: " + virtual_path)
+      
+      entry_path = archive_path + "/" + file_entry.file_path
+      rarc_file_path_parts = rarc_file_path_parts[num_parts_used:]
+      if not rarc_file_path_parts:
+        return entry_path, file_entry
+      
+      if not file_entry.check_is_nested_rarc():
+        raise Exception("Could not find file: " + virtual_path)
+      archive_path = entry_path
+      rarc = self.get_nested_virtual_rarc(archive_path, file_entry)
+  
+  def get_disc_rarc(self, file_path: str) -> RARC:
+    rarc = self.get_cached_disc_rarc(file_path)
+    if rarc is not None:
+      return rarc
+    
+    rarc = RARC(self.get_changed_file_data(file_path), self.name_string_cache)
+    self.add_to_virtual_rarc_cache(file_path, rarc)
+    return rarc
+  
+  def get_cached_disc_rarc(self, file_path: str) -> RARC | None:
+    # Returns the parsed RARC for a file on the disc if it was already parsed and hasn't been changed since.
+    if file_path not in self.virtual_rarc_cache:
+      return None
+    rarc, cached_source_data, _ = self.virtual_rarc_cache[file_path]
+    # Reparse if the file was changed after we parsed it.
+    if cached_source_data is not self.changed_files.get(file_path):
+      return None
+    self.virtual_rarc_cache.move_to_end(file_path)
+    return rarc
+  
+  def add_to_virtual_rarc_cache(self, file_path: str, rarc: RARC):
+    if file_path in self.virtual_rarc_cache:
+      self.remove_from_virtual_rarc_cache(file_path)
+    rarc_size = fs.data_len(rarc.data)
+    self.virtual_rarc_cache[file_path] = (rarc, self.changed_files.get(file_path), rarc_size)
+    self.virtual_rarc_cache_bytes += rarc_size
+    
+    # The archive that was just added is always kept, even if it's larger than the limit on its own.
+    while self.virtual_rarc_cache_bytes > self.max_virtual_rarc_cache_bytes and len(self.virtual_rarc_cache) > 1:
+      least_recently_used_path = next(iter(self.virtual_rarc_cache))
+      self.remove_from_virtual_rarc_cache(least_recently_used_path)
+  
+  def remove_from_virtual_rarc_cache(self, file_path: str):
+    _, _, rarc_size = self.virtual_rarc_cache.pop(file_path)
+    self.virtual_rarc_cache_bytes -= rarc_size
+  
+  def get_nested_virtual_rarc(self, virtual_path: str, file_entry: RARCFileEntry) -> RARC:
+    # Nested archives are memoized by the archive containing them.
+    return file_entry.rarc.get_nested_rarc(file_entry)
+  
+  def clear_virtual_rarc_cache(self):
+    self.virtual_rarc_cache.clear()
+    self.virtual_rarc_cache_bytes = 0
+  
+  def split_virtual_path(self, virtual_path: str) -> tuple[str, list[str]]:
+    # Splits a virtual path into the path of the file on the disc and the parts of the path inside that file.
+    path_parts = virtual_path.split("/")
+    for num_parts in range(1, len(path_parts)+1):
+      file_path = "/".join(path_parts[:num_parts])
+      file_entry = self.files_by_path_lowercase.get(file_path.lower())
+      if file_entry is not None:
+        return file_entry.file_path, path_parts[num_parts:]
+    raise Exception("Could not find file: " + virtual_path)
+  
+  @staticmethod
+  def find_rarc_file_entry_by_path_parts(rarc: RARC, path_parts: list[str]) -> tuple[RARCFileEntry | None, int]:
+    # Finds the shortest prefix of the path that is a file in the RARC.
+    # Any remaining parts of the path refer to a file inside that file (e.g. a nested archive).
+    for num_parts in range(1, len(path_parts)+1):
+      file_entry = rarc.get_file_entry_by_path("/".join(path_parts[:num_parts]))
+      if file_entry is not None:
+        return file_entry, num_parts
+    return None, 0
+  
+  def check_file_is_rarc(self, file_path: str) -> bool:
+    _, file_ext = os.path.splitext(os.path.basename(file_path))
+    if file_ext not in [".arc", ".szs", ".szp"]:
+      return False
+    if file_path in self.changed_files:
+      return RARC.check_possibly_compressed_data_is_rarc(self.changed_files[file_path])
+    
+    file_entry = self.files_by_path_lowercase.get(file_path.lower())
+    if file_entry is None:
+      return False
+    # Only the few bytes of the header that are needed to identify the archive are read from the disc, instead of the
+    # whole file.
+    with self.open_iso() as iso_file:
+      file_data = StreamView(iso_file, file_entry.file_data_offset, file_entry.file_size)
+      return RARC.check_possibly_compressed_data_is_rarc(file_data)
   
   def export_disc_to_folder_with_changed_files(self, output_folder_path, *, base_dir=None, only_changed_files=False):
     base_dir_path = None
@@ -273,60 +574,61 @@ class GCM:
     
     files_done = 0
     
-    for file_path, file_entry in self.files_by_path.items():
-      if base_dir is None:
-        relative_file_path = file_path
-      else:
-        if file_path.startswith(f"{base_dir_path}/"):
-          relative_file_path = os.path.relpath(file_path, base_dir_path)
+    try:
+      for file_path, file_entry in self.files_by_path.items():
+        if base_dir is None:
+          relative_file_path = file_path
         else:
-          # This file isn't in the specified directory.
-          continue
-      
-      out_file_path = os.path.join(output_folder_path, relative_file_path)
-      dir_name = os.path.dirname(out_file_path)
-      
-      if file_path in self.changed_files:
-        if not os.path.isdir(dir_name):
-          os.makedirs(dir_name)
+          if file_path.startswith(f"{base_dir_path}/"):
+            relative_file_path = os.path.relpath(file_path, base_dir_path)
+          else:
+            # This file isn't in the specified directory.
+            continue
         
-        file_data = self.changed_files[file_path]
-        with open(out_file_path, "wb") as f:
-          file_data.seek(0)
-          f.write(file_data.read())
-      else:
-        if only_changed_files:
-          continue
-        if not os.path.isdir(dir_name):
-          os.makedirs(dir_name)
+        out_file_path = os.path.join(output_folder_path, relative_file_path)
+        dir_name = os.path.dirname(out_file_path)
         
-        # Need to avoid reading enormous files all at once
-        size_remaining = file_entry.file_size
-        offset_in_file = 0
-        with open(out_file_path, "wb") as f:
-          while size_remaining > 0:
-            size_to_read = min(size_remaining, MAX_DATA_SIZE_TO_READ_AT_ONCE)
-            
-            with open(self.iso_path, "rb") as iso_file:
-              data = fs.read_bytes(iso_file, file_entry.file_data_offset + offset_in_file, size_to_read)
-            f.write(data)
-            
-            size_remaining -= size_to_read
-            offset_in_file += size_to_read
-      
-      files_done += 1
-      yield(file_path, files_done)
+        if file_path in self.changed_files:
+          if not os.path.isdir(dir_name):
+            os.makedirs(dir_name)
+          
+          with open(out_file_path, "wb") as f:
+            self.copy_changed_file_data(file_path, f)
+        else:
+          if only_changed_files:
+            continue
+          if not os.path.isdir(dir_name):
+            os.makedirs(dir_name)
+          
+          # Need to avoid reading enormous files all at once
+          with open(out_file_path, "wb") as f:
+            self.copy_changed_file_data(file_path, f)
+        
+        files_done += 1
+        yield(file_path, files_done)
+    finally:
+      self.copy_buffer = None
   
-  def export_disc_to_iso_with_changed_files(self, output_file_path):
-    if os.path.realpath(self.iso_path) == os.path.realpath(output_file_path):
+  def export_disc_to_iso_with_changed_files(self, output_file_path, *, deduplicate_files=False, hash_workers=None,
+                                            as_ciso=False, ciso_block_size=CISO.DEFAULT_BLOCK_SIZE,
+                                            remove_output_if_stopped_early=False):
+    # If deduplicate_files is True, files with identical contents are only written to the ISO once, and
+    # all of their FST entries point to that same data. See deduplicated_files and bytes_saved_by_deduplication
+    # for what was saved.
+    # If as_ciso is True, the disc is written as a CISO image, with blocks that are entirely empty left out.
+    # If the generator is closed before it finishes, the partially written output is closed and left as it is, unless
+    # remove_output_if_stopped_early is True, in which case it's removed. The async version always removes it.
+    if self.iso_path is not None and os.path.realpath(self.iso_path) == os.path.realpath(output_file_path):
       raise Exception("Input ISO path and output ISO path are the same. Aborting.")
     
     self.output_iso = open(output_file_path, "wb")
+    if as_ciso:
+      self.output_iso = CISOWriter(self.output_iso, block_size=ciso_block_size)
     try:
       self.export_system_data_to_iso()
       yield("sys/main.dol", 5) # 5 system files
       
-      for next_progress_text, files_done in self.export_filesystem_to_iso():
+      for next_progress_text, files_done in self.export_filesystem_to_iso(deduplicate_files, hash_workers):
         yield(next_progress_text, 5+files_done)
       
       self.align_output_iso_to_nearest(2048)
@@ -338,6 +640,67 @@ class GCM:
       self.output_iso = None
       os.remove(output_file_path)
       raise
+    except GeneratorExit:
+      # The export was stopped early without finishing, so the output is incomplete.
+      self.output_iso.close()
+      self.output_iso = None
+      if remove_output_if_stopped_early:
+        os.remove(output_file_path)
+      raise
+    finally:
+      self.copy_buffer = None
+  
+  async def aexport_disc_to_iso_with_changed_files(self, output_file_path, *, executor=None, **kwargs):
+    # Async version of export_disc_to_iso_with_changed_files. The export runs in the executor (the event loop's default
+    # executor if None), and progress is yielded as an async iterator.
+    # If the task is cancelled, the partially written ISO is removed once the step that was in progress finishes.
+    export = self.export_disc_to_iso_with_changed_files(output_file_path, remove_output_if_stopped_early=True, **kwargs)
+    async for progress in iterate_in_executor(export, executor):
+      yield progress
+  
+  async def aexport_disc_to_folder_with_changed_files(self, output_folder_path, *, executor=None, **kwargs):
+    # Async version of export_disc_to_folder_with_changed_files.
+    async for progress in iterate_in_executor(self.export_disc_to_folder_with_changed_files(output_folder_path, **kwargs), executor):
+      yield progress
+  
+  def get_copy_buffer(self, size_needed) -> memoryview:
+    # Returns a view of the reused copy buffer that is at most max_buffer_bytes long.
+    # The buffer only grows when a larger file than any copied before needs it, up to max_buffer_bytes.
+    buffer_size = max(min(size_needed, self.max_buffer_bytes), 1)
+    if self.copy_buffer is None or len(self.copy_buffer) < buffer_size:
+      # Drop the old buffer first so both aren't allocated at the same time.
+      self.copy_buffer = None
+      self.copy_buffer = bytearray(buffer_size)
+      self.peak_buffer_bytes = max(self.peak_buffer_bytes, buffer_size)
+    return memoryview(self.copy_buffer)[:min(len(self.copy_buffer), self.max_buffer_bytes)]
+  
+  def copy_changed_file_data(self, file_path, output_file: BinaryIO):
+    # Writes the file's data to the current position of output_file, without ever holding more than max_buffer_bytes
+    # of it in memory.
+    file_size = self.get_changed_file_size(file_path)
+    buffer = self.get_copy_buffer(file_size)
+    
+    if file_path in self.changed_files:
+      file_data = self.changed_files[file_path]
+      file_data.seek(0)
+      self.copy_data_through_buffer(file_data, output_file, file_size, buffer)
+      return
+    
+    file_entry = self.files_by_path_lowercase[file_path.lower()]
+    with self.open_iso() as iso_file:
+      iso_file.seek(file_entry.file_data_offset)
+      self.copy_data_through_buffer(iso_file, output_file, file_size, buffer)
+  
+  @staticmethod
+  def copy_data_through_buffer(input_file: BinaryIO, output_file: BinaryIO, size: int, buffer: memoryview):
+    size_remaining = size
+    while size_remaining > 0:
+      chunk = buffer[:min(size_remaining, len(buffer))]
+      size_read = input_file.readinto(chunk)
+      if not size_read:
+        raise Exception("Unexpected end of file data while copying. Expected 0x%X more bytes." % size_remaining)
+      output_file.write(chunk[:size_read])
+      size_remaining -= size_read
   
   def get_changed_file_data(self, file_path):
     if file_path in self.changed_files:
@@ -502,10 +865,8 @@ class GCM:
     self.align_output_iso_to_nearest(0x100)
     
     dol_offset = self.output_iso.tell()
-    dol_data = self.get_changed_file_data("sys/main.dol")
-    dol_size = fs.data_len(dol_data)
-    dol_data.seek(0)
-    self.output_iso.write(dol_data.read())
+    dol_size = self.get_changed_file_size("sys/main.dol")
+    self.copy_changed_file_data("sys/main.dol", self.output_iso)
     fs.write_u32(self.output_iso, 0x420, dol_offset)
     self.output_iso.seek(dol_offset + dol_size)
     
@@ -564,7 +925,32 @@ class GCM:
       
       curr_file_entry.next_fst_index = len(self.file_entries)
   
-  def export_filesystem_to_iso(self):
+  def get_duplicate_file_hashes(self, file_entries: list['GCMFileEntry'], hash_workers=None) -> dict[str, str]:
+    # Returns a content hash for every file that has the same size as at least one other file.
+    # Files with a unique size can't have duplicates, so they don't need to be read and hashed at all.
+    file_paths_by_size = defaultdict(list)
+    for file_entry in file_entries:
+      file_size = self.get_changed_file_size(file_entry.file_path)
+      if file_size > 0:
+        file_paths_by_size[file_size].append(file_entry.file_path)
+    
+    file_paths_to_hash = [
+      file_path
+      for file_paths in file_paths_by_size.values() if len(file_paths) > 1
+      for file_path in file_paths
+    ]
+    
+    hash_workers = self.get_num_hash_workers(hash_workers)
+    chunk_size = self.get_hash_chunk_size(hash_workers)
+    def hash_file(file_path):
+      return self.hash_changed_file_data(file_path, "sha256", chunk_size)
+    
+    # Threads are enough here, as the reads and the hashing of large buffers both release the GIL.
+    with ThreadPoolExecutor(max_workers=hash_workers) as executor:
+      file_hashes = executor.map(hash_file, file_paths_to_hash)
+      return dict(zip(file_paths_to_hash, file_hashes))
+  
+  def export_filesystem_to_iso(self, deduplicate_files=False, hash_workers=None):
     # Updates file offsets and sizes in the FST, and writes the files to the ISO.
     
     file_data_start_offset = self.fst_offset + self.fst_size
@@ -579,30 +965,41 @@ class GCM:
     ]
     file_entries_by_data_order.sort(key=lambda fe: fe.file_data_offset)
     
+    self.deduplicated_files = {}
+    self.bytes_saved_by_deduplication = 0
+    file_hashes = {}
+    if deduplicate_files:
+      file_hashes = self.get_duplicate_file_hashes(file_entries_by_data_order, hash_workers)
+    written_files_by_hash: dict[str, tuple[str, int]] = {}
+    
     files_done = 0
     
     for file_entry in file_entries_by_data_order:
       current_file_start_offset = self.output_iso.tell()
       
-      if file_entry.file_path in self.changed_files:
-        file_data = self.changed_files[file_entry.file_path]
-        file_data.seek(0)
-        self.output_iso.write(file_data.read())
-      else:
-        # Unchanged file.
-        # Most of the game's data falls into this category, so we read the data directly instead of calling read_file_data which would create a BytesIO object, which would add unnecessary performance overhead.
-        # Also, we need to read very large files in chunks to avoid running out of memory.
-        size_remaining = file_entry.file_size
-        offset_in_file = 0
-        while size_remaining > 0:
-          size_to_read = min(size_remaining, MAX_DATA_SIZE_TO_READ_AT_ONCE)
-          
-          with open(self.iso_path, "rb") as iso_file:
-            data = fs.read_bytes(iso_file, file_entry.file_data_offset + offset_in_file, size_to_read)
-          self.output_iso.write(data)
-          
-          size_remaining -= size_to_read
-          offset_in_file += size_to_read
+      file_hash = file_hashes.get(file_entry.file_path)
+      if file_hash in written_files_by_hash:
+        # Identical to a file that was already written, so point this file's entry at that data instead.
+        original_file_path, original_file_start_offset = written_files_by_hash[file_hash]
+        file_size = self.get_changed_file_size(file_entry.file_path)
+        file_entry_offset = self.fst_offset + file_entry.file_index*0xC
+        fs.write_u32(self.output_iso, file_entry_offset+4, original_file_start_offset)
+        fs.write_u32(self.output_iso, file_entry_offset+8, file_size)
+        self.output_iso.seek(current_file_start_offset)
+        
+        self.deduplicated_files[file_entry.file_path] = original_file_path
+        self.bytes_saved_by_deduplication += fs.pad_offset_to_nearest(file_size, 4)
+        
+        files_done += 1
+        yield(file_entry.file_path, files_done)
+        continue
+      if file_hash is not None:
+        written_files_by_hash[file_hash] = (file_entry.file_path, current_file_start_offset)
+      
+      # Unchanged files make up most of the game's data, so they are copied directly from the input ISO instead of
+      # calling read_file_data which would create a BytesIO object, which would add unnecessary performance overhead.
+      # Both changed and unchanged files are copied in chunks to avoid running out of memory on very large files.
+      self.copy_changed_file_data(file_entry.file_path, self.output_iso)
       
       file_entry_offset = self.fst_offset + file_entry.file_index*0xC
       fs.write_u32(self.output_iso, file_entry_offset+4, current_file_start_offset)
@@ -621,6 +1018,31 @@ class GCM:
       files_done += 1
       yield(file_entry.file_path, files_done)
 
+async def iterate_in_executor(generator, executor=None):
+  # Runs each step of a synchronous generator in an executor, yielding its values as an async iterator.
+  # If the iteration is cancelled or stopped early, the generator is closed once the step that was running in the
+  # executor has finished, so that it can clean up after itself.
+  loop = asyncio.get_running_loop()
+  done = object()
+  step = None
+  try:
+    while True:
+      step = loop.run_in_executor(executor, next, generator, done)
+      # Shielded so that cancelling the iteration doesn't cancel the future for the step that's still running.
+      value = await asyncio.shield(step)
+      step = None
+      if value is done:
+        break
+      yield value
+  finally:
+    if step is not None:
+      # A generator can't be closed while it's still running in another thread, so wait for the step to end first.
+      try:
+        await step
+      except BaseException:
+        pass
+    await loop.run_in_executor(executor, generator.close)
+
 class GCMBaseFile:
   def __init__(self):
     self.file_index = None
@@ -634,13 +1056,13 @@ class GCMBaseFile:
     self.is_dir = False
     self.is_system_file = False
   
-  def read(self, file_index, iso_file, file_entry_offset, fnt_offset):
+  def read(self, file_index, iso_file, file_entry_offset, fnt_offset, name_string_cache=None):
     pass
 
 class GCMFileEntry(GCMBaseFile):
   file_path: str
   
-  def read(self, file_index, iso_file, file_entry_offset, fnt_offset):
+  def read(self, file_index, iso_file, file_entry_offset, fnt_offset, name_string_cache=None):
     self.file_index = file_index
     
     is_dir_and_name_offset = fs.read_u32(iso_file, file_entry_offset)
@@ -663,7 +1085,7 @@ class GCMFileEntry(GCMBaseFile):
     if file_index == 0:
       self.name = "" # Root
     else:
-      self.name = fs.read_str_until_null_character(iso_file, fnt_offset + self.name_offset)
+      self.name = fs.read_str_until_null_character(iso_file, fnt_offset + self.name_offset, name_string_cache)
 
 class GCMSystemFile(GCMBaseFile):
   def __init__(self, file_data_offset, file_size, name):
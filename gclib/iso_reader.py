@@ -0,0 +1,147 @@
+import abc
+import io
+import os
+import threading
+from typing import BinaryIO
+
+from gclib import fs_helpers as fs
+
+class ISOReader(abc.ABC):
+  """Where a GCM reads its disc image from.
+  
+  Each call to open() must return a new independent readable and seekable binary file, positioned
+  anywhere, that the caller will close when it is done. GCM may have several of them open at once
+  from different threads.
+  """
+  
+  @abc.abstractmethod
+  def open(self) -> BinaryIO:
+    ...
+  
+  def get_path(self) -> str | None:
+    # The path of the file on disk containing the image, if there is one.
+    return None
+  
+  @staticmethod
+  def from_source(source: 'ISOReader | str | os.PathLike | bytes | bytearray | memoryview | BinaryIO',
+                  offset=0, size=None) -> 'ISOReader':
+    # Creates the appropriate reader for a disc image path, bytes-like buffer (including mmaps), or
+    # open binary file. If offset or size are given, the image is that subrange of the source.
+    if isinstance(source, ISOReader):
+      assert offset == 0 and size is None, "Cannot take a subrange of an existing ISOReader."
+      return source
+    elif isinstance(source, (str, os.PathLike)):
+      return PathISOReader(source, offset, size)
+    elif hasattr(source, "read") and hasattr(source, "seek"):
+      # Objects like mmaps are both files and buffers. Reading them as buffers is faster and doesn't share their position.
+      try:
+        return BufferISOReader(memoryview(source), offset, size)
+      except TypeError:
+        return StreamISOReader(source, offset, size)
+    else:
+      return BufferISOReader(memoryview(source), offset, size)
+
+class PathISOReader(ISOReader):
+  def __init__(self, path: str | os.PathLike, offset=0, size=None):
+    self.path = path
+    self.offset = offset
+    self.size = size
+  
+  def open(self) -> BinaryIO:
+    file = open(self.path, "rb")
+    if self.offset == 0 and self.size is None:
+      return file
+    return StreamView(file, self.offset, self.size, close_stream=True)
+  
+  def get_path(self) -> str | None:
+    return os.fspath(self.path)
+
+class BufferISOReader(ISOReader):
+  def __init__(self, buffer: memoryview, offset=0, size=None):
+    buffer = buffer.cast("B")
+    if size is None:
+      size = len(buffer) - offset
+    self.buffer = buffer[offset:offset+size]
+  
+  def open(self) -> BinaryIO:
+    return fs.BinaryView(self.buffer)
+
+class StreamISOReader(ISOReader):
+  """Reads from a single binary file that was already opened by the caller.
+  
+  As the stream only has one position, every read seeks to the position of the view it came from
+  while holding a lock, so views can be used from multiple threads. The stream is never closed by
+  GCM.
+  """
+  
+  def __init__(self, stream: BinaryIO, offset=0, size=None):
+    self.stream = stream
+    self.offset = offset
+    self.size = size
+    self.lock = threading.Lock()
+  
+  def open(self) -> BinaryIO:
+    return StreamView(self.stream, self.offset, self.size, lock=self.lock)
+
+class StreamView(io.RawIOBase):
+  """A read-only file over a subrange of another binary file, with its own independent position."""
+  
+  def __init__(self, stream: BinaryIO, offset=0, size=None, *, lock: 'threading.Lock | None' = None, close_stream=False):
+    self.stream = stream
+    self.offset = offset
+    if size is None:
+      if lock is None:
+        size = stream.seek(0, io.SEEK_END) - offset
+      else:
+        with lock:
+          size = stream.seek(0, io.SEEK_END) - offset
+    self.size = size
+    self.lock = lock
+    self.close_stream = close_stream
+    self.position = 0
+  
+  def readable(self):
+    return True
+  
+  def seekable(self):
+    return True
+  
+  def tell(self):
+    return self.position
+  
+  def seek(self, offset, whence=io.SEEK_SET):
+    if whence == io.SEEK_SET:
+      self.position = offset
+    elif whence == io.SEEK_CUR:
+      self.position += offset
+    elif whence == io.SEEK_END:
+      self.position = self.size + offset
+    else:
+      raise ValueError(f"Invalid whence: {whence}")
+    return self.position
+  
+  def readinto(self, buffer):
+    size_to_read = max(0, min(len(buffer), self.size - self.position))
+    buffer = memoryview(buffer).cast("B")[:size_to_read]
+    if self.lock is None:
+      size_read = self.read_from_stream(buffer)
+    else:
+      with self.lock:
+        size_read = self.read_from_stream(buffer)
+    self.position += size_read
+    return size_read
+  
+  def read_from_stream(self, buffer: memoryview) -> int:
+    self.stream.seek(self.offset + self.position)
+    size_read = 0
+    while size_read < len(buffer):
+      chunk_size_read = self.stream.readinto(buffer[size_read:])
+      if not chunk_size_read:
+        break
+      size_read += chunk_size_read
+    return size_read
+  
+  def close(self):
+    if not self.closed and self.close_stream:
+      self.stream.close()
+    super().close()
@@ -129,31 +129,33 @@ class J3D(GCLibFile):
     if self.mdl3 is not None:
       self.mdl3.generate_from_mat3(self.mat3, self.tex1)
     
-    # Cut off the chunk data first since we're replacing this data entirely.
-    data.truncate(0x20)
-    data.seek(0x20)
+    # Keep the header, but replace the chunk data entirely.
+    # The whole file is built in a writer and then copied into data at once.
+    writer = fs.BinaryWriter(fs.read_bytes(data, 0, 0x20))
+    writer.ensure_size(0x20)
     
     for chunk in self.chunks:
       if only_chunks is None or chunk.magic in only_chunks:
         chunk.save()
       
-      data.write(fs.read_all_bytes(chunk.data))
+      writer.append_bytes(fs.read_all_bytes(chunk.data))
     
     if self.bck_sound_data is not None:
-      self.bck_sound_data_offset = fs.data_len(data)
-      fs.write_bytes(data, self.bck_sound_data_offset, self.bck_sound_data)
+      self.bck_sound_data_offset = writer.append_bytes(self.bck_sound_data)
       
       # Pad the size of the whole file to the next 0x20 bytes.
-      fs.align_data_to_nearest(data, 0x20, padding_bytes=b'\0')
+      writer.align_to_nearest(0x20, padding_bytes=b'\0')
     
-    self.length = fs.data_len(data)
+    self.length = writer.data_len()
     self.num_chunks = len(self.chunks)
     
-    fs.write_magic_str(data, 0, self.magic, 4)
-    fs.write_magic_str(data, 4, self.file_type, 4)
-    fs.write_u32(data, 8, self.length)
-    fs.write_u32(data, 0xC, self.num_chunks)
-    fs.write_u32(data, 0x1C, self.bck_sound_data_offset)
+    writer.write_magic_str(0, self.magic, 4)
+    writer.write_magic_str(4, self.file_type, 4)
+    writer.write_u32(8, self.length)
+    writer.write_u32(0xC, self.num_chunks)
+    writer.write_u32(0x1C, self.bck_sound_data_offset)
+    
+    writer.write_to(data)
 
 class BMD(J3D):
   KNOWN_MAGICS = ["J3D2"]
@@ -5,7 +5,7 @@ from gclib.jchunk import JChunk
 from gclib.bunfoe import bunfoe, field, BUNFOE
 from gclib.bunfoe_types import Vec3float, Vec3u16Rot
 
-@bunfoe
+@bunfoe(slots=True)
 class Joint(BUNFOE):
   DATA_SIZE = 0x40
   
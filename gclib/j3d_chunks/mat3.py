@@ -10,14 +10,14 @@ from gclib.bunfoe_types import Vec2float, Vec3float, Matrix2x3, Matrix4x4, RGBAu
 from gclib.jchunk import JChunk
 import gclib.gx_enums as GX
 
-@bunfoe
+@bunfoe(slots=True)
 class ZMode(BUNFOE):
   depth_test : bool           = True
   depth_func : GX.CompareType = GX.CompareType.Less_Equal
   depth_write: bool           = True
   _padding_1 : u8             = field(default=0xFF, assert_default=True)
 
-@bunfoe
+@bunfoe(slots=True)
 class ColorChannel(BUNFOE):
   lighting_enabled    : bool                   = True
   mat_color_src       : GX.ColorSrc            = GX.ColorSrc.Register
@@ -28,7 +28,7 @@ class ColorChannel(BUNFOE):
   ambient_color_src   : GX.ColorSrc            = GX.ColorSrc.Register
   _padding            : u16                    = field(default=0xFFFF, assert_default=True)
 
-@bunfoe
+@bunfoe(slots=True)
 class AlphaCompare(BUNFOE):
   comp0    : GX.CompareType = GX.CompareType.Greater_Equal
   ref0     : u8             = 128
@@ -37,29 +37,29 @@ class AlphaCompare(BUNFOE):
   ref1     : u8             = 255
   _padding : u24            = field(default=0xFFFFFF, assert_default=True)
 
-@bunfoe
+@bunfoe(slots=True)
 class BlendMode(BUNFOE):
   mode              : GX.BlendMode
   source_factor     : GX.BlendFactor
   destination_factor: GX.BlendFactor
   logic_op          : GX.LogicOp
 
-@bunfoe
+@bunfoe(slots=True)
 class TevKonstColorSel(BUNFOE):
   value: GX.KonstColorSel = GX.KonstColorSel.K0
 
-@bunfoe
+@bunfoe(slots=True)
 class TevKonstAlphaSel(BUNFOE):
   value: GX.KonstAlphaSel = GX.KonstAlphaSel.K0_A
 
-@bunfoe
+@bunfoe(slots=True)
 class TevOrder(BUNFOE):
   tex_coord_id: GX.TexCoordID     = GX.TexCoordID.TEXCOORD0
   tex_map_id  : GX.TexMapID       = GX.TexMapID.TEXMAP0
   channel_id  : GX.ColorChannelID = GX.ColorChannelID.COLOR_NULL
   _padding    : u8                = field(default=0xFF, assert_default=True)
 
-@bunfoe
+@bunfoe(slots=True)
 class TevStage(BUNFOE):
   tev_mode    : u8              = 0xFF
   color_in_a  : GX.CombineColor = GX.CombineColor.C0
@@ -82,7 +82,7 @@ class TevStage(BUNFOE):
   alpha_reg_id: GX.Register     = GX.Register.PREV
   _padding_1  : u8              = field(default=0xFF, assert_default=True)
 
-@bunfoe
+@bunfoe(slots=True)
 class TexCoord(BUNFOE):
   type_           : GX.TexGenType   = GX.TexGenType.MTX2x4
   source          : GX.TexGenSrc    = GX.TexGenSrc.TEX0
@@ -107,7 +107,7 @@ class TexMtxMapMode(u8, Enum):
   EnvmapOldEffectMtx = 0x0A
   EnvmapEffectMtx    = 0x0B
 
-@bunfoe
+@bunfoe(slots=True)
 class TexMatrix(BUNFOE):
   DATA_SIZE = 0x64
   
@@ -124,20 +124,20 @@ class TexMatrix(BUNFOE):
   translation  : Vec2float        = field(default_factory=Vec2float)
   effect_matrix: Matrix4x4        = field(default_factory=Matrix4x4)
 
-@bunfoe
+@bunfoe(slots=True)
 class TevSwapMode(BUNFOE):
   ras_sel   : u8  = 0
   tex_sel   : u8  = 0
   _padding_1: u16 = field(default=0xFFFF, assert_default=True)
 
-@bunfoe
+@bunfoe(slots=True)
 class TevSwapModeTable(BUNFOE):
   r: u8 = 0
   g: u8 = 1
   b: u8 = 2
   a: u8 = 3
 
-@bunfoe
+@bunfoe(slots=True)
 class FogInfo(BUNFOE):
   DATA_SIZE = 0x2C
   
@@ -152,13 +152,13 @@ class FogInfo(BUNFOE):
   color            : RGBAu8
   range_adjustments: list[u16]  = field(length=10)
 
-@bunfoe
+@bunfoe(slots=True)
 class NBTScale(BUNFOE):
   enable  : bool
   _padding: u24 = field(default=0xFFFFFF, assert_default=True)
   scale   : Vec3float
 
-@bunfoe
+@bunfoe(slots=True)
 class Material(BUNFOE):
   DATA_SIZE = 0x14C
   
@@ -278,25 +278,25 @@ class Material(BUNFOE):
     
     return offset
 
-@bunfoe
+@bunfoe(slots=True)
 class IndirectTevOrder(BUNFOE): 
   tex_coord_id: GX.TexCoordID = GX.TexCoordID.TEXCOORD_NULL
   tex_map_id  : GX.TexMapID   = GX.TexMapID.TEXMAP_NULL
   _padding_1  : u16           = field(default=0xFFFF, assert_default=True)
 
-@bunfoe
+@bunfoe(slots=True)
 class IndirectTexMatrix(BUNFOE):
   matrix        : Matrix2x3 = field(default_factory=Matrix2x3)
   scale_exponent: s8        = 1
   _padding      : u24       = field(default=0xFFFFFF, assert_default=True)
 
-@bunfoe
+@bunfoe(slots=True)
 class IndirectTexScale(BUNFOE):
   scale_s : GX.IndirectTexScale = GX.IndirectTexScale._1
   scale_t : GX.IndirectTexScale = GX.IndirectTexScale._1
   _padding: u16                 = field(default=0xFFFF, assert_default=True)
 
-@bunfoe
+@bunfoe(slots=True)
 class IndirectTevStage(BUNFOE):
   tev_stage: GX.IndTexStageID
   format   : GX.IndTexFormat
@@ -309,7 +309,7 @@ class IndirectTevStage(BUNFOE):
   alpha_sel: GX.IndTexAlphaSel
   _padding : u24 = 0xFFFFFF
 
-@bunfoe
+@bunfoe(slots=True)
 class TextureIndirect(BUNFOE):
   DATA_SIZE = 0x138
   
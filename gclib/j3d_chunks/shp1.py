@@ -12,7 +12,7 @@ class ShapeMatrixType(u8, Enum):
   Y_Billboard   = 0x02
   Multi_Matrix  = 0x03
 
-@bunfoe
+@bunfoe(slots=True)
 class Shape(BUNFOE):
   DATA_SIZE = 0x28
   
@@ -1,5 +1,6 @@
 
 from gclib import fs_helpers as fs
+from gclib.fs_helpers import s16
 from gclib.jchunk import JChunk
 from gclib.animation import Animation, AnimationTrack, LoopMode
 
@@ -75,38 +76,14 @@ class TRK1(JChunk):
     reg_mat_names = self.read_string_table(reg_mat_names_table_offset)
     konst_mat_names = self.read_string_table(konst_mat_names_table_offset)
     
-    reg_r_track_data = []
-    for i in range(reg_r_count):
-      r = fs.read_s16(self.data, reg_r_offset+i*2)
-      reg_r_track_data.append(r)
-    reg_g_track_data = []
-    for i in range(reg_g_count):
-      g = fs.read_s16(self.data, reg_g_offset+i*2)
-      reg_g_track_data.append(g)
-    reg_b_track_data = []
-    for i in range(reg_b_count):
-      b = fs.read_s16(self.data, reg_b_offset+i*2)
-      reg_b_track_data.append(b)
-    reg_a_track_data = []
-    for i in range(reg_a_count):
-      a = fs.read_s16(self.data, reg_a_offset+i*2)
-      reg_a_track_data.append(a)
-    konst_r_track_data = []
-    for i in range(konst_r_count):
-      r = fs.read_s16(self.data, konst_r_offset+i*2)
-      konst_r_track_data.append(r)
-    konst_g_track_data = []
-    for i in range(konst_g_count):
-      g = fs.read_s16(self.data, konst_g_offset+i*2)
-      konst_g_track_data.append(g)
-    konst_b_track_data = []
-    for i in range(konst_b_count):
-      b = fs.read_s16(self.data, konst_b_offset+i*2)
-      konst_b_track_data.append(b)
-    konst_a_track_data = []
-    for i in range(konst_a_count):
-      a = fs.read_s16(self.data, konst_a_offset+i*2)
-      konst_a_track_data.append(a)
+    reg_r_track_data = fs.read_array(self.data, reg_r_offset, reg_r_count, s16).tolist()
+    reg_g_track_data = fs.read_array(self.data, reg_g_offset, reg_g_count, s16).tolist()
+    reg_b_track_data = fs.read_array(self.data, reg_b_offset, reg_b_count, s16).tolist()
+    reg_a_track_data = fs.read_array(self.data, reg_a_offset, reg_a_count, s16).tolist()
+    konst_r_track_data = fs.read_array(self.data, konst_r_offset, konst_r_count, s16).tolist()
+    konst_g_track_data = fs.read_array(self.data, konst_g_offset, konst_g_count, s16).tolist()
+    konst_b_track_data = fs.read_array(self.data, konst_b_offset, konst_b_count, s16).tolist()
+    konst_a_track_data = fs.read_array(self.data, konst_a_offset, konst_a_count, s16).tolist()
     
     reg_animations = []
     konst_animations = []
@@ -193,72 +170,64 @@ class TRK1(JChunk):
     reg_r_offset = offset
     if not reg_r_track_data:
       reg_r_offset = 0
-    for r in reg_r_track_data:
-      fs.write_s16(self.data, offset, r)
-      offset += 2
+    fs.write_array(self.data, offset, reg_r_track_data, s16)
+    offset += len(reg_r_track_data)*2
     
     fs.align_data_to_nearest(self.data, 4)
     offset = self.data.tell()
     reg_g_offset = offset
     if not reg_g_track_data:
       reg_g_offset = 0
-    for g in reg_g_track_data:
-      fs.write_s16(self.data, offset, g)
-      offset += 2
+    fs.write_array(self.data, offset, reg_g_track_data, s16)
+    offset += len(reg_g_track_data)*2
     
     fs.align_data_to_nearest(self.data, 4)
     offset = self.data.tell()
     reg_b_offset = offset
     if not reg_b_track_data:
       reg_b_offset = 0
-    for b in reg_b_track_data:
-      fs.write_s16(self.data, offset, b)
-      offset += 2
+    fs.write_array(self.data, offset, reg_b_track_data, s16)
+    offset += len(reg_b_track_data)*2
     
     fs.align_data_to_nearest(self.data, 4)
     offset = self.data.tell()
     reg_a_offset = offset
     if not reg_a_track_data:
       reg_a_offset = 0
-    for a in reg_a_track_data:
-      fs.write_s16(self.data, offset, a)
-      offset += 2
+    fs.write_array(self.data, offset, reg_a_track_data, s16)
+    offset += len(reg_a_track_data)*2
     
     fs.align_data_to_nearest(self.data, 4)
     offset = self.data.tell()
     konst_r_offset = offset
     if not konst_r_track_data:
       konst_r_offset = 0
-    for r in konst_r_track_data:
-      fs.write_s16(self.data, offset, r)
-      offset += 2
+    fs.write_array(self.data, offset, konst_r_track_data, s16)
+    offset += len(konst_r_track_data)*2
     
     fs.align_data_to_nearest(self.data, 4)
     offset = self.data.tell()
     konst_g_offset = offset
     if not konst_g_track_data:
       konst_g_offset = 0
-    for g in konst_g_track_data:
-      fs.write_s16(self.data, offset, g)
-      offset += 2
+    fs.write_array(self.data, offset, konst_g_track_data, s16)
+    offset += len(konst_g_track_data)*2
     
     fs.align_data_to_nearest(self.data, 4)
     offset = self.data.tell()
     konst_b_offset = offset
     if not konst_b_track_data:
       konst_b_offset = 0
-    for b in konst_b_track_data:
-      fs.write_s16(self.data, offset, b)
-      offset += 2
+    fs.write_array(self.data, offset, konst_b_track_data, s16)
+    offset += len(konst_b_track_data)*2
     
     fs.align_data_to_nearest(self.data, 4)
     offset = self.data.tell()
     konst_a_offset = offset
     if not konst_a_track_data:
       konst_a_offset = 0
-    for a in konst_a_track_data:
-      fs.write_s16(self.data, offset, a)
-      offset += 2
+    fs.write_array(self.data, offset, konst_a_track_data, s16)
+    offset += len(konst_a_track_data)*2
     
     fs.align_data_to_nearest(self.data, 4)
     offset = self.data.tell()
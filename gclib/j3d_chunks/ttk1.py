@@ -1,6 +1,7 @@
 from enum import Enum
 
 from gclib import fs_helpers as fs
+from gclib.fs_helpers import s16
 from gclib.jchunk import JChunk
 from gclib.animation import Animation, AnimationTrack, LoopMode
 
@@ -90,18 +91,9 @@ class TTK1(JChunk):
       center_t = fs.read_float(self.data, center_coord_table_offset+i*0xC+4)
       center_q = fs.read_float(self.data, center_coord_table_offset+i*0xC+8)
       center_coords_data.append((center_s, center_t, center_q))
-    scale_track_data = []
-    for i in range(scale_table_count):
-      scale = fs.read_float(self.data, scale_table_offset+i*4)
-      scale_track_data.append(scale)
-    rotation_track_data = []
-    for i in range(rotation_table_count):
-      rotation = fs.read_s16(self.data, rotation_table_offset+i*2)
-      rotation_track_data.append(rotation)
-    translation_track_data = []
-    for i in range(translation_table_count):
-      translation = fs.read_float(self.data, translation_table_offset+i*4)
-      translation_track_data.append(translation)
+    scale_track_data = fs.read_array(self.data, scale_table_offset, scale_table_count, float).tolist()
+    rotation_track_data = fs.read_array(self.data, rotation_table_offset, rotation_table_count, s16).tolist()
+    translation_track_data = fs.read_array(self.data, translation_table_offset, translation_table_count, float).tolist()
     
     animations = []
     self.mat_name_to_anims = {}
@@ -191,27 +183,24 @@ class TTK1(JChunk):
     scale_table_offset = offset
     if not scale_track_data:
       scale_table_offset = 0
-    for scale in scale_track_data:
-      fs.write_float(self.data, offset, scale)
-      offset += 4
+    fs.write_array(self.data, offset, scale_track_data, float)
+    offset += len(scale_track_data)*4
     
     fs.align_data_to_nearest(self.data, 4)
     offset = self.data.tell()
     rotation_table_offset = offset
     if not rotation_track_data:
       rotation_table_offset = 0
-    for rotation in rotation_track_data:
-      fs.write_s16(self.data, offset, rotation)
-      offset += 2
+    fs.write_array(self.data, offset, rotation_track_data, s16)
+    offset += len(rotation_track_data)*2
     
     fs.align_data_to_nearest(self.data, 4)
     offset = self.data.tell()
     translation_table_offset = offset
     if not translation_track_data:
       translation_table_offset = 0
-    for translation in translation_track_data:
-      fs.write_float(self.data, offset, translation)
-      offset += 4
+    fs.write_array(self.data, offset, translation_track_data, float)
+    offset += len(translation_track_data)*4
     
     
     # Write the header.
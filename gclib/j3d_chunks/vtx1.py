@@ -1,5 +1,7 @@
 from enum import IntEnum
 
+import numpy as np
+
 from gclib import fs_helpers as fs
 from gclib.fs_helpers import u32, u24, u16, u8, s32, s16, s8, u16Rot, FixedStr, MagicStr
 from gclib.jchunk import JChunk
@@ -53,7 +55,20 @@ GXComponentType_TO_COLOR_COMPONENT_BYTE_SIZE = {
   GX.ComponentType.RGBA8 : 1,
 }
 
-@bunfoe
+GXComponentType_TO_NUMBER_COMPONENT_PRIMITIVE_TYPE = {
+  GX.ComponentType.Unsigned8 : u8,
+  GX.ComponentType.Signed8   : s8,
+  GX.ComponentType.Unsigned16: u16,
+  GX.ComponentType.Signed16  : s16,
+  GX.ComponentType.Float32   : float,
+}
+
+# Only RGBA8 colors are currently supported.
+GXComponentType_TO_COLOR_COMPONENT_PRIMITIVE_TYPE = {
+  GX.ComponentType.RGBA8 : u8,
+}
+
+@bunfoe(slots=True)
 class VertexFormat(BUNFOE):
   DATA_SIZE = 0x10
   
@@ -190,46 +205,26 @@ class VTX1(JChunk):
   def load_attribute_list(self, vtxfmt: VertexFormat):
     data_offset = self.vertex_data_offsets[vtxfmt.data_offset_index]
     attrib_count = self.get_attribute_data_count(vtxfmt.data_offset_index, vtxfmt.component_count, vtxfmt.component_size)
-    attr_data = []
-    for i in range(0, attrib_count):
-      components = self.read_components(vtxfmt, data_offset)
-      attr_data.append(components)
-      data_offset += vtxfmt.component_count * vtxfmt.component_size
-    return attr_data
-  
-  def read_components(self, vtxfmt: VertexFormat, data_offset):
-    divisor = (1 << vtxfmt.component_shift)
-    components = []
-    for i in range(vtxfmt.component_count):
-      if vtxfmt.is_color_attr:
-        component = self.read_color_component(vtxfmt.component_type, data_offset, divisor)
-      else:
-        component = self.read_number_component(vtxfmt.component_type, data_offset, divisor)
-      components.append(component)
-      data_offset += vtxfmt.component_size
-    return tuple(components)
+    if attrib_count <= 0:
+      return []
+    
+    # The components of every entry are all read at once.
+    component_type, divisor = self.get_component_type_and_divisor(vtxfmt)
+    values = fs.read_array(self.data, data_offset, attrib_count*vtxfmt.component_count, component_type)
+    values = values.astype(np.float64) / divisor
+    return [tuple(components) for components in values.reshape(attrib_count, vtxfmt.component_count).tolist()]
   
-  def read_number_component(self, comp_type: GX.ComponentType, data_offset, divisor):
-    match comp_type:
-      case GX.ComponentType.Unsigned8:
-        return fs.read_u8(self.data, data_offset) / divisor
-      case GX.ComponentType.Signed8:
-        return fs.read_s8(self.data, data_offset) / divisor
-      case GX.ComponentType.Unsigned16:
-        return fs.read_u16(self.data, data_offset) / divisor
-      case GX.ComponentType.Signed16:
-        return fs.read_s16(self.data, data_offset) / divisor
-      case GX.ComponentType.Float32:
-        return fs.read_float(self.data, data_offset) / divisor
-      case _:
+  def get_component_type_and_divisor(self, vtxfmt: VertexFormat) -> tuple[type, int]:
+    # Returns the primitive type each component is stored as, and what the stored values are divided by to get the
+    # actual values.
+    if vtxfmt.is_color_attr:
+      if vtxfmt.component_type not in GXComponentType_TO_COLOR_COMPONENT_PRIMITIVE_TYPE:
         raise NotImplementedError
-  
-  def read_color_component(self, comp_type: GX.ComponentType, data_offset, divisor):
-    match comp_type:
-      case GX.ComponentType.RGBA8:
-        return fs.read_u8(self.data, data_offset) / 255
-      case _:
+      return GXComponentType_TO_COLOR_COMPONENT_PRIMITIVE_TYPE[vtxfmt.component_type], 255
+    else:
+      if vtxfmt.component_type not in GXComponentType_TO_NUMBER_COMPONENT_PRIMITIVE_TYPE:
         raise NotImplementedError
+      return GXComponentType_TO_NUMBER_COMPONENT_PRIMITIVE_TYPE[vtxfmt.component_type], (1 << vtxfmt.component_shift)
   
   def save_chunk_specific_data(self):
     # Cut off all the data, we're rewriting it entirely.
@@ -277,37 +272,13 @@ class VTX1(JChunk):
   def save_attribute_list(self, attr_data, vtxfmt: VertexFormat, data_offset):
     for components in attr_data:
       assert len(components) == vtxfmt.component_count
-      data_offset = self.save_components(vtxfmt, components, data_offset)
-    return data_offset
-  
-  def save_components(self, vtxfmt: VertexFormat, components, data_offset):
-    divisor = (1 << vtxfmt.component_shift)
-    for component in components:
-      if vtxfmt.is_color_attr:
-        self.save_color_component(vtxfmt.component_type, component, data_offset, divisor)
-      else:
-        self.save_number_component(vtxfmt.component_type, component, data_offset, divisor)
-      data_offset += vtxfmt.component_size
-    return data_offset
-  
-  def save_number_component(self, comp_type: GX.ComponentType, component, data_offset, divisor):
-    match comp_type:
-      case GX.ComponentType.Unsigned8:
-        fs.write_u8(self.data, data_offset, round(component*divisor))
-      case GX.ComponentType.Signed8:
-        fs.write_s8(self.data, data_offset, round(component*divisor))
-      case GX.ComponentType.Unsigned16:
-        fs.write_u16(self.data, data_offset, round(component*divisor))
-      case GX.ComponentType.Signed16:
-        fs.write_s16(self.data, data_offset, round(component*divisor))
-      case GX.ComponentType.Float32:
-        fs.write_float(self.data, data_offset, component*divisor)
-      case _:
-        raise NotImplementedError
-  
-  def save_color_component(self, comp_type: GX.ComponentType, component, data_offset, divisor):
-    match comp_type:
-      case GX.ComponentType.RGBA8:
-        fs.write_u8(self.data, data_offset, round(component*255))
-      case _:
-        raise NotImplementedError
+    if not attr_data:
+      return data_offset
+    
+    # The components of every entry are all written at once.
+    component_type, divisor = self.get_component_type_and_divisor(vtxfmt)
+    values = np.array(attr_data, dtype=np.float64).reshape(-1) * divisor
+    if component_type != float:
+      values = np.rint(values).astype(np.int64)
+    fs.write_array(self.data, data_offset, values, component_type)
+    return data_offset + len(values)*vtxfmt.component_size
@@ -199,15 +199,17 @@ class JPC:
     return (num_particles_added, num_particles_overwritten, num_textures_added, num_textures_overwritten)
   
   def save(self):
+    # Keep the header, but replace the particle list and texture list entirely.
+    # The whole file is built in a writer and then copied into self.data at once.
+    particle_list_offset = PARTICLE_LIST_OFFSET[self.version]
+    writer = fs.BinaryWriter(fs.read_bytes(self.data, 0, particle_list_offset))
+    writer.ensure_size(particle_list_offset)
+    
     self.num_particles = len(self.particles)
     self.num_textures = len(self.textures)
-    fs.write_magic_str(self.data, 0, self.magic, 8)
-    fs.write_u16(self.data, 8, self.num_particles)
-    fs.write_u16(self.data, 0xA, self.num_textures)
-    
-    # Cut off the particle list and texture list since we're replacing this data entirely.
-    self.data.truncate(PARTICLE_LIST_OFFSET[self.version])
-    self.data.seek(PARTICLE_LIST_OFFSET[self.version])
+    writer.write_magic_str(0, self.magic, 8)
+    writer.write_u16(8, self.num_particles)
+    writer.write_u16(0xA, self.num_textures)
     
     for particle in self.particles:
       # First regenerate this particle's TDB1 texture ID list based off the filenames.
@@ -218,25 +220,20 @@ class JPC:
       
       particle.save()
       
-      particle.data.seek(0)
-      particle_data = particle.data.read()
-      self.data.write(particle_data)
+      writer.append_bytes(fs.read_all_bytes(particle.data))
     
-    fs.align_data_to_nearest(self.data, 0x20, padding_bytes=b'\0')
-    
-    self.tex_offset = self.data.tell()
+    self.tex_offset = writer.align_to_nearest(0x20, padding_bytes=b'\0')
     if self.version == JPACVersion.JPAC2_10:
-      fs.write_u32(self.data, 0xC, self.tex_offset)
-    self.data.seek(self.tex_offset)
+      writer.write_u32(0xC, self.tex_offset)
     
     for texture in self.textures:
       texture.save()
       
-      texture.data.seek(0)
-      texture_data = texture.data.read()
-      self.data.write(texture_data)
+      writer.append_bytes(fs.read_all_bytes(texture.data))
+    
+    writer.align_to_nearest(0x20, padding_bytes=b'\0')
     
-    fs.align_data_to_nearest(self.data, 0x20, padding_bytes=b'\0')
+    writer.write_to(self.data)
 
 class JPC100(JPC):
   particles: list[JParticle100]
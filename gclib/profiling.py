@@ -0,0 +1,167 @@
+import inspect
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+from gclib import fs_helpers as fs
+
+# Modules whose frames are skipped over when working out who made a call, so that calls made on behalf of a format
+# module (for example by BUNFOE.read) are attributed to that format module instead.
+DEFAULT_SKIPPED_MODULES = ("gclib.fs_helpers", "gclib.bunfoe")
+
+@dataclass
+class IOCallStats:
+  count: int = 0
+  total_time_ns: int = 0
+
+class IOStats:
+  """Counts and times calls to the functions in fs_helpers, and the methods of BinaryView and
+  BinaryWriter, grouped by the module and function that made each call.
+  
+  Only the outermost call is recorded, so a BinaryWriter method that calls a function in fs_helpers
+  is counted once. Every function in fs_helpers that takes a file seeks before reading or writing
+  it, so their call counts are also the number of seeks made.
+  """
+  
+  def __init__(self, skipped_modules=DEFAULT_SKIPPED_MODULES):
+    self.skipped_modules = frozenset(skipped_modules)
+    # Keyed by (caller module, caller function, fs_helpers function).
+    self.calls: dict[tuple[str, str, str], IOCallStats] = {}
+    self.lock = threading.Lock()
+    self.thread_state = threading.local()
+  
+  def get_caller(self) -> tuple[str, str]:
+    frame = sys._getframe(2)
+    while frame is not None and frame.f_globals.get("__name__") in self.skipped_modules:
+      frame = frame.f_back
+    if frame is None:
+      return ("?", "?")
+    return (frame.f_globals.get("__name__", "?"), frame.f_code.co_qualname)
+  
+  def wrap(self, func, func_name: str):
+    def wrapper(*args, **kwargs):
+      if getattr(self.thread_state, "in_call", False):
+        return func(*args, **kwargs)
+      
+      caller_module, caller_func = self.get_caller()
+      self.thread_state.in_call = True
+      start_time = time.perf_counter_ns()
+      try:
+        return func(*args, **kwargs)
+      finally:
+        elapsed_time = time.perf_counter_ns() - start_time
+        self.thread_state.in_call = False
+        key = (caller_module, caller_func, func_name)
+        with self.lock:
+          call_stats = self.calls.get(key)
+          if call_stats is None:
+            call_stats = self.calls[key] = IOCallStats()
+          call_stats.count += 1
+          call_stats.total_time_ns += elapsed_time
+    
+    wrapper.__name__ = func.__name__
+    wrapper.__qualname__ = func.__qualname__
+    wrapper.__doc__ = func.__doc__
+    return wrapper
+  
+  @property
+  def total_calls(self) -> int:
+    return sum(call_stats.count for call_stats in self.calls.values())
+  
+  @property
+  def total_time_ns(self) -> int:
+    return sum(call_stats.total_time_ns for call_stats in self.calls.values())
+  
+  def get_totals(self, group_by_caller_func=True, group_by_fs_func=True) -> dict[tuple, IOCallStats]:
+    # Combines the stats into coarser groups. The caller module is always part of each group's key.
+    totals: dict[tuple, IOCallStats] = {}
+    for (caller_module, caller_func, fs_func), call_stats in self.calls.items():
+      key = (caller_module,)
+      if group_by_caller_func:
+        key += (caller_func,)
+      if group_by_fs_func:
+        key += (fs_func,)
+      group_stats = totals.setdefault(key, IOCallStats())
+      group_stats.count += call_stats.count
+      group_stats.total_time_ns += call_stats.total_time_ns
+    return totals
+  
+  def get_totals_by_module(self) -> dict[str, IOCallStats]:
+    totals = self.get_totals(group_by_caller_func=False, group_by_fs_func=False)
+    return {caller_module: call_stats for (caller_module,), call_stats in totals.items()}
+  
+  def report(self, limit: int | None = 30) -> str:
+    # Returns a table of the calls that took the most total time, preceded by the totals for each caller module.
+    lines = []
+    lines.append("%d fs_helpers calls, %.3f ms total" % (self.total_calls, self.total_time_ns / 1_000_000))
+    
+    lines.append("")
+    lines.append("%10s %12s  %s" % ("Calls", "Time (ms)", "Module"))
+    totals_by_module = self.get_totals_by_module()
+    for caller_module, call_stats in sorted(totals_by_module.items(), key=lambda item: -item[1].total_time_ns):
+      lines.append("%10d %12.3f  %s" % (call_stats.count, call_stats.total_time_ns / 1_000_000, caller_module))
+    
+    lines.append("")
+    lines.append("%10s %12s  %s" % ("Calls", "Time (ms)", "Caller -> fs_helpers function"))
+    sorted_calls = sorted(self.calls.items(), key=lambda item: -item[1].total_time_ns)
+    if limit is not None:
+      sorted_calls = sorted_calls[:limit]
+    for (caller_module, caller_func, fs_func), call_stats in sorted_calls:
+      lines.append("%10d %12.3f  %s.%s -> %s" % (
+        call_stats.count, call_stats.total_time_ns / 1_000_000,
+        caller_module, caller_func, fs_func,
+      ))
+    
+    return "\n".join(lines)
+
+def get_instrumentable_functions() -> list[tuple[object, str, str]]:
+  # Returns (owner, attribute name, display name) for every function and method that io_stats wraps.
+  targets = []
+  for name, value in list(vars(fs).items()):
+    if inspect.isfunction(value) and value.__module__ == fs.__name__:
+      targets.append((fs, name, name))
+  for cls in [fs.BinaryView, fs.BinaryWriter]:
+    for name, value in list(vars(cls).items()):
+      if inspect.isfunction(value) and not name.startswith("__"):
+        targets.append((cls, name, f"{cls.__name__}.{name}"))
+  return targets
+
+active_stats: IOStats | None = None
+
+@contextmanager
+def io_stats(skipped_modules=DEFAULT_SKIPPED_MODULES):
+  # Records every call to fs_helpers made inside the with block. For example:
+  #   with profiling.io_stats() as stats:
+  #     rarc = RARC(data)
+  #   print(stats.report())
+  # The functions are only wrapped while the block is running, so there is no overhead outside of it.
+  global active_stats
+  if active_stats is not None:
+    raise Exception("io_stats is already active.")
+  
+  stats = IOStats(skipped_modules)
+  originals = []
+  for owner, attr_name, display_name in get_instrumentable_functions():
+    func = vars(owner)[attr_name]
+    originals.append((owner, attr_name, func))
+    setattr(owner, attr_name, stats.wrap(func, display_name))
+  
+  # The lookup tables hold references to the functions themselves, so they need to be pointed at the wrappers too.
+  original_read_funcs = dict(fs.PRIMITIVE_TYPE_TO_READ_FUNC)
+  original_write_funcs = dict(fs.PRIMITIVE_TYPE_TO_WRITE_FUNC)
+  for primitive_type, func in original_read_funcs.items():
+    fs.PRIMITIVE_TYPE_TO_READ_FUNC[primitive_type] = getattr(fs, func.__name__)
+  for primitive_type, func in original_write_funcs.items():
+    fs.PRIMITIVE_TYPE_TO_WRITE_FUNC[primitive_type] = getattr(fs, func.__name__)
+  
+  active_stats = stats
+  try:
+    yield stats
+  finally:
+    for owner, attr_name, func in originals:
+      setattr(owner, attr_name, func)
+    fs.PRIMITIVE_TYPE_TO_READ_FUNC.update(original_read_funcs)
+    fs.PRIMITIVE_TYPE_TO_WRITE_FUNC.update(original_write_funcs)
+    active_stats = None
@@ -1,9 +1,13 @@
 
 import os
+import hashlib
+import shutil
+import struct
+from concurrent.futures import ProcessPoolExecutor
 from io import BytesIO
 from enum import IntFlag
 from pathlib import Path
-from typing import Type, TypeVar
+from typing import BinaryIO, Type, TypeVar
 
 from gclib import fs_helpers as fs
 from gclib.gclib_file import GCLibFile, GCLibFileEntry
@@ -11,10 +15,20 @@ from gclib.yaz0_yay0 import Yaz0, Yay0
 
 GCLibFileT = TypeVar('GCLibFileT', bound=GCLibFile)
 
+# Chunk size used when copying file data that's in an open file into an archive being streamed out.
+MAX_DATA_SIZE_TO_COPY_AT_ONCE = 1024*1024 # 1MB
+
 class RARC(GCLibFile):
-  def __init__(self, flexible_data = None):
+  HEADER_STRUCT = struct.Struct(">4sIIIIIII")
+  DATA_HEADER_STRUCT = struct.Struct(">IIIIIIHBBI")
+  
+  def __init__(self, flexible_data = None, name_string_cache: dict[bytes, str] | None = None):
     super().__init__(flexible_data)
     
+    # Shared by this archive and any archives nested inside of it, and by the other archives on a disc when read
+    # through a GCM, so that names repeated across them are only decoded once. See fs.read_str_until_null_character.
+    self.name_string_cache = name_string_cache if name_string_cache is not None else {}
+    
     self.magic = "RARC"
     self.size = None
     self.data_header_offset = None
@@ -38,6 +52,28 @@ class RARC(GCLibFile):
     self.nodes: list[RARCNode] = []
     self.file_entries: list[RARCFileEntry] = []
     self.instantiated_object_files = {}
+    # Parsed RARCs inside of this archive's file entries. See get_nested_rarc.
+    self.nested_rarcs: dict[RARCFileEntry, RARC] = {}
+    # Lookup tables for nodes and file entries, which are rebuilt the next time they're needed after anything
+    # that could change paths or names. Paths are relative to the root node.
+    self.path_indexes_valid = False
+    self.nodes_by_path: dict[str, RARCNode] = {}
+    self.nodes_by_path_lowercase: dict[str, RARCNode] = {}
+    self.nodes_by_name: dict[str, RARCNode] = {}
+    self.nodes_by_name_lowercase: dict[str, RARCNode] = {}
+    self.file_entries_by_path: dict[str, RARCFileEntry] = {}
+    self.file_entries_by_path_lowercase: dict[str, RARCFileEntry] = {}
+    self.file_entries_by_name: dict[str, RARCFileEntry] = {}
+    self.file_entries_by_name_lowercase: dict[str, RARCFileEntry] = {}
+    # An immutable snapshot of the archive's data that file entries whose data hasn't been loaded yet refer to.
+    self.source_data: bytes | None = None
+    # The layout of the archive as of when it was last read or saved. See get_layout_signature.
+    self.saved_layout_signature: tuple | None = None
+    # Whether file entries keep a copy of their compressed data when they're decompressed, so that recompress_files
+    # can reuse it for files that weren't modified. This is off by default to avoid holding on to the compressed data
+    # when the archive is never going to be recompressed. recompress_files turns it on, and it can also be set before
+    # any files are decompressed so that the first save with recompress_files enabled can benefit from it too.
+    self.keep_compressed_data_for_recompression = False
     
     if flexible_data is not None:
       self.read()
@@ -50,46 +86,63 @@ class RARC(GCLibFile):
       return False
     return True
   
+  @classmethod
+  def check_possibly_compressed_data_is_rarc(cls, data: BytesIO) -> bool:
+    # Like check_file_is_rarc, but also detects RARCs that are Yaz0 or Yay0 compressed without
+    # decompressing them.
+    try:
+      if Yaz0.check_is_compressed(data):
+        return fs.read_str(data, 0x11, 4) == "RARC"
+      elif Yay0.check_is_compressed(data):
+        chunk_offset = fs.read_u32(data, 0xC)
+        return fs.read_str(data, chunk_offset, 4) == "RARC"
+      else:
+        return cls.check_file_is_rarc(data)
+    except Exception as e:
+      return False
+  
   def read(self):
+    # File entries don't copy their data out of the archive until it's accessed, they only keep track of where it is
+    # in this snapshot. For a BytesIO that was created from bytes, getvalue returns those bytes without copying them.
+    self.source_data = self.data.getvalue()
+    # All of the headers are read straight out of that snapshot, without seeking.
+    view = fs.BinaryView(self.source_data)
+    
     # Read header.
-    self.magic = fs.read_str(self.data, 0, 4)
+    self.magic = view.read_str(0, 4)
     assert self.magic == "RARC", "This file is not a RARC archive."
-    self.size = fs.read_u32(self.data, 4)
-    self.data_header_offset = fs.read_u32(self.data, 0x8)
+    (
+      _, self.size, self.data_header_offset, file_data_list_offset,
+      self.total_file_data_size, self.mram_file_data_size, self.aram_file_data_size, self.unknown_1,
+    ) = view.unpack_from(RARC.HEADER_STRUCT, 0)
     assert self.data_header_offset == 0x20
-    self.file_data_list_offset = fs.read_u32(self.data, 0xC) + self.data_header_offset
-    self.total_file_data_size = fs.read_u32(self.data, 0x10)
-    self.mram_file_data_size = fs.read_u32(self.data, 0x14)
-    self.aram_file_data_size = fs.read_u32(self.data, 0x18)
-    self.unknown_1 = fs.read_u32(self.data, 0x1C)
+    self.file_data_list_offset = file_data_list_offset + self.data_header_offset
     assert self.unknown_1 == 0
     
     # Read data header.
-    self.num_nodes = fs.read_u32(self.data, self.data_header_offset + 0x00)
-    self.node_list_offset = fs.read_u32(self.data, self.data_header_offset + 0x04) + self.data_header_offset
-    self.total_num_file_entries = fs.read_u32(self.data, self.data_header_offset + 0x08)
-    self.file_entries_list_offset = fs.read_u32(self.data, self.data_header_offset + 0x0C) + self.data_header_offset
-    self.string_list_size = fs.read_u32(self.data, self.data_header_offset + 0x10)
-    self.string_list_offset = fs.read_u32(self.data, self.data_header_offset + 0x14) + self.data_header_offset
-    self.next_free_file_id = fs.read_u16(self.data, self.data_header_offset + 0x18)
-    self.keep_file_ids_synced_with_indexes = fs.read_u8(self.data, self.data_header_offset + 0x1A)
-    self.unknown_2 = fs.read_u8(self.data, self.data_header_offset + 0x1B)
+    (
+      self.num_nodes, node_list_offset, self.total_num_file_entries, file_entries_list_offset,
+      self.string_list_size, string_list_offset,
+      self.next_free_file_id, self.keep_file_ids_synced_with_indexes, self.unknown_2, self.unknown_3,
+    ) = view.unpack_from(RARC.DATA_HEADER_STRUCT, self.data_header_offset)
+    self.node_list_offset = node_list_offset + self.data_header_offset
+    self.file_entries_list_offset = file_entries_list_offset + self.data_header_offset
+    self.string_list_offset = string_list_offset + self.data_header_offset
     assert self.unknown_2 == 0
-    self.unknown_3 = fs.read_u32(self.data, self.data_header_offset + 0x1C)
     assert self.unknown_3 == 0
     
     self.nodes = []
     for node_index in range(self.num_nodes):
       offset = self.node_list_offset + node_index*RARCNode.ENTRY_SIZE
       node = RARCNode(self)
-      node.read(offset)
+      node.read(view, offset)
       self.nodes.append(node)
     
     self.file_entries = []
     for file_index in range(self.total_num_file_entries):
       file_entry_offset = self.file_entries_list_offset + file_index*RARCFileEntry.ENTRY_SIZE
       file_entry = RARCFileEntry(self)
-      file_entry.read(file_entry_offset)
+      file_entry.read(view, file_entry_offset)
       self.file_entries.append(file_entry)
       
       if file_entry.is_dir and file_entry.node_index != 0xFFFFFFFF:
@@ -113,6 +166,9 @@ class RARC(GCLibFile):
       assert file_entry.parent_node is not None, f"Failed to find parent node for RARC file entry {repr(file_entry.name)}"
     
     self.instantiated_object_files = {}
+    self.nested_rarcs = {}
+    self.path_indexes_valid = False
+    self.saved_layout_signature = self.get_layout_signature()
   
   def add_root_directory(self):
     root_node = RARCNode(self)
@@ -227,25 +283,27 @@ class RARC(GCLibFile):
   
   def regenerate_all_file_entries_list(self):
     # Regenerate the list of all file entries so they're all together for the nodes, and update the first_file_index of the nodes.
+    self.path_indexes_valid = False
     self.file_entries = []
     self.regenerate_files_list_for_node(self.nodes[0])
     
     if self.keep_file_ids_synced_with_indexes:
       self.next_free_file_id = len(self.file_entries)
       
-      for file_entry in self.file_entries:
+      for file_index, file_entry in enumerate(self.file_entries):
         if not file_entry.is_dir:
-          file_entry.id = self.file_entries.index(file_entry)
+          file_entry.id = file_index
   
   def regenerate_files_list_for_node(self, node: 'RARCNode'):
     # Sort the . and .. directory entries to be at the end of the node's file list.
+    other_entries = []
     rel_dir_entries = []
     for file_entry in node.files:
       if file_entry.is_dir and file_entry.name in [".", ".."]:
         rel_dir_entries.append(file_entry)
-    for rel_dir_entry in rel_dir_entries:
-      node.files.remove(rel_dir_entry)
-      node.files.append(rel_dir_entry)
+      else:
+        other_entries.append(file_entry)
+    node.files[:] = other_entries + rel_dir_entries
     
     node.first_file_index = len(self.file_entries)
     self.file_entries += node.files
@@ -265,9 +323,8 @@ class RARC(GCLibFile):
       
       output_file_path = os.path.join(output_directory, file_entry.name)
       
-      file_entry.data.seek(0)
       with open(output_file_path, "wb") as f:
-        f.write(file_entry.data.read())
+        f.write(file_entry.data_view)
   
   def extract_all_files_to_disk(self, output_directory: str):
     # Preserves directory structure.
@@ -285,9 +342,8 @@ class RARC(GCLibFile):
           self.extract_node_to_disk(subdir_node, subdir_path)
       else:
         file_path = os.path.join(path, file.name)
-        file.data.seek(0)
         with open(file_path, "wb") as f:
-          f.write(file.data.read())
+          f.write(file.data_view)
   
   def import_all_files_from_disk(self, input_directory: str):
     root_node = self.nodes[0]
@@ -321,7 +377,7 @@ class RARC(GCLibFile):
       display_path = rel_dir + "/" + base_name + file_ext
       
       if file_entry.check_is_nested_rarc():
-        inner_rarc = self.get_file(file_entry.name, RARC)
+        inner_rarc = self.get_nested_rarc(file_entry)
         for inner_rarc_file_path, file_data in inner_rarc.each_file_data(only_file_exts=only_file_exts):
           yield (display_path + "/" + inner_rarc_file_path, file_data)
       else:
@@ -330,44 +386,194 @@ class RARC(GCLibFile):
         file_entry.decompress_data_if_necessary()
         yield (display_path, file_entry.data)
   
-  def save_changes(self):
+  def walk_files(self, only_file_exts: list[str] | None = None, yield_entries=False):
+    # Yields the path and decompressed data of every file in this archive, descending into nested archives at any
+    # depth. Paths are relative to the root node, with the paths of files inside nested archives continuing on from the
+    # path of the archive they're in, e.g. "stage.szs/dzb/room.dzb".
+    # If yield_entries is True, the RARCFileEntry of each file is yielded instead of its data, and the data isn't loaded
+    # or decompressed.
+    # Nested archives are parsed with get_nested_rarc, so walking the same archive again doesn't reparse them.
+    for file_entry in self.file_entries:
+      if file_entry.is_dir:
+        continue
+      
+      if file_entry.check_is_nested_rarc():
+        inner_rarc = self.get_nested_rarc(file_entry)
+        for inner_file_path, file_data_or_entry in inner_rarc.walk_files(only_file_exts, yield_entries):
+          yield (file_entry.file_path + "/" + inner_file_path, file_data_or_entry)
+        continue
+      
+      _, file_ext = os.path.splitext(file_entry.name)
+      if only_file_exts is not None and file_ext not in only_file_exts:
+        continue
+      if yield_entries:
+        yield (file_entry.file_path, file_entry)
+      else:
+        file_entry.decompress_data_if_necessary()
+        yield (file_entry.file_path, file_entry.data)
+  
+  def get_nested_rarc(self, file_entry: 'RARCFileEntry') -> 'RARC':
+    # Returns the RARC inside of one of this archive's file entries.
+    # The parsed RARC is memoized by the entry, and the same one is returned each time unless the entry's data was
+    # replaced, or was modified other than through the nested RARC, since it was parsed.
+    nested_rarc = self.nested_rarcs.get(file_entry)
+    if nested_rarc is not None and file_entry.data is nested_rarc.data and nested_rarc.check_data_is_unchanged():
+      return nested_rarc
+    
+    nested_rarc = RARC(file_entry, self.name_string_cache)
+    self.nested_rarcs[file_entry] = nested_rarc
+    return nested_rarc
+  
+  def check_data_is_unchanged(self) -> bool:
+    # Whether the archive's data is still the same as it was when the archive was last read or saved.
+    # This is instant unless the data was written to, as getvalue returns the same bytes object each time in that case.
+    return self.source_data is not None and self.data.getvalue() == self.source_data
+  
+  def save_changes(self, allow_in_place=True, recompress_files=False, recompression_workers: int | None = None):
     # Repacks the .arc file.
     # Supports files changing size, name, files being added or removed, nodes being added or removed, etc.
+    # If only the contents of files changed and they all still fit where they were, they're overwritten in place
+    # instead, unless allow_in_place is False.
+    # If recompress_files is True, files that were compressed when the archive was read but have since been
+    # decompressed or replaced are saved compressed again, with the same type of compression they originally had.
+    # The file entries' data itself is left decompressed. See recompress_files for the meaning of
+    # recompression_workers.
+    if recompress_files:
+      self.recompress_files(recompression_workers)
+    try:
+      if allow_in_place and self.try_save_changes_in_place():
+        return
+      self.repack()
+    finally:
+      for file_entry in self.file_entries:
+        file_entry.recompressed_data = None
+  
+  def recompress_files(self, workers: int | None = None):
+    # Works out the compressed data to save for each file that needs to be recompressed.
+    # Files that were only decompressed and not modified reuse their original compressed data.
+    # Everything else is compressed in a pool of worker processes, or in this process if workers is 0.
+    self.keep_compressed_data_for_recompression = True
+    
+    file_entries_to_compress: list[RARCFileEntry] = []
+    uncompressed_datas: list[bytes] = []
+    for file_entry in self.file_entries:
+      if file_entry.is_dir or not file_entry.is_data_loaded or file_entry.original_compression is None:
+        continue
+      data = file_entry.data_view
+      if data[:4] in [Yaz0.MAGIC_BYTES, Yay0.MAGIC_BYTES]:
+        # Still compressed.
+        continue
+      cache = file_entry.compression_cache
+      if cache is not None and cache[0] == len(data) and cache[:2] == get_compression_cache_key(data):
+        file_entry.recompressed_data = cache[2]
+        continue
+      file_entries_to_compress.append(file_entry)
+      # The data may be in an open file instead of a BytesIO, so the view that was already read is copied instead.
+      uncompressed_datas.append(bytes(data))
     
-    # Cut off all the data since we're replacing it entirely.
-    self.node_list_offset = 0x40
-    self.data.truncate(0)
-    self.data.seek(self.node_list_offset)
+    if not file_entries_to_compress:
+      return
+    
+    compressions = [file_entry.original_compression for file_entry in file_entries_to_compress]
+    if workers == 0 or len(file_entries_to_compress) == 1:
+      compressed_datas = map(compress_data, compressions, uncompressed_datas)
+      self.store_recompressed_data(file_entries_to_compress, uncompressed_datas, compressed_datas)
+    else:
+      with ProcessPoolExecutor(max_workers=workers) as executor:
+        compressed_datas = executor.map(compress_data, compressions, uncompressed_datas)
+        self.store_recompressed_data(file_entries_to_compress, uncompressed_datas, compressed_datas)
+  
+  @staticmethod
+  def store_recompressed_data(file_entries: list['RARCFileEntry'], uncompressed_datas: list[bytes], compressed_datas):
+    for file_entry, uncompressed_data, compressed_data in zip(file_entries, uncompressed_datas, compressed_datas):
+      file_entry.recompressed_data = compressed_data
+      file_entry.compression_cache = get_compression_cache_key(uncompressed_data) + (compressed_data,)
+  
+  def repack(self):
+    # The whole archive is laid out first, and then built in a single presized buffer that replaces the old data.
+    string_list, file_entries_in_data_order = self.lay_out()
+    
+    buffer = bytearray(self.size)
+    self.write_headers(buffer, string_list)
+    for file_entry in file_entries_in_data_order:
+      # Entries that were never loaded are copied straight from the original archive data.
+      data_start_offset = self.file_data_list_offset + file_entry.data_offset
+      data_end_offset = data_start_offset + file_entry.data_size
+      buffer[data_start_offset:data_end_offset] = file_entry.data_to_save
+      padded_end_offset = fs.pad_offset_to_nearest(data_end_offset, 0x20)
+      buffer[data_end_offset:padded_end_offset] = fs.get_padding(padded_end_offset - data_end_offset)
+    
+    # Replace the contents of the existing BytesIO, as other objects may be sharing it.
+    self.data.seek(0)
+    self.data.truncate()
+    self.data.write(buffer)
+    
+    # Point entries that still haven't been loaded at their data in the new archive, so the old data can be freed.
+    self.source_data = self.data.getvalue()
+    for file_entry in self.file_entries:
+      if file_entry.lazy_data_offset is not None:
+        file_entry.lazy_data_offset = self.file_data_list_offset + file_entry.data_offset
+    
+    self.saved_layout_signature = self.get_layout_signature()
+  
+  def save_to_stream(self, output: BinaryIO, recompress_files=False, recompression_workers: int | None = None):
+    # Writes the repacked archive to an open binary file instead of to this RARC's data, which is left as it was.
+    # Everything before the file data is built in memory, but the file data is then written out one file at a time.
+    # Files that haven't been loaded are copied from the original archive data, and files whose data is an open file
+    # (e.g. one passed to add_new_file) are copied over in chunks, so the archive is never all in memory at once.
+    if recompress_files:
+      self.recompress_files(recompression_workers)
+    try:
+      string_list, file_entries_in_data_order = self.lay_out()
+      
+      header_buffer = bytearray(self.file_data_list_offset)
+      self.write_headers(header_buffer, string_list)
+      output.write(header_buffer)
+      
+      for file_entry in file_entries_in_data_order:
+        file_entry.write_data_to_save(output)
+        output.write(fs.get_padding(fs.pad_offset_to_nearest(file_entry.data_size, 0x20) - file_entry.data_size))
+    finally:
+      for file_entry in self.file_entries:
+        file_entry.recompressed_data = None
     
-    # Assign the node offsets for each node, but don't actually save them yet because we need to write their names first.
+    # The offsets in the entries now refer to the archive that was written out, not this RARC's data, so it can't be
+    # saved in place anymore until it's fully saved again.
+    self.saved_layout_signature = None
+  
+  def save_to_file(self, file_path: str, recompress_files=False, recompression_workers: int | None = None):
+    with open(file_path, "wb") as f:
+      self.save_to_stream(f, recompress_files, recompression_workers)
+  
+  def lay_out(self) -> tuple[bytearray, list['RARCFileEntry']]:
+    # Assigns offsets for everything in the archive and the sizes in the headers, without writing anything yet.
+    # Returns the string list and the file entries in the order their data will be written.
+    
+    # Reorders the self.file_entries list and sets the first_file_index field for each node.
+    # This also updates the file IDs if they're synced with the indexes.
+    self.regenerate_all_file_entries_list()
+    node_indexes = {node: node_index for node_index, node in enumerate(self.nodes)}
+    
+    self.node_list_offset = 0x40
     next_node_offset = self.node_list_offset
     for node in self.nodes:
       node.node_offset = next_node_offset
-      self.data.seek(node.node_offset)
-      self.data.write(b'\0'*RARCNode.ENTRY_SIZE)
       next_node_offset += RARCNode.ENTRY_SIZE
     
-    # Reorders the self.file_entries list and sets the first_file_index field for each node.
-    self.regenerate_all_file_entries_list()
-    
-    # Assign the entry offsets for each file entry, but don't actually save them yet because we need to write their data and names first.
-    fs.align_data_to_nearest(self.data, 0x20, padding_bytes=b'\0')
-    self.file_entries_list_offset = self.data.tell()
+    self.file_entries_list_offset = fs.pad_offset_to_nearest(next_node_offset, 0x20)
     next_file_entry_offset = self.file_entries_list_offset
     for file_entry in self.file_entries:
       file_entry.entry_offset = next_file_entry_offset
-      self.data.seek(file_entry.entry_offset)
-      self.data.write(b'\0'*RARCFileEntry.ENTRY_SIZE)
       next_file_entry_offset += RARCFileEntry.ENTRY_SIZE
     
-    # Write the strings for the node names and file entry names.
-    fs.align_data_to_nearest(self.data, 0x20)
-    self.string_list_offset = self.data.tell()
+    # Build the strings for the node names and file entry names.
+    self.string_list_offset = fs.pad_offset_to_nearest(next_file_entry_offset, 0x20)
+    string_list = bytearray()
     offsets_for_already_written_strings = {}
     # The dots for the current and parent directories are always written first.
-    fs.write_str_with_null_byte(self.data, self.string_list_offset+0, ".")
+    string_list[0:2] = b".\0"
     offsets_for_already_written_strings["."] = 0
-    fs.write_str_with_null_byte(self.data, self.string_list_offset+2, "..")
+    string_list[2:5] = b"..\0"
     offsets_for_already_written_strings[".."] = 2
     next_string_offset = 5
     for file_entry in self.nodes + self.file_entries:
@@ -376,19 +582,16 @@ class RARC(GCLibFile):
         offset = offsets_for_already_written_strings[string]
       else:
         offset = next_string_offset
-        fs.write_str_with_null_byte(self.data, self.string_list_offset+offset, string)
+        encoded_string = string.encode("shift_jis") + b"\0"
+        string_list[offset:offset+len(encoded_string)] = encoded_string
         next_string_offset += len(string) + 1
         offsets_for_already_written_strings[string] = offset
       file_entry.name_offset = offset
+    string_list_end_offset = self.string_list_offset + len(string_list)
     
-    # Save the nodes.
-    for node in self.nodes:
-      node.save_changes()
-    
-    # Write the file data, and save the file entries as well.
+    # Lay out the file data.
     # Main RAM file entries must all be in a row before the ARAM file entries.
-    fs.align_data_to_nearest(self.data, 0x20)
-    self.file_data_list_offset = self.data.tell()
+    self.file_data_list_offset = fs.pad_offset_to_nearest(string_list_end_offset, 0x20)
     mram_preload_file_entries: list[RARCFileEntry] = []
     aram_preload_file_entries: list[RARCFileEntry] = []
     no_preload_file_entries: list[RARCFileEntry] = []
@@ -397,9 +600,7 @@ class RARC(GCLibFile):
         if file_entry.node is None:
           file_entry.node_index = 0xFFFFFFFF
         else:
-          file_entry.node_index = self.nodes.index(file_entry.node)
-        
-        file_entry.save_changes()
+          file_entry.node_index = node_indexes[file_entry.node]
       else:
         if file_entry.type & RARCFileAttrType.PRELOAD_TO_MRAM != 0:
           mram_preload_file_entries.append(file_entry)
@@ -410,90 +611,203 @@ class RARC(GCLibFile):
         else:
           raise Exception("File entry %s is not set as being loaded into any type of RAM." % file_entry.name)
     
-    def write_file_entry_data(file_entry: RARCFileEntry):
-      nonlocal next_file_data_offset
-      
-      if self.keep_file_ids_synced_with_indexes:
-        file_entry.id = self.file_entries.index(file_entry)
-      
+    next_file_data_offset = 0
+    file_entries_in_data_order = mram_preload_file_entries + aram_preload_file_entries + no_preload_file_entries
+    for file_entry in file_entries_in_data_order:
       file_entry.data_offset = next_file_data_offset
-      file_entry.save_changes()
-      
-      self.data.seek(self.file_data_list_offset + file_entry.data_offset)
-      file_entry.data.seek(0)
-      self.data.write(file_entry.data.read())
-      
-      next_file_data_offset += file_entry.data_size
-      
+      file_entry.data_size = file_entry.get_data_to_save_size()
       # Pad start of the next file to the next 0x20 bytes.
-      fs.align_data_to_nearest(self.data, 0x20)
-      next_file_data_offset = self.data.tell() - self.file_data_list_offset
-    
-    next_file_data_offset = 0
-    
-    for file_entry in mram_preload_file_entries:
-      write_file_entry_data(file_entry)
-    self.mram_file_data_size = next_file_data_offset
-  
-    for file_entry in aram_preload_file_entries:
-      write_file_entry_data(file_entry)
-    self.aram_file_data_size = next_file_data_offset - self.mram_file_data_size
-    
-    for file_entry in no_preload_file_entries:
-      write_file_entry_data(file_entry)
-    
+      next_file_data_offset = fs.pad_offset_to_nearest(next_file_data_offset + file_entry.data_size, 0x20)
+    
+    self.mram_file_data_size = sum(
+      fs.pad_offset_to_nearest(file_entry.data_size, 0x20) for file_entry in mram_preload_file_entries
+    )
+    self.aram_file_data_size = sum(
+      fs.pad_offset_to_nearest(file_entry.data_size, 0x20) for file_entry in aram_preload_file_entries
+    )
     self.total_file_data_size = next_file_data_offset
-    
-    # Update the header.
-    fs.write_magic_str(self.data, 0x00, self.magic, 4)
     self.size = self.file_data_list_offset + self.total_file_data_size
-    fs.write_u32(self.data, 0x04, self.size)
+    
     self.data_header_offset = 0x20
-    fs.write_u32(self.data, 0x08, self.data_header_offset)
-    fs.write_u32(self.data, 0x0C, self.file_data_list_offset-0x20)
-    fs.write_u32(self.data, 0x10, self.total_file_data_size)
-    fs.write_u32(self.data, 0x14, self.mram_file_data_size)
-    fs.write_u32(self.data, 0x18, self.aram_file_data_size)
-    fs.write_u32(self.data, 0x1C, 0)
-    
-    # Update the data header.
     self.num_nodes = len(self.nodes)
-    fs.write_u32(self.data, self.data_header_offset + 0x00, self.num_nodes)
     self.total_num_file_entries = len(self.file_entries)
-    fs.write_u32(self.data, self.data_header_offset + 0x04, self.node_list_offset - self.data_header_offset)
-    fs.write_u32(self.data, self.data_header_offset + 0x08, self.total_num_file_entries)
-    fs.write_u32(self.data, self.data_header_offset + 0x0C, self.file_entries_list_offset - self.data_header_offset)
     self.string_list_size = self.file_data_list_offset - self.string_list_offset
-    fs.write_u32(self.data, self.data_header_offset + 0x10, self.string_list_size)
-    fs.write_u32(self.data, self.data_header_offset + 0x14, self.string_list_offset - self.data_header_offset)
-    fs.write_u16(self.data, self.data_header_offset + 0x18, self.next_free_file_id)
-    fs.write_u8(self.data, self.data_header_offset + 0x1A, self.keep_file_ids_synced_with_indexes)
-    fs.write_u8(self.data, self.data_header_offset + 0x1B, 0)
-    fs.write_u32(self.data, self.data_header_offset + 0x1C, 0)
-  
-  def get_node_by_path(self, path: str):
+    
+    return string_list, file_entries_in_data_order
+  
+  def write_headers(self, buffer: bytearray, string_list: bytearray):
+    # Writes everything that comes before the file data into the buffer, after the archive has been laid out.
+    RARC.HEADER_STRUCT.pack_into(
+      buffer, 0x00,
+      self.magic.encode("shift_jis"), self.size, self.data_header_offset, self.file_data_list_offset-0x20,
+      self.total_file_data_size, self.mram_file_data_size, self.aram_file_data_size, 0,
+    )
+    RARC.DATA_HEADER_STRUCT.pack_into(
+      buffer, self.data_header_offset,
+      self.num_nodes, self.node_list_offset - self.data_header_offset,
+      self.total_num_file_entries, self.file_entries_list_offset - self.data_header_offset,
+      self.string_list_size, self.string_list_offset - self.data_header_offset,
+      self.next_free_file_id, self.keep_file_ids_synced_with_indexes, 0, 0,
+    )
+    
+    for node in self.nodes:
+      node.save_changes(buffer)
+    for file_entry in self.file_entries:
+      file_entry.save_changes(buffer)
+    
+    next_file_entry_offset = self.file_entries_list_offset + len(self.file_entries)*RARCFileEntry.ENTRY_SIZE
+    string_list_end_offset = self.string_list_offset + len(string_list)
+    buffer[next_file_entry_offset:self.string_list_offset] = fs.get_padding(self.string_list_offset - next_file_entry_offset)
+    buffer[self.string_list_offset:string_list_end_offset] = string_list
+    buffer[string_list_end_offset:self.file_data_list_offset] = fs.get_padding(self.file_data_list_offset - string_list_end_offset)
+  
+  def get_layout_signature(self) -> tuple:
+    # Everything about the archive's directory structure and names that a full repack would have to lay out again.
+    # Nodes and file entries are compared by identity.
+    return (
+      self.next_free_file_id,
+      self.keep_file_ids_synced_with_indexes,
+      tuple((node, node.type, node.name, tuple(node.files)) for node in self.nodes),
+      tuple(
+        (file_entry, file_entry.name, file_entry.type, file_entry.id, file_entry.node, file_entry.parent_node)
+        for file_entry in self.file_entries
+      ),
+    )
+  
+  def try_save_changes_in_place(self) -> bool:
+    # Overwrites the data of files that changed where it already is in the archive, along with their entries' sizes.
+    # Returns False without changing anything if the layout changed or a file no longer fits in the space it had, in
+    # which case the archive must be fully repacked instead.
+    if self.saved_layout_signature is None or self.source_data is None:
+      return False
+    if fs.data_len(self.data) != len(self.source_data):
+      # The archive's data was replaced since it was last read or saved.
+      return False
+    
+    for file_entry in self.file_entries:
+      if not file_entry.is_dir and file_entry.is_data_loaded:
+        # The compression flags are part of the layout, so bring them up to date first.
+        file_entry.update_compression_flags_from_data()
+    if self.get_layout_signature() != self.saved_layout_signature:
+      return False
+    
+    # The space each file has is up until the start of the next file's data.
+    file_entries_by_data_offset = sorted(
+      (file_entry for file_entry in self.file_entries if not file_entry.is_dir),
+      key=lambda file_entry: file_entry.data_offset,
+    )
+    changed_file_entries: list[tuple[RARCFileEntry, memoryview, int]] = []
+    for file_entry_index, file_entry in enumerate(file_entries_by_data_offset):
+      if file_entry_index+1 < len(file_entries_by_data_offset):
+        next_data_offset = file_entries_by_data_offset[file_entry_index+1].data_offset
+      else:
+        next_data_offset = self.total_file_data_size
+      if file_entry.data_offset + file_entry.data_size > next_data_offset:
+        # Files share data or overlap, so overwriting one could change another.
+        return False
+      
+      if not file_entry.is_data_loaded:
+        continue
+      
+      absolute_data_offset = self.file_data_list_offset + file_entry.data_offset
+      old_data = memoryview(self.source_data)[absolute_data_offset:absolute_data_offset+file_entry.data_size]
+      new_data = file_entry.data_to_save
+      if new_data == old_data:
+        continue
+      if file_entry.data_offset + len(new_data) > next_data_offset:
+        return False
+      changed_file_entries.append((file_entry, new_data, next_data_offset))
+    
+    if changed_file_entries:
+      with self.data.getbuffer() as buffer:
+        for file_entry, new_data, next_data_offset in changed_file_entries:
+          data_start_offset = self.file_data_list_offset + file_entry.data_offset
+          data_end_offset = data_start_offset + len(new_data)
+          slot_end_offset = self.file_data_list_offset + next_data_offset
+          buffer[data_start_offset:data_end_offset] = new_data
+          buffer[data_end_offset:slot_end_offset] = fs.get_padding(slot_end_offset - data_end_offset)
+          file_entry.save_changes(buffer)
+      self.source_data = self.data.getvalue()
+    
+    return True
+  
+  def build_path_indexes(self):
+    self.nodes_by_path = {}
+    self.nodes_by_path_lowercase = {}
+    self.nodes_by_name = {}
+    self.nodes_by_name_lowercase = {}
+    for node in self.nodes:
+      if node is self.nodes[0]:
+        node_path = ""
+      elif node.dir_entry is not None:
+        node_path = node.dir_entry.file_path
+      else:
+        continue
+      # When there are duplicates, the first one in the list is the one that's found.
+      self.nodes_by_path.setdefault(node_path, node)
+      self.nodes_by_path_lowercase.setdefault(node_path.lower(), node)
+      self.nodes_by_name.setdefault(node.name, node)
+      self.nodes_by_name_lowercase.setdefault(node.name.lower(), node)
+    
+    self.file_entries_by_path = {}
+    self.file_entries_by_path_lowercase = {}
+    self.file_entries_by_name = {}
+    self.file_entries_by_name_lowercase = {}
+    for file_entry in self.file_entries:
+      self.file_entries_by_name.setdefault(file_entry.name, file_entry)
+      self.file_entries_by_name_lowercase.setdefault(file_entry.name.lower(), file_entry)
+      if file_entry.name in [".", ".."]:
+        continue
+      file_path = file_entry.file_path
+      self.file_entries_by_path.setdefault(file_path, file_entry)
+      self.file_entries_by_path_lowercase.setdefault(file_path.lower(), file_entry)
+    
+    self.path_indexes_valid = True
+  
+  def get_node_by_path(self, path: str, case_sensitive=True) -> 'RARCNode | None':
     if path in ["", "."]:
       # Root node
       return self.nodes[0]
     
-    for node in self.nodes[1:]:
-      assert node.dir_entry is not None
-      curr_path = node.dir_entry.name
-      curr_node = node.dir_entry.parent_node
-      while curr_node is not None:
-        if curr_node == self.nodes[0]:
-          # Root node
-          break
-        assert curr_node.dir_entry is not None
-        curr_path = "%s/%s" % (curr_node.dir_entry.name, curr_path)
-        curr_node = curr_node.dir_entry.parent_node
-      
-      if curr_path == path:
-        return node
+    if not self.path_indexes_valid:
+      self.build_path_indexes()
+    if case_sensitive:
+      return self.nodes_by_path.get(path)
+    else:
+      return self.nodes_by_path_lowercase.get(path.lower())
   
-  def get_file_entry(self, file_name: str) -> 'RARCFileEntry':
-    for file_entry in self.file_entries:
-      if file_entry.name == file_name:
+  def get_file_entry(self, file_name: str, case_sensitive=True) -> 'RARCFileEntry':
+    if not self.path_indexes_valid:
+      self.build_path_indexes()
+    if case_sensitive:
+      return self.file_entries_by_name.get(file_name)
+    else:
+      return self.file_entries_by_name_lowercase.get(file_name.lower())
+  
+  def get_file_entry_by_path(self, file_path: str, case_sensitive=True) -> 'RARCFileEntry | None':
+    # Accepts either a path relative to the root node (e.g. "dzb/room.dzb"), or a path in the format
+    # yielded by each_file_data, which is relative to the name of the file's parent node instead.
+    if not self.path_indexes_valid:
+      self.build_path_indexes()
+    if case_sensitive:
+      file_entry = self.file_entries_by_path.get(file_path)
+    else:
+      file_entry = self.file_entries_by_path_lowercase.get(file_path.lower())
+    if file_entry is not None and not file_entry.is_dir:
+      return file_entry
+    
+    dir_path, _, file_name = file_path.rpartition("/")
+    if case_sensitive:
+      node = self.nodes_by_name.get(dir_path)
+    else:
+      node = self.nodes_by_name_lowercase.get(dir_path.lower())
+      file_name = file_name.lower()
+    if node is None:
+      return None
+    
+    for file_entry in node.files:
+      entry_name = file_entry.name if case_sensitive else file_entry.name.lower()
+      if entry_name == file_name and not file_entry.is_dir:
         return file_entry
     return None
   
@@ -511,6 +825,7 @@ class RARC(GCLibFile):
 
 class RARCNode:
   ENTRY_SIZE = 0x10
+  STRUCT = struct.Struct(">4sIHHI")
   
   def __init__(self, rarc: RARC):
     self.rarc = rarc
@@ -518,24 +833,31 @@ class RARCNode:
     self.type: str = None
     self.name_offset: int = None
     self.name_hash: int = None
-    self.name: str = None
+    self._name: str = None
     self.files: list[RARCFileEntry] = [] # This will be populated after the file entries have been read.
     self.num_files: int = 0
     self.first_file_index: int = None
     self.dir_entry: RARCFileEntry | None = None # This will be populated when the corresponding directory entry is read. (The root node has no dir_entry.)
   
-  def read(self, node_offset: int):
+  def read(self, view: fs.BinaryView, node_offset: int):
     self.node_offset = node_offset
     
-    self.type = fs.read_str(self.rarc.data, self.node_offset+0x00, 4)
-    self.name_offset = fs.read_u32(self.rarc.data, self.node_offset+0x04)
-    self.name_hash = fs.read_u16(self.rarc.data, self.node_offset+0x08)
-    self.num_files = fs.read_u16(self.rarc.data, self.node_offset+0x0A)
-    self.first_file_index = fs.read_u32(self.rarc.data, self.node_offset+0x0C)
+    self.type = view.read_str(self.node_offset+0x00, 4)
+    _, self.name_offset, self.name_hash, self.num_files, self.first_file_index = view.unpack_from(self.STRUCT, self.node_offset)
     
-    self.name = fs.read_str_until_null_character(self.rarc.data, self.rarc.string_list_offset + self.name_offset)
+    self.name = view.read_str_until_null_character(self.rarc.string_list_offset + self.name_offset, self.rarc.name_string_cache)
   
-  def save_changes(self):
+  @property
+  def name(self) -> str:
+    return self._name
+  
+  @name.setter
+  def name(self, value: str):
+    self._name = value
+    self.rarc.path_indexes_valid = False
+  
+  def save_changes(self, buffer: bytearray):
+    # Writes the node into the buffer the archive is being built in by RARC.save_changes.
     hash = 0
     for char in self.name:
       hash *= 3
@@ -545,11 +867,13 @@ class RARCNode:
     
     self.num_files = len(self.files)
     
-    fs.write_magic_str(self.rarc.data, self.node_offset+0x00, self.type, 4)
-    fs.write_u32(self.rarc.data, self.node_offset+0x04, self.name_offset)
-    fs.write_u16(self.rarc.data, self.node_offset+0x08, self.name_hash)
-    fs.write_u16(self.rarc.data, self.node_offset+0x0A, self.num_files)
-    fs.write_u32(self.rarc.data, self.node_offset+0x0C, self.first_file_index)
+    encoded_type = self.type.encode("shift_jis")
+    if len(encoded_type) > 4:
+      raise Exception("String %s is too long (max length 0x%X)" % (self.type, 4))
+    self.STRUCT.pack_into(
+      buffer, self.node_offset,
+      encoded_type, self.name_offset, self.name_hash, self.num_files, self.first_file_index,
+    )
   
   def __str__(self):
     return f"<{self.__class__.__name__}: {self.type!r}>"
@@ -559,6 +883,7 @@ class RARCNode:
 
 class RARCFileEntry(GCLibFileEntry):
   ENTRY_SIZE = 0x14
+  STRUCT = struct.Struct(">HHIIII")
   
   def __init__(self, rarc: RARC):
     super().__init__()
@@ -569,25 +894,30 @@ class RARCFileEntry(GCLibFileEntry):
     self.id: int = 0xFFFF
     self.name_hash: int = None
     self.data_size: int = 0
-    self.data: BytesIO | None = None # None for directories.
+    self.data = None # None for directories.
     self.type: RARCFileAttrType = None
     self.name_offset: int = None
-    self.name: str = None
+    self._name: str = None
     self.node: RARCNode | None = None # Only None for the root node's ".." entry.
+    # The type of compression the file had when the archive was read, so it can be recompressed on save.
+    self.original_compression: type[Yaz0] | type[Yay0] | None = None
+    # The size and hash of the last decompressed data this file had, and the compressed data it corresponds to.
+    # See get_compression_cache_key.
+    self.compression_cache: tuple[int, bytes, bytes] | None = None
+    # Only set while the archive is being saved, for files being recompressed.
+    self.recompressed_data: bytes | memoryview | None = None
   
-  def read(self, entry_offset: int):
+  def read(self, view: fs.BinaryView, entry_offset: int):
     self.entry_offset = entry_offset
     
-    self.id = fs.read_u16(self.rarc.data, entry_offset)
-    self.name_hash = fs.read_u16(self.rarc.data, entry_offset + 2)
-    type_and_name_offset = fs.read_u32(self.rarc.data, entry_offset + 4)
-    data_offset_or_node_index = fs.read_u32(self.rarc.data, entry_offset + 8)
-    self.data_size = fs.read_u32(self.rarc.data, entry_offset + 0xC)
+    (
+      self.id, self.name_hash, type_and_name_offset, data_offset_or_node_index, self.data_size, _,
+    ) = view.unpack_from(self.STRUCT, entry_offset)
     
     self.type = RARCFileAttrType((type_and_name_offset & 0xFF000000) >> 24)
     
     self.name_offset = type_and_name_offset & 0x00FFFFFF
-    self.name = fs.read_str_until_null_character(self.rarc.data, self.rarc.string_list_offset + self.name_offset)
+    self.name = view.read_str_until_null_character(self.rarc.string_list_offset + self.name_offset, self.rarc.name_string_cache)
     
     if self.is_dir:
       # Directories have data size 0x10 for GC, but 0 for TPHD.
@@ -597,9 +927,85 @@ class RARCFileEntry(GCLibFileEntry):
       self.data = None
     else:
       self.data_offset = data_offset_or_node_index
-      absolute_data_offset = self.rarc.file_data_list_offset + self.data_offset
-      self.rarc.data.seek(absolute_data_offset)
-      self.data = BytesIO(self.rarc.data.read(self.data_size))
+      self._data = None
+      self.lazy_data_offset = self.rarc.file_data_list_offset + self.data_offset
+      
+      magic = self.data_view[:4]
+      if magic == Yaz0.MAGIC_BYTES:
+        self.original_compression = Yaz0
+      elif magic == Yay0.MAGIC_BYTES:
+        self.original_compression = Yay0
+  
+  @property
+  def data(self) -> BytesIO | None:
+    # The entry's data is only copied out of the archive the first time it's accessed, as the caller may modify it.
+    # Use data_view instead to read it without making a copy.
+    if self.lazy_data_offset is not None:
+      self._data = BytesIO(self.rarc.source_data[self.lazy_data_offset:self.lazy_data_offset+self.data_size])
+      self.lazy_data_offset = None
+    return self._data
+  
+  @data.setter
+  def data(self, value: BytesIO | None):
+    self._data = value
+    self.lazy_data_offset = None # Offset in the RARC's source_data, if this entry's data hasn't been loaded yet.
+  
+  @property
+  def data_view(self) -> memoryview | None:
+    # A read-only view of the entry's data, which doesn't load the data out of the archive if it hasn't been already.
+    # If the data was already loaded, this is a snapshot of it, and doesn't reflect changes made to it afterwards.
+    if self.lazy_data_offset is not None:
+      return memoryview(self.rarc.source_data)[self.lazy_data_offset:self.lazy_data_offset+self.data_size]
+    if self._data is None:
+      return None
+    if not isinstance(self._data, BytesIO):
+      # Data in an open file has to be read in full.
+      return memoryview(fs.read_all_bytes(self._data))
+    return memoryview(self._data.getvalue())
+  
+  @property
+  def is_data_loaded(self) -> bool:
+    return self.lazy_data_offset is None
+  
+  @property
+  def data_to_save(self) -> memoryview | None:
+    # The data that will be written to the archive, which is the recompressed data while the archive is being saved
+    # with recompress_files enabled.
+    if self.recompressed_data is not None:
+      return memoryview(self.recompressed_data)
+    return self.data_view
+  
+  @property
+  def is_data_to_save_in_file(self) -> bool:
+    # Whether the data to save is in an open file (other than a BytesIO), which shouldn't be read all at once.
+    return (
+      self.recompressed_data is None and self.lazy_data_offset is None
+      and self._data is not None and not isinstance(self._data, BytesIO)
+    )
+  
+  def get_data_to_save_size(self) -> int:
+    if self.recompressed_data is not None:
+      return len(self.recompressed_data)
+    if self.lazy_data_offset is not None:
+      return self.data_size
+    return fs.data_len(self._data)
+  
+  def write_data_to_save(self, output: BinaryIO):
+    if self.is_data_to_save_in_file:
+      self._data.seek(0)
+      shutil.copyfileobj(self._data, output, MAX_DATA_SIZE_TO_COPY_AT_ONCE)
+    else:
+      output.write(self.data_to_save)
+  
+  @property
+  def name(self) -> str:
+    return self._name
+  
+  @name.setter
+  def name(self, value: str):
+    # Renaming changes the paths of this entry, and everything in it if it's a directory.
+    self._name = value
+    self.rarc.path_indexes_valid = False
   
   @property
   def is_dir(self):
@@ -612,9 +1018,28 @@ class RARCFileEntry(GCLibFileEntry):
     else:
       self.type &= ~RARCFileAttrType.DIRECTORY
   
+  @property
+  def file_path(self) -> str:
+    # The path of this entry relative to the root node.
+    path = self.name
+    node = self.parent_node
+    while node is not None and node.dir_entry is not None:
+      path = node.dir_entry.name + "/" + path
+      node = node.dir_entry.parent_node
+    return path
+  
   def decompress_data_if_necessary(self) -> bool:
+    compressed_data = self.data_view
+    if compressed_data[:4] not in [Yaz0.MAGIC_BYTES, Yay0.MAGIC_BYTES]:
+      # Avoid loading the data if it's not compressed.
+      return False
     was_compressed = super().decompress_data_if_necessary()
     if was_compressed:
+      if self.rarc.keep_compressed_data_for_recompression:
+        # Remember the compressed data, so it can be reused if the archive is saved with recompress_files enabled and
+        # this file wasn't modified. It's copied out so that it doesn't keep the whole original archive data alive.
+        # Decompressing always replaces the data with a BytesIO, even if it was in an open file before.
+        self.compression_cache = get_compression_cache_key(self.data.getbuffer()) + (bytes(compressed_data),)
       self.update_compression_flags_from_data()
     return was_compressed
   
@@ -624,10 +1049,14 @@ class RARCFileEntry(GCLibFileEntry):
       self.type &= ~RARCFileAttrType.YAZ0_COMPRESSED
       return
     
-    if Yaz0.check_is_compressed(self.data):
+    if self.is_data_to_save_in_file:
+      magic = fs.read_bytes(self._data, 0, 4)
+    else:
+      magic = self.data_to_save[:4]
+    if magic == Yaz0.MAGIC_BYTES:
       self.type |= RARCFileAttrType.COMPRESSED
       self.type |= RARCFileAttrType.YAZ0_COMPRESSED
-    elif Yay0.check_is_compressed(self.data):
+    elif magic == Yay0.MAGIC_BYTES:
       self.type |= RARCFileAttrType.COMPRESSED
       self.type &= ~RARCFileAttrType.YAZ0_COMPRESSED
     else:
@@ -637,26 +1066,15 @@ class RARCFileEntry(GCLibFileEntry):
   def check_is_nested_rarc(self) -> bool:
     if self.is_dir:
       return False
-    assert self.data is not None
-    try:
-      _, file_ext = os.path.splitext(self.name)
-      if file_ext in [".arc", ".szs", ".szp"]:
-        if Yaz0.check_is_compressed(self.data):
-          magic = fs.read_str(self.data, 0x11, 4)
-          if magic == "RARC":
-            return True
-        elif Yay0.check_is_compressed(self.data):
-          chunk_offset = fs.read_u32(self.data, 0xC)
-          magic = fs.read_str(self.data, chunk_offset, 4)
-          if magic == "RARC":
-            return True
-        elif RARC.check_file_is_rarc(self.data):
-          return True
-    except Exception as e:
-      pass
-    return False
+    assert self.data_view is not None
+    _, file_ext = os.path.splitext(self.name)
+    if file_ext not in [".arc", ".szs", ".szp"]:
+      return False
+    return RARC.check_possibly_compressed_data_is_rarc(fs.BinaryView(self.data_view))
   
-  def save_changes(self):
+  def save_changes(self, buffer: bytearray):
+    # Writes the entry into the buffer the archive is being built in by RARC.save_changes.
+    # The entry's data_offset must already have been assigned, but its data is written separately.
     hash = 0
     for char in self.name:
       hash *= 3
@@ -673,14 +1091,13 @@ class RARCFileEntry(GCLibFileEntry):
       self.data_size = 0x10
     else:
       data_offset_or_node_index = self.data_offset
-      self.data_size = fs.data_len(self.data)
+      self.data_size = self.get_data_to_save_size()
     
-    fs.write_u16(self.rarc.data, self.entry_offset+0x00, self.id)
-    fs.write_u16(self.rarc.data, self.entry_offset+0x02, self.name_hash)
-    fs.write_u32(self.rarc.data, self.entry_offset+0x04, type_and_name_offset)
-    fs.write_u32(self.rarc.data, self.entry_offset+0x08, data_offset_or_node_index)
-    fs.write_u32(self.rarc.data, self.entry_offset+0x0C, self.data_size)
-    fs.write_u32(self.rarc.data, self.entry_offset+0x10, 0) # Pointer to the file's data, filled at runtime.
+    self.STRUCT.pack_into(
+      buffer, self.entry_offset,
+      self.id, self.name_hash, type_and_name_offset, data_offset_or_node_index, self.data_size,
+      0, # Pointer to the file's data, filled at runtime.
+    )
   
   def __str__(self):
     return f"<{self.__class__.__name__}: {self.name!r}>"
@@ -696,3 +1113,12 @@ class RARCFileAttrType(IntFlag):
   PRELOAD_TO_ARAM = 0x20
   LOAD_FROM_DVD   = 0x40
   YAZ0_COMPRESSED = 0x80
+
+def get_compression_cache_key(uncompressed_data) -> tuple[int, bytes]:
+  # Identifies a file's decompressed data by its size and hash, so the data itself doesn't need to be kept around to
+  # check if the file was modified.
+  return (len(uncompressed_data), hashlib.sha1(uncompressed_data).digest())
+
+def compress_data(compression: type[Yaz0] | type[Yay0], uncompressed_data: bytes) -> bytes:
+  # Run in worker processes when recompressing files in a RARC.
+  return compression.compress(BytesIO(uncompressed_data)).getvalue()
@@ -0,0 +1,148 @@
+import hashlib
+import os
+from io import BytesIO
+from dataclasses import dataclass, field
+from typing import Callable
+
+from gclib import fs_helpers as fs
+from gclib.rarc import RARC
+from gclib.yaz0_yay0 import Yaz0, Yay0, decompress_if_necessary
+
+@dataclass
+class RARCDiff:
+  # All paths are relative to the root node of the archive. Directories can be added or removed, but only files are
+  # detected as renamed.
+  added: list[str] = field(default_factory=list)
+  removed: list[str] = field(default_factory=list)
+  renamed: list[tuple[str, str]] = field(default_factory=list) # Old path and new path.
+  changed: list[str] = field(default_factory=list)
+  
+  @property
+  def has_changes(self) -> bool:
+    return bool(self.added or self.removed or self.renamed or self.changed)
+
+# The size of Yaz0 and Yay0 headers that need to be read to get the decompressed size.
+COMPRESSION_HEADER_SIZE = 8
+
+# A file's size, a function that returns the first COMPRESSION_HEADER_SIZE bytes of its raw data, and a function that
+# returns all of its raw data.
+FileInfo = tuple[int, Callable[[], bytes | memoryview], Callable[[], bytes | memoryview]]
+
+def diff_rarcs(old_rarc: RARC, new_rarc: RARC) -> RARCDiff:
+  # Compares the directories and files in two archives.
+  old_dir_paths, old_files = get_rarc_contents(old_rarc)
+  new_dir_paths, new_files = get_rarc_contents(new_rarc)
+  return diff_contents(old_dir_paths, old_files, new_dir_paths, new_files)
+
+def diff_rarc_with_folder(rarc: RARC, folder_path: str) -> RARCDiff:
+  # Compares an archive with a folder laid out the same way as one extracted with RARC.extract_all_files_to_disk.
+  # The archive is treated as the old version and the folder as the new version.
+  old_dir_paths, old_files = get_rarc_contents(rarc)
+  new_dir_paths, new_files = get_folder_contents(folder_path)
+  return diff_contents(old_dir_paths, old_files, new_dir_paths, new_files)
+
+def get_rarc_contents(rarc: RARC) -> tuple[set[str], dict[str, FileInfo]]:
+  dir_paths = set()
+  files = {}
+  for file_entry in rarc.file_entries:
+    if file_entry.is_dir:
+      if file_entry.name not in [".", ".."]:
+        dir_paths.add(file_entry.file_path)
+      continue
+    # The data view doesn't load or copy the data of entries that haven't been accessed.
+    files[file_entry.file_path] = (
+      len(file_entry.data_view),
+      lambda file_entry=file_entry: file_entry.data_view[:COMPRESSION_HEADER_SIZE],
+      lambda file_entry=file_entry: file_entry.data_view,
+    )
+  return dir_paths, files
+
+def get_folder_contents(folder_path: str) -> tuple[set[str], dict[str, FileInfo]]:
+  def read_file(path, size=-1):
+    with open(path, "rb") as f:
+      return f.read(size)
+  
+  dir_paths = set()
+  files = {}
+  for dir_path, dir_names, file_names in os.walk(folder_path):
+    relative_dir_path = os.path.relpath(dir_path, folder_path).replace(os.sep, "/")
+    if relative_dir_path == ".":
+      relative_dir_path = ""
+    else:
+      dir_paths.add(relative_dir_path)
+    for file_name in file_names:
+      file_path = os.path.join(dir_path, file_name)
+      relative_file_path = file_name if not relative_dir_path else relative_dir_path + "/" + file_name
+      files[relative_file_path] = (
+        os.path.getsize(file_path),
+        lambda file_path=file_path: read_file(file_path, COMPRESSION_HEADER_SIZE),
+        lambda file_path=file_path: read_file(file_path),
+      )
+  return dir_paths, files
+
+def diff_contents(old_dir_paths: set[str], old_files: dict[str, FileInfo],
+                  new_dir_paths: set[str], new_files: dict[str, FileInfo]) -> RARCDiff:
+  diff = RARCDiff()
+  
+  for file_path in sorted(old_files.keys() & new_files.keys()):
+    if not check_file_data_is_same(old_files[file_path], new_files[file_path]):
+      diff.changed.append(file_path)
+  
+  # A removed file is considered to have been renamed if a file with identical data was added.
+  # Only files with a matching size on the other side need to be hashed to find these.
+  removed_file_paths = sorted(old_files.keys() - new_files.keys())
+  added_file_paths = sorted(new_files.keys() - old_files.keys())
+  added_sizes = {new_files[file_path][0] for file_path in added_file_paths}
+  removed_sizes = {old_files[file_path][0] for file_path in removed_file_paths}
+  added_file_paths_by_hash: dict[str, list[str]] = {}
+  for file_path in added_file_paths:
+    file_size, _, get_data = new_files[file_path]
+    if file_size in removed_sizes:
+      file_hash = hashlib.sha1(get_data()).hexdigest()
+      added_file_paths_by_hash.setdefault(file_hash, []).append(file_path)
+  
+  renamed_file_paths = set()
+  for file_path in removed_file_paths:
+    file_size, _, get_data = old_files[file_path]
+    if file_size in added_sizes:
+      file_hash = hashlib.sha1(get_data()).hexdigest()
+      if added_file_paths_by_hash.get(file_hash):
+        new_file_path = added_file_paths_by_hash[file_hash].pop(0)
+        diff.renamed.append((file_path, new_file_path))
+        renamed_file_paths.add(new_file_path)
+        continue
+    diff.removed.append(file_path)
+  diff.added = [file_path for file_path in added_file_paths if file_path not in renamed_file_paths]
+  
+  diff.added += sorted(new_dir_paths - old_dir_paths)
+  diff.removed += sorted(old_dir_paths - new_dir_paths)
+  
+  return diff
+
+def check_file_data_is_same(old_file: FileInfo, new_file: FileInfo) -> bool:
+  # Files that are the same apart from one side being compressed and the other not are considered the same.
+  # The sizes are compared first, using the decompressed sizes from the headers of compressed files, so that files that
+  # can't be the same don't need to be read in full or decompressed.
+  old_size, get_old_header, get_old_data = old_file
+  new_size, get_new_header, get_new_data = new_file
+  old_decompressed_size, old_is_compressed = get_decompressed_size(old_size, get_old_header())
+  new_decompressed_size, new_is_compressed = get_decompressed_size(new_size, get_new_header())
+  if old_decompressed_size != new_decompressed_size:
+    return False
+  
+  old_data = get_old_data()
+  new_data = get_new_data()
+  if old_size == new_size and old_data == new_data:
+    return True
+  if not old_is_compressed and not new_is_compressed:
+    return False
+  
+  # The raw data is different, but it may only be because one side is compressed and the other isn't, or because they
+  # were compressed differently, so compare what they decompress to.
+  return decompress_if_necessary(old_data) == decompress_if_necessary(new_data)
+
+def get_decompressed_size(size: int, header: bytes | memoryview) -> tuple[int, bool]:
+  # Returns the size of a file's data after decompression, and whether it's compressed.
+  if header[:4] in [Yaz0.MAGIC_BYTES, Yay0.MAGIC_BYTES] and len(header) >= COMPRESSION_HEADER_SIZE:
+    return fs.read_u32(BytesIO(header), 4), True
+  return size, False
@@ -2,6 +2,7 @@
 from gclib import fs_helpers as fs
 from gclib.yaz0_yay0 import Yaz0
 
+import struct
 from io import BytesIO
 from enum import Enum
 
@@ -207,21 +208,21 @@ class REL:
       f.write(fs.read_all_bytes(self.data))
   
   def save_changes(self, preserve_section_data_offsets=False):
-    self.data.truncate(0)
-    data = self.data
+    # The whole REL is built in a writer and then copied into self.data at once.
+    data = fs.BinaryWriter()
     
-    fs.write_u32(data, 0x00, self.id)
-    fs.write_u32(data, 0x04, 0)
-    fs.write_u32(data, 0x08, 0)
+    data.write_u32(0x00, self.id)
+    data.write_u32(0x04, 0)
+    data.write_u32(0x08, 0)
     self.num_sections = len(self.sections)
-    fs.write_u32(data, 0x0C, self.num_sections)
-    fs.write_u32(data, 0x14, self.name_offset)
-    fs.write_u32(data, 0x18, self.name_length)
-    fs.write_u32(data, 0x1C, self.rel_format_version)
-    fs.write_u32(data, 0x20, self.bss_size) # TODO recalculate this properly when necessary
+    data.write_u32(0x0C, self.num_sections)
+    data.write_u32(0x14, self.name_offset)
+    data.write_u32(0x18, self.name_length)
+    data.write_u32(0x1C, self.rel_format_version)
+    data.write_u32(0x20, self.bss_size) # TODO recalculate this properly when necessary
     
     self.section_info_table_offset = 0x4C
-    fs.write_u32(data, 0x10, self.section_info_table_offset)
+    data.write_u32(0x10, self.section_info_table_offset)
     next_section_info_offset = self.section_info_table_offset
     next_section_data_offset = self.section_info_table_offset + self.num_sections*RELSection.ENTRY_SIZE
     next_section_data_offset = fs.pad_offset_to_nearest(next_section_data_offset, 4) # TODO why is 4 more accurate here than the 8 from self.alignment?
@@ -251,19 +252,19 @@ class REL:
       relocations_against_main = self.relocation_entries_for_module.pop(0)
       self.relocation_entries_for_module[0] = relocations_against_main
     
-    self.imp_table_offset = fs.data_len(data)
+    self.imp_table_offset = data.data_len()
     imp_table_size = len(self.relocation_entries_for_module)*8
     imp_table_end = self.imp_table_offset + imp_table_size
     self.relocation_table_offset = imp_table_end
     self.fix_size = self.relocation_table_offset
-    fs.write_u32(data, 0x24, self.relocation_table_offset)
-    fs.write_u32(data, 0x28, self.imp_table_offset)
-    fs.write_u32(data, 0x2C, imp_table_size)
+    data.write_u32(0x24, self.relocation_table_offset)
+    data.write_u32(0x28, self.imp_table_offset)
+    data.write_u32(0x2C, imp_table_size)
     next_imp_offset = self.imp_table_offset
     next_relocation_entry_offset = self.relocation_table_offset
     for module_num, relocation_data_entries in self.relocation_entries_for_module.items():
-      fs.write_u32(data, next_imp_offset+0x00, module_num)
-      fs.write_u32(data, next_imp_offset+0x04, next_relocation_entry_offset)
+      data.write_u32(next_imp_offset+0x00, module_num)
+      data.write_u32(next_imp_offset+0x04, next_relocation_entry_offset)
       next_imp_offset += 8
       
       # Sort the relocations first by their section, then by their offset within the section.
@@ -319,18 +320,20 @@ class REL:
         # Only relocations after the end of the last REL-to-REL relocation can be repurposed.
         self.fix_size = next_relocation_entry_offset
     
-    fs.write_u8(data, 0x30, self.prolog_section)
-    fs.write_u8(data, 0x31, self.epilog_section)
-    fs.write_u8(data, 0x32, self.unresolved_section)
-    fs.write_u32(data, 0x34, self.prolog_offset)
-    fs.write_u32(data, 0x38, self.epilog_offset)
-    fs.write_u32(data, 0x3C, self.unresolved_offset)
+    data.write_u8(0x30, self.prolog_section)
+    data.write_u8(0x31, self.epilog_section)
+    data.write_u8(0x32, self.unresolved_section)
+    data.write_u32(0x34, self.prolog_offset)
+    data.write_u32(0x38, self.epilog_offset)
+    data.write_u32(0x3C, self.unresolved_offset)
     
-    fs.write_u32(data, 0x40, self.alignment)
-    fs.write_u32(data, 0x44, self.bss_alignment)
+    data.write_u32(0x40, self.alignment)
+    data.write_u32(0x44, self.bss_alignment)
     # TODO: align bss to the bss_alignment
     
-    fs.write_u32(data, 0x48, self.fix_size)
+    data.write_u32(0x48, self.fix_size)
+    
+    data.write_to(self.data)
 
 class RELSection:
   ENTRY_SIZE = 8
@@ -367,7 +370,7 @@ class RELSection:
       if self.length != 0:
         self.data = BytesIO(fs.read_bytes(rel_data, self.offset, self.length))
   
-  def save(self, rel_data, info_offset, next_section_data_offset, bss_size):
+  def save(self, rel_data: fs.BinaryWriter, info_offset, next_section_data_offset, bss_size):
     if self.is_uninitialized:
       self.offset = 0
     else:
@@ -375,19 +378,20 @@ class RELSection:
     mult_vals = self.offset
     if self.is_executable:
       mult_vals |= 1
-    fs.write_u32(rel_data, info_offset+0x00, mult_vals)
+    rel_data.write_u32(info_offset+0x00, mult_vals)
     
     if self.is_bss:
       self.length = bss_size
     else:
       self.length = fs.data_len(self.data)
-    fs.write_u32(rel_data, info_offset+0x04, self.length)
+    rel_data.write_u32(info_offset+0x04, self.length)
     
     if not self.is_bss and self.length != 0 and not self.is_uninitialized:
-      fs.write_bytes(rel_data, self.offset, fs.read_all_bytes(self.data))
+      rel_data.write_bytes(self.offset, fs.read_all_bytes(self.data))
 
 class RELRelocation:
   ENTRY_SIZE = 8
+  STRUCT = struct.Struct(">HBBI")
   
   def __init__(self):
     self.offset = None
@@ -408,7 +412,7 @@ class RELRelocation:
     self.relocation_offset = self.offset_of_curr_relocation_from_prev + prev_relocation_offset
     self.curr_section_num = curr_section_num
   
-  def save(self, rel_data, offset):
+  def save(self, rel_data: fs.BinaryWriter, offset):
     self.offset = offset
     
     if self.relocation_type == RELRelocationType.R_DOLPHIN_SECTION:
@@ -422,10 +426,11 @@ class RELRelocation:
       self.section_num_to_relocate_against = 0
       self.symbol_address = 0
     
-    fs.write_u16(rel_data, offset+0x00, self.offset_of_curr_relocation_from_prev)
-    fs.write_u8(rel_data, offset+0x02, self.relocation_type.value)
-    fs.write_u8(rel_data, offset+0x03, self.section_num_to_relocate_against)
-    fs.write_u32(rel_data, offset+0x04, self.symbol_address)
+    rel_data.pack_into(
+      self.STRUCT, offset,
+      self.offset_of_curr_relocation_from_prev, self.relocation_type.value,
+      self.section_num_to_relocate_against, self.symbol_address,
+    )
   
   def __str__(self):
     return f"<RELRelocation: {self.relocation_type=} ({self.curr_section_num=:X} {self.relocation_offset=:X}) ({self.section_num_to_relocate_against=:X} {self.symbol_address=:X})>"
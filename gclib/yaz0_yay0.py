@@ -404,3 +404,11 @@ class Yay0(Yaz0Yay0):
       fs.align_data_to_nearest(comp_data, 0x20, padding_bytes=b'\0')
     
     return comp_data
+
+def decompress_if_necessary(data: bytes | memoryview) -> bytes | memoryview:
+  # Decompresses raw data if it's Yaz0 or Yay0 compressed, and returns it unchanged otherwise.
+  if data[:4] == Yaz0.MAGIC_BYTES:
+    return Yaz0.decompress(BytesIO(data)).getvalue()
+  elif data[:4] == Yay0.MAGIC_BYTES:
+    return Yay0.decompress(BytesIO(data)).getvalue()
+  return data
@@ -0,0 +1,45 @@
+# Helpers for building small disc images to test with.
+
+import struct
+
+from gclib.gcm import GCM
+
+DOL_OFFSET = 0x3000
+FST_OFFSET = 0x4000
+
+def build_iso(files: dict[str, bytes]) -> bytes:
+  # Builds a minimal disc image with the given files in the root directory of the filesystem.
+  iso = bytearray(DOL_OFFSET)
+  # Apploader header with an empty body and trailer.
+  struct.pack_into(">II", iso, 0x2440 + 0x14, 0x10, 0x10)
+  
+  # A DOL with a single text section.
+  dol = bytearray(0x140)
+  struct.pack_into(">I", dol, 0x00, 0x100)
+  struct.pack_into(">I", dol, 0x90, 0x40)
+  iso += dol
+  iso += bytes(FST_OFFSET - len(iso))
+  
+  num_file_entries = len(files) + 1
+  string_table = bytearray(b"\0")
+  fst = bytearray(num_file_entries*0xC)
+  struct.pack_into(">III", fst, 0, 0x01000000, 0, num_file_entries)
+  file_data_offset = (FST_OFFSET + len(fst) + sum(len(name)+1 for name in files) + 1 + 0x7FF) & ~0x7FF
+  file_datas = bytearray()
+  for file_index, (name, data) in enumerate(files.items(), start=1):
+    struct.pack_into(">III", fst, file_index*0xC, len(string_table), file_data_offset + len(file_datas), len(data))
+    string_table += name.encode("ascii") + b"\0"
+    file_datas += data
+    file_datas += bytes(-len(file_datas) % 4)
+  fst += string_table
+  
+  struct.pack_into(">III", iso, 0x420, DOL_OFFSET, FST_OFFSET, len(fst))
+  struct.pack_into(">I", iso, 0x42C, len(fst))
+  iso += fst
+  iso += bytes(file_data_offset - len(iso))
+  iso += file_datas
+  return bytes(iso)
+
+def export_to_iso(gcm: GCM, output_file_path, **kwargs):
+  for _ in gcm.export_disc_to_iso_with_changed_files(output_file_path, **kwargs):
+    pass
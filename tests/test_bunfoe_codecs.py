@@ -0,0 +1,129 @@
+# Checks that the compiled BUNFOE codecs read and save every BUNFOE class exactly the same way as the generic per-field
+# code does, by running both on the same random data.
+# Run from the root of the repository with: python -m pytest tests
+
+import contextlib
+import copy
+import importlib
+import io
+import pkgutil
+import random
+
+import pytest
+
+from gclib import bunfoe
+from gclib.bunfoe import BUNFOE
+
+NUM_READ_TRIALS = 60
+NUM_SAVE_TRIALS = 40
+DATA_SIZE = 0x400
+# Values that are assigned to fields before saving, including ones that are invalid for most fields.
+FIELD_VALUES_TO_SAVE = [0, 1, 2, -1, 0xFF, 0x100, 0xFFFFFF, 0x1000000, None, True, False, 1.5, "x", [0], [1]*3]
+
+def get_all_bunfoe_classes() -> list[type[BUNFOE]]:
+  for package_name in ["gclib", "gclib.j3d_chunks", "gclib.jpa_chunks"]:
+    package = importlib.import_module(package_name)
+    for module_info in pkgutil.iter_modules(package.__path__):
+      if not module_info.ispkg:
+        importlib.import_module(package_name + "." + module_info.name)
+  
+  classes = set()
+  def add_subclasses(cls):
+    for subclass in cls.__subclasses__():
+      classes.add(subclass)
+      add_subclasses(subclass)
+  add_subclasses(BUNFOE)
+  
+  classes = [cls for cls in classes if hasattr(cls, "__dataclass_fields__")]
+  return sorted(classes, key=lambda cls: cls.__module__ + "." + cls.__qualname__)
+
+@pytest.fixture
+def use_compiled_codecs():
+  # Sets bunfoe.USE_COMPILED_CODECS, and restores it after the test.
+  original_value = bunfoe.USE_COMPILED_CODECS
+  def set_use_compiled_codecs(value: bool):
+    bunfoe.USE_COMPILED_CODECS = value
+  yield set_use_compiled_codecs
+  bunfoe.USE_COMPILED_CODECS = original_value
+
+def make_random_data(rng: random.Random, trial: int) -> bytes:
+  # Cycles through data that's all zeroes, mostly zeroes and ones (so booleans are valid), fully random, and too short.
+  kind = trial % 4
+  if kind == 0:
+    return bytes(DATA_SIZE)
+  elif kind == 1:
+    return bytes(rng.choice([0, 1]) for _ in range(DATA_SIZE))
+  elif kind == 2:
+    return bytes(rng.randrange(256) for _ in range(DATA_SIZE))
+  else:
+    return bytes(rng.choice([0, 1, 2, 3, 0xFF]) for _ in range(rng.randrange(0, 40)))
+
+def read_and_save(cls: type[BUNFOE], data: bytes) -> list:
+  # Returns everything observable about reading and then saving an instance, including errors and printed warnings.
+  printed_output = io.StringIO()
+  results = []
+  with contextlib.redirect_stdout(printed_output):
+    try:
+      instance = cls(io.BytesIO(data))
+      end_offset = instance.read(0)
+      results.append(("read", end_offset, repr(instance)))
+      instance.data = io.BytesIO(bytes(len(data)))
+      end_offset = instance.save(0)
+      results.append(("save", end_offset, instance.data.getvalue(), repr(instance)))
+    except Exception as e:
+      results.append(("error", type(e).__name__, str(e)))
+  results.append(printed_output.getvalue())
+  return results
+
+def save(instance: BUNFOE) -> tuple:
+  instance = copy.copy(instance)
+  instance.data = io.BytesIO(bytes(0x20))
+  try:
+    end_offset = instance.save(0)
+    return (end_offset, instance.data.getvalue(), repr(instance))
+  except Exception as e:
+    return (type(e).__name__, str(e), instance.data.getvalue(), repr(instance))
+
+@pytest.mark.parametrize("cls", get_all_bunfoe_classes(), ids=lambda cls: cls.__qualname__)
+def test_read_and_save_match(cls, use_compiled_codecs):
+  rng = random.Random(cls.__qualname__)
+  for trial in range(NUM_READ_TRIALS):
+    data = make_random_data(rng, trial)
+    use_compiled_codecs(False)
+    generic_results = read_and_save(cls, data)
+    use_compiled_codecs(True)
+    compiled_results = read_and_save(cls, data)
+    assert compiled_results == generic_results, f"Trial {trial} with data {data.hex()}"
+
+@pytest.mark.parametrize("cls", get_all_bunfoe_classes(), ids=lambda cls: cls.__qualname__)
+def test_save_modified_fields_match(cls, use_compiled_codecs):
+  rng = random.Random(cls.__qualname__)
+  for trial in range(NUM_SAVE_TRIALS):
+    data = bytes(rng.choice([0, 1]) for _ in range(DATA_SIZE))
+    use_compiled_codecs(False)
+    try:
+      with contextlib.redirect_stdout(io.StringIO()):
+        instance = cls(io.BytesIO(data))
+        instance.read(0)
+    except Exception:
+      continue
+    
+    fields = bunfoe.fields(instance)
+    if not fields:
+      return
+    for _ in range(rng.randrange(1, 3)):
+      field = rng.choice(fields)
+      value = rng.choice(FIELD_VALUES_TO_SAVE)
+      current_value = getattr(instance, field.name)
+      if isinstance(current_value, list) and current_value and rng.random() < 0.5:
+        # Replace a single element instead of the whole list.
+        new_list = list(current_value)
+        new_list[rng.randrange(len(new_list))] = value
+        value = new_list
+      setattr(instance, field.name, value)
+    
+    use_compiled_codecs(False)
+    generic_result = save(instance)
+    use_compiled_codecs(True)
+    compiled_result = save(instance)
+    assert compiled_result == generic_result, f"Trial {trial}"
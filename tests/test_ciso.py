@@ -0,0 +1,70 @@
+# Checks that discs survive being exported to a CISO and read back, including empty blocks at the end of the disc.
+# Run from the root of the repository with: python -m pytest tests
+
+import io
+import struct
+
+import pytest
+
+from gclib.ciso import CISO, CISOReader
+from gclib.gcm import GCM
+
+from disc_images import build_iso, export_to_iso
+
+@pytest.fixture
+def trailing_zeroes_iso():
+  files = {
+    "data.bin": bytes(range(256)) * 0x80,
+    "zeros.bin": bytes(0x30000),
+  }
+  return build_iso(files), files
+
+def test_ciso_round_trip_with_trailing_empty_blocks(tmp_path, trailing_zeroes_iso):
+  iso_data, files = trailing_zeroes_iso
+  input_iso_path = tmp_path / "input.iso"
+  input_iso_path.write_bytes(iso_data)
+  gcm = GCM(str(input_iso_path))
+  gcm.read_entire_disc()
+  original_iso_path = tmp_path / "original.iso"
+  export_to_iso(gcm, str(original_iso_path))
+  
+  ciso_path = tmp_path / "output.ciso"
+  export_to_iso(gcm, str(ciso_path), as_ciso=True, ciso_block_size=0x8000)
+  # The trailing zeroes must have been left out of the CISO for this test to cover them.
+  assert ciso_path.stat().st_size < original_iso_path.stat().st_size
+  
+  ciso_gcm = GCM(str(ciso_path))
+  ciso_gcm.read_entire_disc()
+  for name, data in files.items():
+    assert ciso_gcm.read_file_data("files/" + name).getvalue() == data
+  
+  round_trip_iso_path = tmp_path / "round_trip.iso"
+  export_to_iso(ciso_gcm, str(round_trip_iso_path))
+  assert round_trip_iso_path.read_bytes() == original_iso_path.read_bytes()
+
+def test_ciso_reader_reads_absent_blocks_as_zeroes():
+  block_size = 0x10
+  header = bytearray(CISO.HEADER_SIZE)
+  header[0:4] = CISO.MAGIC
+  struct.pack_into("<I", header, 4, block_size)
+  header[8 + 1] = 1
+  ciso_data = bytes(header) + b"\xAA" * block_size
+  
+  reader = CISOReader(io.BytesIO(ciso_data))
+  assert reader.size == CISO.MAX_BLOCKS * block_size
+  reader.seek(0)
+  assert reader.read(block_size*3) == bytes(block_size) + b"\xAA" * block_size + bytes(block_size)
+  reader.seek(reader.size - block_size)
+  assert reader.read(block_size) == bytes(block_size)
+
+def test_ciso_reader_raises_on_truncated_block():
+  block_size = 0x10
+  header = bytearray(CISO.HEADER_SIZE)
+  header[0:4] = CISO.MAGIC
+  struct.pack_into("<I", header, 4, block_size)
+  header[8 + 0] = 1
+  ciso_data = bytes(header) + b"\xAA" * (block_size // 2)
+  
+  reader = CISOReader(io.BytesIO(ciso_data))
+  with pytest.raises(Exception, match="truncated"):
+    reader.read(block_size)
@@ -0,0 +1,35 @@
+# Checks that PatternMatcher finds every occurrence of its byte string patterns, including overlapping ones, whether
+# the patterns are searched for separately or all at once with a LiteralAutomaton.
+# Run from the root of the repository with: python -m pytest tests
+
+import random
+
+import pytest
+
+from gclib.disc_search import MAX_LITERAL_PATTERNS_TO_SEARCH_SEPARATELY, PatternMatcher
+
+NUM_TRIALS = 200
+
+def find_all_naively(data: bytes, patterns: list[bytes]) -> list[tuple[int, int, bytes]]:
+  return sorted(
+    (offset, offset + len(pattern), pattern)
+    for pattern in set(patterns)
+    for offset in range(len(data))
+    if data.startswith(pattern, offset)
+  )
+
+@pytest.mark.parametrize("num_patterns", [
+  MAX_LITERAL_PATTERNS_TO_SEARCH_SEPARATELY,
+  MAX_LITERAL_PATTERNS_TO_SEARCH_SEPARATELY + 1,
+])
+def test_find_all_literals(num_patterns):
+  rng = random.Random(num_patterns)
+  for trial in range(NUM_TRIALS):
+    # A small alphabet makes for lots of overlapping matches and patterns that are prefixes or suffixes of others.
+    alphabet = bytes(rng.sample(range(256), rng.randint(1, 4)))
+    data = bytes(rng.choice(alphabet) for _ in range(rng.randrange(0, 300)))
+    patterns = [bytes(rng.choice(alphabet) for _ in range(rng.randint(1, 6))) for _ in range(num_patterns)]
+    
+    matcher = PatternMatcher(patterns)
+    matches = matcher.find_all(memoryview(data) if trial % 2 else data)
+    assert sorted(matches) == find_all_naively(data, patterns), f"Trial {trial}"
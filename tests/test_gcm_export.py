@@ -0,0 +1,45 @@
+# Checks what happens to the output of an ISO export that is stopped before it finishes.
+# Run from the root of the repository with: python -m pytest tests
+
+import asyncio
+
+from gclib.gcm import GCM
+
+from disc_images import build_iso
+
+def read_test_disc(tmp_path) -> GCM:
+  files = {f"file{i}.bin": bytes([i]) * 0x100 for i in range(4)}
+  input_iso_path = tmp_path / "input.iso"
+  input_iso_path.write_bytes(build_iso(files))
+  gcm = GCM(str(input_iso_path))
+  gcm.read_entire_disc()
+  return gcm
+
+def test_closing_sync_export_early_keeps_output(tmp_path):
+  gcm = read_test_disc(tmp_path)
+  output_iso_path = tmp_path / "output.iso"
+  export = gcm.export_disc_to_iso_with_changed_files(str(output_iso_path))
+  next(export)
+  export.close()
+  assert output_iso_path.exists()
+  assert gcm.output_iso is None
+
+def test_closing_sync_export_early_can_remove_output(tmp_path):
+  gcm = read_test_disc(tmp_path)
+  output_iso_path = tmp_path / "output.iso"
+  export = gcm.export_disc_to_iso_with_changed_files(str(output_iso_path), remove_output_if_stopped_early=True)
+  next(export)
+  export.close()
+  assert not output_iso_path.exists()
+
+def test_stopping_async_export_early_removes_output(tmp_path):
+  gcm = read_test_disc(tmp_path)
+  output_iso_path = tmp_path / "output.iso"
+  
+  async def export_first_step():
+    export = gcm.aexport_disc_to_iso_with_changed_files(str(output_iso_path))
+    await anext(export)
+    await export.aclose()
+  
+  asyncio.run(export_first_step())
+  assert not output_iso_path.exists()